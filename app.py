@@ -1,17 +1,526 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, g, make_response, url_for
 import sqlite3
 import os
-from datetime import datetime
+import threading
+import functools
+import hashlib
+import base64
+import json
+import time
+import atexit
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
 import re
 
+from frozen import frozen_file_path, frozen_manifest_path, load_manifest
+from schema import upgrade_schema
+from stat_engine import batting_lines
+from metrics import MetricsRecorder
+from query_profiler import SQL_PROFILE, QueryProfiler
+
 app = Flask(__name__)
 
-# Database connection helper
-def get_db_connection():
-    conn = sqlite3.connect('softball_stats.db')
+# ============================================================
+# Database connections
+# ============================================================
+# Each worker thread keeps one tuned, read-only connection and reuses it
+# across requests. Routes get it through get_db_connection() (stored on
+# Flask's g) and the teardown hook releases it, so early returns such as
+# 404s can no longer leak connections.
+#
+# `data_update.py --publish` swaps in a new database generation by
+# repointing DB_PATH (see publish.py); a thread whose connection is on an
+# older generation reopens at the start of its next request.
+
+DB_PATH = 'softball_stats.db'
+
+# sqlite3's per-connection prepared statement cache (default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+CONNECTION_PRAGMAS = [
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA cache_size = -16000',       # 16 MB page cache
+    'PRAGMA mmap_size = 268435456',     # 256 MB memory-mapped reads
+    'PRAGMA temp_store = MEMORY',
+]
+
+_db_local = threading.local()
+_db_stats_lock = threading.Lock()
+
+# Per-process counters, exposed at /_debug/db
+db_stats = {'requests': 0, 'connections_opened': 0, 'queries_executed': 0, 'generation_reopens': 0}
+
+
+def _count(key, amount=1):
+    with _db_stats_lock:
+        db_stats[key] += amount
+
+
+class CountingConnection(sqlite3.Connection):
+    """sqlite3 connection that counts (and times) the statements it executes.
+    The per-request totals feed /metrics; rows fetched after execute()
+    returns aren't included in the time."""
+
+    def execute(self, *args, **kwargs):
+        _count('queries_executed')
+        started = time.perf_counter()
+        profile = getattr(_db_local, 'profile', None)
+        traced = len(profile) if profile is not None else 0
+        try:
+            return super().execute(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _db_local.sql_statements = getattr(_db_local, 'sql_statements', 0) + 1
+            _db_local.sql_seconds = getattr(_db_local, 'sql_seconds', 0.0) + elapsed
+            if profile is not None and len(profile) > traced:
+                # The trace callback saw it with values inlined; keep the
+                # parameterized text so repeats group together
+                profile[traced].update(sql=args[0], params=args[1] if len(args) > 1 else (),
+                                       seconds=elapsed)
+
+
+def open_db_connection(read_only=True):
+    """Open a new tuned connection. Readers are query_only."""
+    conn = sqlite3.connect(DB_PATH, factory=CountingConnection,
+                           cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    try:
+        # WAL lets data_update.py write while workers keep reading
+        conn.execute('PRAGMA journal_mode = WAL')
+    except sqlite3.OperationalError:
+        pass  # read-only file system - keep the current journal mode
+    pragmas = CONNECTION_PRAGMAS + (['PRAGMA query_only = ON'] if read_only else [])
+    conn.executescript(';\n'.join(pragmas))
+    _count('connections_opened')
     return conn
 
+
+def _trace_statement(sql):
+    """set_trace_callback hook (SQL_PROFILE=1): note every statement run"""
+    profile = getattr(_db_local, 'profile', None)
+    if profile is not None:
+        profile.append({'sql': sql, 'params': (), 'seconds': None})
+
+
+def _db_generation():
+    """Identity of the file DB_PATH resolves to; changes when a new
+    generation is published (or the file is replaced)"""
+    try:
+        stat = os.stat(DB_PATH)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+
+# Database connection helper
+def get_db_connection():
+    """Read connection for the current request (reused per worker thread)"""
+    if 'db' not in g:
+        conn = getattr(_db_local, 'conn', None)
+        generation = _db_generation()
+        if conn is not None and _db_local.generation != generation:
+            conn.close()
+            conn = None
+            _count('generation_reopens')
+        if conn is None:
+            conn = open_db_connection(read_only=True)
+            if SQL_PROFILE:
+                conn.set_trace_callback(_trace_statement)
+            _db_local.conn = conn
+            _db_local.generation = generation
+        g.db = conn
+    return g.db
+
+
+@app.before_request
+def count_request():
+    _count('requests')
+    g.request_started = time.perf_counter()
+    _db_local.sql_statements = 0
+    _db_local.sql_seconds = 0.0
+    _db_local.profile = [] if SQL_PROFILE else None
+
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """Hand the request's connection back to its thread (never closes it)"""
+    conn = g.pop('db', None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+
+@app.route('/_debug/db')
+def db_debug_stats():
+    """Connection/query counters for this worker process"""
+    with _db_stats_lock:
+        stats = dict(db_stats)
+    stats['pid'] = os.getpid()
+    stats['queries_per_request'] = (
+        round(stats['queries_executed'] / stats['requests'], 2) if stats['requests'] else 0
+    )
+    return jsonify(stats)
+
+
+# ============================================================
+# Request metrics
+# ============================================================
+# Every response is recorded (latency, size, status, SQL statements and SQL
+# time) into a MetricsRecorder, which folds each worker's totals into a
+# shared SQLite file (metrics.py) so /metrics covers all gunicorn workers.
+
+metrics_recorder = MetricsRecorder()
+atexit.register(metrics_recorder.flush)
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics_recorder.record_request(
+            request.endpoint or 'unmatched', request.method, response.status_code,
+            time.perf_counter() - started, response.content_length or 0,
+            getattr(_db_local, 'sql_statements', 0), getattr(_db_local, 'sql_seconds', 0.0))
+    return response
+
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """All workers' request metrics in Prometheus text format"""
+    return app.response_class(metrics_recorder.render(),
+                              content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ============================================================
+# SQL profiler (SQL_PROFILE=1)
+# ============================================================
+# Opt-in: every statement a request runs is timed and its query plan is
+# checked for full table scans and temp B-trees (see query_profiler.py).
+# Meant for development and staging - it adds an EXPLAIN per new statement
+# and a log line per request.
+
+query_profiler = QueryProfiler() if SQL_PROFILE else None
+
+
+@app.after_request
+def record_query_profile(response):
+    statements = getattr(_db_local, 'profile', None)
+    _db_local.profile = None  # stop tracing before running EXPLAINs
+    if statements and 'db' in g:
+        query_profiler.finish_request(g.db, request.method, request.path, request.endpoint,
+                                      response.status_code, statements)
+    return response
+
+
+@app.route('/_debug/queries')
+def query_profile_debug():
+    """Profiled statements by total time, with plans and flags"""
+    if query_profiler is None:
+        return jsonify({'enabled': False, 'hint': 'start the app with SQL_PROFILE=1'})
+    stats = query_profiler.snapshot()
+    stats.update(enabled=True, pid=os.getpid(), log=query_profiler.log_path)
+    return jsonify(stats)
+
+
+# ============================================================
+# Response cache
+# ============================================================
+# Rendered pages are cached per (path, query args, data version). The data
+# version is app_meta.sync_version, which data_update.py / start_new_season.py
+# bump whenever they change anything, so a sync invalidates every page.
+# Responses carry a strong ETag (hash of the body) and Last-Modified, and
+# conditional requests that match get a 304 without running the view.
+
+# Total size of cached bodies per worker process; 0 disables the cache
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+CachedResponse = namedtuple('CachedResponse', ['body', 'content_type', 'etag', 'last_modified'])
+
+
+class ResponseCache:
+    """Thread-safe LRU of rendered responses, bounded by total body size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'stores': 0,
+                      'evictions': 0, 'invalidations': 0, 'uncacheable': 0}
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, key, entry, version):
+        size = len(entry.body)
+        with self._lock:
+            if version != self.version:
+                # Data changed - everything cached under the old version is stale
+                self.stats['invalidations'] += len(self._entries)
+                self._entries.clear()
+                self.size = 0
+                self.version = version
+            if size > self.max_bytes:
+                self.stats['uncacheable'] += 1
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old.body)
+            self._entries[key] = entry
+            self.size += size
+            self.stats['stores'] += 1
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.body)
+                self.stats['evictions'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update(entries=len(self._entries), bytes=self.size,
+                         max_bytes=self.max_bytes, version=self.version)
+        return stats
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MAX_BYTES)
+
+
+def _file_data_version():
+    """Fallback version for databases without app_meta: DB + WAL mtimes"""
+    mtime = 0
+    for path in (DB_PATH, DB_PATH + '-wal'):
+        try:
+            mtime = max(mtime, os.stat(path).st_mtime_ns)
+        except OSError:
+            pass
+    return f"mtime-{mtime}", datetime.fromtimestamp(mtime / 1e9, timezone.utc)
+
+
+def current_data_version(conn):
+    """(version token, last modified) for the data this connection sees.
+    PRAGMA data_version only changes when another connection commits, so
+    app_meta is re-read only after a write, not on every request."""
+    seen = conn.execute('PRAGMA data_version').fetchone()[0]
+    cached = getattr(_db_local, 'data_version', None)
+    if cached is not None and cached[0] is conn and cached[1] == seen:
+        return cached[2]
+
+    try:
+        row = conn.execute(
+            "SELECT value, updated_at FROM app_meta WHERE key = 'sync_version'"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # app_meta not created yet (schema < 4)
+    if row:
+        last_modified = datetime.strptime(row['updated_at'], '%Y-%m-%d %H:%M:%S')
+        version = (f"sync-{row['value']}", last_modified.replace(tzinfo=timezone.utc))
+    else:
+        version = _file_data_version()
+    _db_local.data_version = (conn, seen, version)
+    return version
+
+
+def cached_response(view):
+    """Serve GET requests for this view from response_cache (with 304s)"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'GET' or response_cache.max_bytes <= 0:
+            return view(*args, **kwargs)
+
+        version, last_modified = current_data_version(get_db_connection())
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), version)
+        entry = response_cache.get(key)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                response_cache.count('uncacheable')
+                return response
+            body = response.get_data()
+            entry = CachedResponse(body, response.content_type,
+                                   hashlib.sha1(body).hexdigest(), last_modified)
+            response_cache.put(key, entry, version)
+
+        response = app.response_class(entry.body, content_type=entry.content_type)
+        response.set_etag(entry.etag)
+        response.last_modified = entry.last_modified
+        response.cache_control.no_cache = True  # browsers revalidate -> 304
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            response_cache.count('not_modified')
+        return response
+    return wrapper
+
+
+@app.route('/_debug/cache')
+def cache_debug_stats():
+    """Response cache counters for this worker process"""
+    stats = response_cache.snapshot()
+    stats['pid'] = os.getpid()
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0
+    with _season_contexts_lock:
+        stats['season_contexts'] = dict(season_context_stats, entries=len(_season_contexts))
+    return jsonify(stats)
+
+
+# ============================================================
+# Frozen pages
+# ============================================================
+# Closed seasons never change, so freeze.py renders their pages to static
+# HTML (plus a .gz of each) under FROZEN_DIR and lists them in a manifest
+# (see frozen.py).
+# Those pages are answered here before any queries run. A season frozen at
+# another sync_version than the database's (re-synced since) renders live
+# until freeze.py re-freezes it. The URLs aren't fingerprinted, so browsers
+# revalidate against the ETag rather than caching them for good.
+# SERVE_FROZEN=0 turns this off (freeze.py itself uses that).
+
+SERVE_FROZEN = os.environ.get('SERVE_FROZEN', '1') == '1'
+
+_frozen = {'mtime': None, 'version': None, 'pages': {}}
+_frozen_lock = threading.Lock()
+
+
+def frozen_pages(version):
+    """{path: etag} of the pages frozen at data version `version` (see
+    current_data_version); re-read when the manifest or the version changes"""
+    try:
+        mtime = os.stat(frozen_manifest_path()).st_mtime_ns
+    except OSError:
+        return {}
+    with _frozen_lock:
+        if _frozen['mtime'] != mtime or _frozen['version'] != version:
+            manifest = load_manifest()
+            pages = {}
+            for season in manifest['seasons'].values():
+                if f"sync-{season.get('sync_version')}" == version:
+                    pages.update(season['pages'])
+            _frozen.update(mtime=mtime, version=version, pages=pages)
+        return _frozen['pages']
+
+
+@app.before_request
+def serve_frozen_page():
+    if not SERVE_FROZEN or request.method != 'GET' or request.args:
+        return None
+    version, _ = current_data_version(get_db_connection())
+    etag = frozen_pages(version).get(request.path)
+    if etag is None:
+        return None
+
+    file_path = frozen_file_path(request.path)
+    gzipped = request.accept_encodings['gzip'] > 0 and os.path.exists(file_path + '.gz')
+    try:
+        with open(file_path + '.gz' if gzipped else file_path, 'rb') as f:
+            body = f.read()
+    except OSError:
+        return None  # manifest ahead of the files - render it live
+
+    response = app.response_class(body, content_type='text/html; charset=utf-8')
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True  # browsers revalidate -> 304
+    return response.make_conditional(request)
+
+
+# ============================================================
+# Season context
+# ============================================================
+# Every season tab (standings, batting, metrics, all-star, export) needs the
+# same basics: the Seasons row, the season's teams with display names and
+# divisions, games played and the qualified-PA threshold. They're built once
+# per (season, data version) and shared by all the tabs in this process.
+
+SEASON_CONTEXT_CACHE_SIZE = 32
+
+
+class SeasonContext:
+    """Read-only facts about one season - shared between requests, so
+    routes must copy anything they want to modify"""
+
+    def __init__(self, conn, season):
+        self.season = season
+        self.filter_number = season['FilterNumber']
+        self.short_name = season['short_name'].strip() if season['short_name'] else ''
+
+        # Teams with their parsed display names and divisions ('Wolverines
+        # (Ballers) W26' -> 'Wolverines', 'Ballers'; schema.team_season_columns)
+        self.teams = [dict(team) for team in conn.execute('''
+            SELECT TeamNumber, LongTeamName, Manager,
+                   display_name as team_display_name, division
+            FROM Teams
+            WHERE season_code = ?
+            ORDER BY TeamNumber
+        ''', (self.short_name,)).fetchall()]
+        self.teams_by_number = {team['TeamNumber']: team for team in self.teams}
+        self.has_divisions = any(team['division'] for team in self.teams)
+
+        # Team -> division for grouping players ('League' when undivided)
+        self.team_division = {}
+        self.division_teams_count = {}
+        for team in self.teams:
+            division_name = team['division'] or 'League'
+            self.team_division[team['TeamNumber']] = division_name
+            self.division_teams_count[division_name] = self.division_teams_count.get(division_name, 0) + 1
+
+        self.season_stats = conn.execute('''
+            SELECT
+                COUNT(DISTINCT g.GameNumber) as TotalGames,
+                COUNT(DISTINCT CASE WHEN p.LastName != 'Subs' THEN p.PersonNumber END) as TotalPlayers,
+                SUM(b.HR) as TotalHRs
+            FROM game_stats g
+            JOIN Teams t ON g.TeamNumber = t.TeamNumber
+            LEFT JOIN batting_stats b ON b.TeamNumber = t.TeamNumber AND b.GameNumber = g.GameNumber
+            LEFT JOIN People p ON p.PersonNumber = b.PlayerNumber
+            WHERE t.season_code = ?
+        ''', (self.short_name,)).fetchone()
+        self.total_games = self.season_stats['TotalGames'] or 0
+        # Qualified = 2.5 PA per team game (also the leaderboard minimum)
+        self.qualified_pa_threshold = int(self.total_games * 2.5)
+
+
+_season_contexts = OrderedDict()
+_season_contexts_lock = threading.Lock()
+season_context_stats = {'hits': 0, 'misses': 0}
+
+
+def get_season_context(conn, filter_number):
+    """SeasonContext for a season's FilterNumber, or None if there's no such
+    season. Memoized per (filter_number, data version), so a sync rebuilds it."""
+    version, _ = current_data_version(conn)
+    key = (str(filter_number), version)
+    with _season_contexts_lock:
+        if key in _season_contexts:
+            _season_contexts.move_to_end(key)
+            season_context_stats['hits'] += 1
+            return _season_contexts[key]
+        season_context_stats['misses'] += 1
+
+    season = conn.execute('''
+        SELECT * FROM Seasons WHERE FilterNumber = ?
+    ''', (filter_number,)).fetchone()
+    context = SeasonContext(conn, season) if season else None
+
+    with _season_contexts_lock:
+        _season_contexts[key] = context
+        while len(_season_contexts) > SEASON_CONTEXT_CACHE_SIZE:
+            _season_contexts.popitem(last=False)
+    return context
+
 # Update your calculate_batting_stats function in app.py:
 
 def calculate_batting_stats(stats_dict):
@@ -75,78 +584,6 @@ def format_percentage(value):
         return f"{value:.3f}"[1:]  # Remove the leading 0 for values < 1.000
 
 
-def get_season_sort_key(team_name):
-    """
-    Create sort key for team seasons (newest to oldest)
-    Vipers F21 > Vipers S21 > Vipers W21 > Vipers F20 > etc.
-    """
-    if not team_name or len(team_name) < 3:
-        return (0, 0, 0)
-    
-    # Extract season from team name (e.g., "Vipers F12" -> "F12")
-    parts = team_name.split()
-    if len(parts) < 2:
-        return (0, 0, 0)
-    
-    season_part = parts[-1]  # Last part should be like "F12", "S21", etc.
-    
-    if len(season_part) < 3:
-        return (0, 0, 0)
-    
-    season_type = season_part[0]  # F, S, or W
-    try:
-        year = int(season_part[1:])  # 12, 21, etc.
-    except:
-        return (0, 0, 0)
-    
-    # Season order within year: Fall=3, Summer=2, Winter=1
-    season_order = {'F': 3, 'S': 2, 'W': 1}.get(season_type, 0)
-    
-    return (year, season_order, 0)
-
-# Helper function to get season from date using Seasons table
-def get_season_from_date_advanced(date_str, seasons_dict):
-    """
-    More sophisticated season detection using the Seasons table
-    """
-    if not date_str:
-        return "Unknown"
-    
-    try:
-        # For now, use the simple logic but we can enhance this
-        # Parse date string (MM/DD/YY format from the data)
-        if '/' in date_str:
-            parts = date_str.split('/')
-            month = int(parts[0])
-            year_part = parts[2].split()[0]  # Remove time part
-            year = int(year_part)
-            
-            # Convert 2-digit year to 4-digit
-            if year < 50:
-                year += 2000
-            else:
-                year += 1900
-            
-            # Determine season based on month
-            if month in [12, 1, 2]:  # Winter
-                season_year = year if month == 12 else year
-                season_code = f"W{str(season_year)[-2:]}"
-            elif month in [3, 4, 5, 6, 7, 8]:  # Summer  
-                season_code = f"S{str(year)[-2:]}"
-            else:  # Fall (9, 10, 11)
-                season_code = f"F{str(year)[-2:]}"
-            
-            # Look up in seasons_dict to get the FilterNumber
-            for filter_num, season_info in seasons_dict.items():
-                if season_info['short_name'] == season_code:
-                    return season_code
-            
-            return season_code
-    except:
-        return "Unknown"
-    
-    return "Unknown"
-
 # Make calculate_batting_stats and format_percentage available in all templates
 @app.context_processor
 def utility_processor():
@@ -155,9 +592,17 @@ def utility_processor():
         format_percentage=format_percentage
     )
 
+def render_page(template, **context):
+    """render_template, or the bare context when an /api/v1 route is
+    borrowing the page's data (see page_context)."""
+    if g.get('api_context'):
+        return context
+    return render_template(template, **context)
+
+
 # Initialize database
 def init_db():
-    conn = get_db_connection()
+    conn = open_db_connection(read_only=False)
     
     # Create tables based on your schema
     conn.execute('''
@@ -239,7 +684,16 @@ def init_db():
         CREATE TABLE IF NOT EXISTS "Seasons" (
             "FilterNumber" TEXT,
             "season_name" TEXT,
-            short_name TEXT
+            short_name TEXT,
+            Champion TEXT,
+            year_extracted INTEGER
+        )
+    ''')
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS "Roster" (
+            TeamNumber INTEGER,
+            PersonNumber INTEGER
         )
     ''')
     
@@ -253,6 +707,9 @@ def init_db():
     ''')
     
     conn.commit()
+    
+    # Indexes, unique keys and summary tables (versioned, applied once)
+    upgrade_schema(conn)
     conn.close()
 
 # Home page route
@@ -260,56 +717,121 @@ def init_db():
 def index():
     return render_template('index.html')
 
+# ============================================================
+# Career leaderboards
+# ============================================================
+# /players and /pitching read the career tables kept by summary_tables.py
+# and sort, filter and page them in SQL. Paging is keyset-based on
+# (sort column, PersonNumber), which every sortable column has an index on.
+#
+#   ?sort=hr&dir=desc   sort key from the table header (dir defaults per stat)
+#   ?min_pa=100         qualification (min_ip on /pitching)
+#   ?q=smith            name filter
+#   ?after=<cursor>     next page, from the "Next" link
+
+LEADERBOARD_PAGE_SIZE = 100
+
+# ?sort= value -> (column, default direction)
+BATTING_LEADERBOARD_SORTS = {
+    'name': ('name_key', 'asc'), 'games': ('Games', 'desc'), 'pa': ('PA', 'desc'),
+    'ab': ('AB', 'desc'), 'r': ('R', 'desc'), 'h': ('H', 'desc'),
+    'doubles': ('Doubles', 'desc'), 'triples': ('Triples', 'desc'), 'hr': ('HR', 'desc'),
+    'rbi': ('RBI', 'desc'), 'bb': ('BB', 'desc'), 'oe': ('OE', 'desc'),
+    'avg': ('AVG', 'desc'), 'obp': ('OBP', 'desc'), 'slg': ('SLG', 'desc'), 'ops': ('OPS', 'desc'),
+}
+
+PITCHING_LEADERBOARD_SORTS = {
+    'name': ('name_key', 'asc'), 'games': ('Games', 'desc'), 'ip': ('IP', 'desc'),
+    'w': ('W', 'desc'), 'l': ('L', 'desc'), 'bb': ('BB', 'desc'), 'ibb': ('IBB', 'desc'),
+    'bb_per_ip': ('BB_per_IP', 'asc'), 'win_pct': ('Win_Pct', 'desc'),
+}
+
+
+def leaderboard(conn, table, sorts, default_sort, min_column, min_arg):
+    """One page of a career leaderboard for the current request's args.
+    Returns the rows plus the state the template needs for its links."""
+    sort = request.args.get('sort', default_sort)
+    if sort not in sorts:
+        sort = default_sort
+    column, direction = sorts[sort]
+    if request.args.get('dir') in ('asc', 'desc'):
+        direction = request.args['dir']
+    minimum = request.args.get(min_arg, 0, type=int)
+    name_filter = request.args.get('q', '').strip()
+
+    conditions, params = [f'{min_column} >= ?'], [minimum]
+    if name_filter:
+        escaped = name_filter.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        conditions.append("name_key LIKE ? ESCAPE '\\'")
+        params.append(f'%{escaped}%')
+
+    # A cursor this page didn't write (hand-edited, stale) shows page 1
+    cursor = None
+    if request.args.get('after'):
+        try:
+            cursor = _decode_cursor(request.args['after'])
+        except ApiError:
+            pass
+        if not (isinstance(cursor, tuple) and len(cursor) == 2 and all(map(_is_cursor_scalar, cursor))):
+            cursor = None
+    if cursor is not None:
+        conditions.append(f"({column}, PersonNumber) {'<' if direction == 'desc' else '>'} (?, ?)")
+        params.extend(cursor)
+
+    rows = conn.execute(f'''
+        SELECT * FROM {table}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {column} {direction.upper()}, PersonNumber {direction.upper()}
+        LIMIT ?
+    ''', params + [LEADERBOARD_PAGE_SIZE + 1]).fetchall()
+
+    next_cursor = None
+    if len(rows) > LEADERBOARD_PAGE_SIZE:
+        rows = rows[:LEADERBOARD_PAGE_SIZE]
+        next_cursor = _encode_cursor([rows[-1][column], rows[-1]['PersonNumber']])
+
+    def page_url(**changes):
+        """This leaderboard's URL with some args changed (None drops one)"""
+        args = {'sort': sort, 'dir': direction, min_arg: minimum or None, 'q': name_filter or None}
+        args.update(changes)
+        return url_for(request.endpoint, **{key: value for key, value in args.items() if value is not None})
+
+    def sort_url(key):
+        """Header link: flip direction on the current column, else its default"""
+        if key == sort:
+            return page_url(sort=key, dir='asc' if direction == 'desc' else 'desc')
+        return page_url(sort=key, dir=sorts[key][1])
+
+    return {
+        'rows': rows,
+        'sort': sort,
+        'direction': direction,
+        'minimum': minimum,
+        'q': name_filter,
+        'is_first_page': cursor is None,
+        'first_url': page_url(),
+        'next_url': page_url(after=next_cursor) if next_cursor else None,
+        'page_url': page_url,
+        'sort_url': sort_url,
+    }
+
+
 # Players section
 @app.route('/players')
+@cached_response
 def players():
     conn = get_db_connection()
     
-    # Get all players with career stats (exclude subs)
-    query = '''
-        SELECT 
-            p.PersonNumber,
-            p.FirstName,
-            p.LastName,
-            SUM(b.G) as Games,
-            SUM(b.PA) as PA,
-            SUM(b.R) as R,
-            SUM(b.H) as H,
-            SUM(b."2B") as Doubles,
-            SUM(b."3B") as Triples,
-            SUM(b.HR) as HR,
-            SUM(b.BB) as BB,
-            SUM(b.RBI) as RBI,
-            SUM(b.SF) as SF,
-            SUM(b.OE) as OE
-        FROM People p
-        LEFT JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
-        WHERE p.LastName != 'Subs'
-            AND p.FirstName NOT LIKE '%Sub%' 
-            AND p.LastName NOT LIKE '%Sub%'
-            AND p.FirstName != 'Sub'
-            AND p.LastName != 'Sub'
-            AND LOWER(p.FirstName) NOT LIKE '%substitute%'
-            AND LOWER(p.LastName) NOT LIKE '%substitute%'
-        GROUP BY p.PersonNumber, p.FirstName, p.LastName
-        HAVING SUM(b.PA) > 0
-        ORDER BY SUM(b.G) DESC, p.LastName, p.FirstName
-    '''
-    
-    raw_players = conn.execute(query).fetchall()
-    conn.close()
-    
-    # Calculate stats for each player
-    players = []
-    for player in raw_players:
-        player_stats = calculate_batting_stats(dict(player))
-        players.append(player_stats)
+    # Career stats (exclude subs) from player_career_batting, one page at a time
+    board = leaderboard(conn, 'player_career_batting', BATTING_LEADERBOARD_SORTS,
+                        'games', 'PA', 'min_pa')
     
-    return render_template('players.html', players=players)
+    return render_page('players.html', players=board['rows'], board=board)
 
 
 
 @app.route('/player/<int:player_id>')
+@cached_response
 def player_detail(player_id):
     conn = get_db_connection()
     
@@ -355,6 +877,8 @@ def player_detail(player_id):
         SELECT 
             b.TeamNumber,
             t.LongTeamName,
+            t.season_code,
+            t.season_sort,
             b.G as Games,
             b.PA,
             b.R,
@@ -380,17 +904,14 @@ def player_detail(player_id):
         team_name = record['LongTeamName']
         team_number = record['TeamNumber']
         
-        # Extract season code from team name (like "F24", "W25", etc.)
-        season_match = re.search(r'([A-Z]\d{2})$', team_name)
-        season_filter_number = None
-        if season_match:
-            season_code = season_match.group(1)
-            season_filter_number = seasons_lookup.get(season_code)
+        # Season link from the parsed season code (like "F24", "W25", etc.)
+        season_filter_number = seasons_lookup.get(record['season_code'])
         
         if team_name not in teams_data:
             teams_data[team_name] = {
                 'team_number': team_number,
                 'season_filter_number': season_filter_number,
+                'season_sort': record['season_sort'] or 0,
                 'individual_records': [],
                 'aggregated_records': []
             }
@@ -419,20 +940,21 @@ def player_detail(player_id):
             team_stats['team_name'] = team_name
             team_stats['team_number'] = team_data['team_number']
             team_stats['season_filter_number'] = team_data['season_filter_number']
+            team_stats['season_sort'] = team_data['season_sort']
             individual_teams.append(team_stats)
         
         if team_data['aggregated_records']:
             # Has aggregated records - these are season totals
-            for record in team_data['aggregated_records']:
-                team_stats = calculate_batting_stats(dict(record))
+            for team_stats in batting_lines(team_data['aggregated_records']):
                 team_stats['team_name'] = team_name
                 team_stats['team_number'] = team_data['team_number']
                 team_stats['season_filter_number'] = team_data['season_filter_number']
+                team_stats['season_sort'] = team_data['season_sort']
                 aggregated_teams.append(team_stats)
     
     # Sort both lists by season (newest to oldest)
-    individual_teams.sort(key=lambda x: get_season_sort_key(x['team_name']), reverse=True)
-    aggregated_teams.sort(key=lambda x: get_season_sort_key(x['team_name']), reverse=True)
+    individual_teams.sort(key=lambda x: x['season_sort'], reverse=True)
+    aggregated_teams.sort(key=lambda x: x['season_sort'], reverse=True)
     
     # Calculate total seasons
     total_seasons = len(individual_teams) + len(aggregated_teams)
@@ -452,19 +974,18 @@ def player_detail(player_id):
     
     pitching_stats = conn.execute(pitching_query, (player_id,)).fetchone()
     
-    conn.close()
-    
-    return render_template('player_detail.html', 
-                         player=player, 
-                         career_stats=career_stats,
-                         team_list=individual_teams,
-                         aggregated_teams=aggregated_teams,
-                         total_seasons=total_seasons,
-                         pitching_stats=pitching_stats)
+    return render_page('player_detail.html', 
+                     player=player, 
+                     career_stats=career_stats,
+                     team_list=individual_teams,
+                     aggregated_teams=aggregated_teams,
+                     total_seasons=total_seasons,
+                     pitching_stats=pitching_stats)
 
 
 # Player_games route
 @app.route('/player/<int:player_id>/games')
+@cached_response
 def player_games(player_id):
     conn = get_db_connection()
     
@@ -499,19 +1020,19 @@ def player_games(player_id):
     career_batting = conn.execute(career_query, (player_id,)).fetchone()
     career_stats = calculate_batting_stats(dict(career_batting)) if career_batting else {}
     
-    # Get seasons lookup  
-    seasons_data = conn.execute('SELECT FilterNumber, season_name, short_name FROM Seasons').fetchall()
-    seasons_dict = {row['FilterNumber']: {'season_name': row['season_name'], 'short_name': row['short_name']} for row in seasons_data}
-    
     # Get game logs with opposing pitcher info (USING OPPONENTGSTATNUMBER)
     games_query = '''
         SELECT 
             g.Date,
+            g.game_date,
             g.Opponent,
             g.Runs,
             g.OppRuns,
             g.OpponentTeamNumber,
+            g.TeamNumber,
             g.GameNumber,
+            t.season_code,
+            COALESCE(opp.display_name, g.Opponent) as OpponentName,
             CASE 
                 WHEN g.Runs > g.OppRuns THEN 'W'
                 WHEN g.Runs < g.OppRuns THEN 'L'
@@ -530,32 +1051,16 @@ def player_games(player_id):
             -- Get opposing pitcher who got the decision
             opp_pitcher.FirstName as OppPitcherFirst,
             opp_pitcher.LastName as OppPitcherLast,
-            opp_pitcher.PlayerNumber as OppPitcherNumber
+            opp_pitcher.PersonNumber as OppPitcherNumber
         FROM batting_stats b
         JOIN game_stats g ON b.TeamNumber = g.TeamNumber AND b.GameNumber = g.GameNumber
-        LEFT JOIN (
-            -- Find opposing pitcher using OpponentGStatNumber - SIMPLE AND RELIABLE
-            SELECT 
-                ps.PlayerNumber,
-                opp_game.GStatNumber,
-                p.FirstName,
-                p.LastName
-            FROM pitching_stats ps
-            JOIN People p ON ps.PlayerNumber = p.PersonNumber
-            JOIN game_stats opp_game ON ps.TeamNumber = opp_game.TeamNumber AND ps.GameNumber = opp_game.GameNumber
-            WHERE (ps.W > 0 OR ps.L > 0)
-        ) opp_pitcher ON g.OpponentGStatNumber = opp_pitcher.GStatNumber
+        JOIN Teams t ON t.TeamNumber = b.TeamNumber
+        LEFT JOIN Teams opp ON opp.TeamNumber = g.OpponentTeamNumber
+        -- Opponent's decision pitcher, precomputed per game (summary_tables.py)
+        LEFT JOIN game_decisions d ON d.GStatNumber = g.OpponentGStatNumber
+        LEFT JOIN People opp_pitcher ON opp_pitcher.PersonNumber = d.PitcherNumber
         WHERE b.PlayerNumber = ? AND b.G = 1
-        ORDER BY 
-            CASE 
-                WHEN g.Date LIKE '____-__-__' THEN g.Date  -- YYYY-MM-DD format (S25+)
-                WHEN substr(g.Date, 7, 2) < '50' THEN '20' || substr(g.Date, 7, 2) || '-' || 
-                    CASE WHEN length(substr(g.Date, 1, 2)) = 1 THEN '0' || substr(g.Date, 1, 2) ELSE substr(g.Date, 1, 2) END || '-' ||
-                    CASE WHEN length(substr(g.Date, 4, 2)) = 1 THEN '0' || substr(g.Date, 4, 2) ELSE substr(g.Date, 4, 2) END
-                ELSE '19' || substr(g.Date, 7, 2) || '-' || 
-                    CASE WHEN length(substr(g.Date, 1, 2)) = 1 THEN '0' || substr(g.Date, 1, 2) ELSE substr(g.Date, 1, 2) END || '-' ||
-                    CASE WHEN length(substr(g.Date, 4, 2)) = 1 THEN '0' || substr(g.Date, 4, 2) ELSE substr(g.Date, 4, 2) END
-            END DESC
+        ORDER BY g.game_date DESC  -- ISO date maintained by schema.py / data_update.py
     '''
     
     raw_games = conn.execute(games_query, (player_id,)).fetchall()
@@ -563,21 +1068,19 @@ def player_games(player_id):
     # Calculate stats for each game
     games = []
     
-    for game in raw_games:
-        game_stats = calculate_batting_stats(dict(game))
-        game_stats['season'] = get_season_from_date_advanced(game['Date'], seasons_dict)
+    for game, game_stats in zip(raw_games, batting_lines(raw_games)):
+        game_stats['season'] = game['season_code'] or "Unknown"
         game_stats['score'] = f"{game['Runs']}-{game['OppRuns']}"
         
-        # Clean opponent name and format opposing pitcher
-        game_stats['Opponent'] = re.sub(r'\s+[A-Z]\d{2}$', '', game['Opponent'])
+        # Opponent's display name (parsed at write time) and opposing pitcher
+        game_stats['Opponent'] = game['OpponentName']
         
         if game['OppPitcherFirst'] and game['OppPitcherLast']:
             game_stats['OppPitcher'] = f"{game['OppPitcherFirst']} {game['OppPitcherLast']}"
             game_stats['OppPitcherNumber'] = game['OppPitcherNumber']
         else:
             # Use team name + Subs for games without recorded pitcher
-            clean_opponent = re.sub(r'\s+[A-Z]\d{2}$', '', game['Opponent'])
-            game_stats['OppPitcher'] = f"{clean_opponent} Subs"
+            game_stats['OppPitcher'] = f"{game['OpponentName']} Subs"
             game_stats['OppPitcherNumber'] = None
             
         # Format date to remove time
@@ -585,58 +1088,28 @@ def player_games(player_id):
             game_stats['Date'] = game['Date'].split()[0]
         games.append(game_stats)
     
-    conn.close()
-    
-    return render_template('player_games.html', 
-                         player=player,
-                         games=games,
-                         career_stats=career_stats)
+    return render_page('player_games.html', 
+                     player=player,
+                     games=games,
+                     career_stats=career_stats)
 # Seasons Route
 @app.route('/seasons')
+@cached_response
 def seasons():
     conn = get_db_connection()
     
-    # Get all seasons with basic info
-    seasons_query = '''
-        SELECT 
-            s.FilterNumber,
-            s.season_name,
-            s.short_name,
-            s.Champion,
-            COUNT(DISTINCT t.TeamNumber) as num_teams
-        FROM Seasons s
-        LEFT JOIN Teams t ON t.LongTeamName LIKE '%' || s.short_name || '%'
-        GROUP BY s.FilterNumber, s.season_name, s.short_name, s.Champion
-
-        ORDER BY s.year_extracted DESC, 
-            CASE 
-                WHEN s.short_name LIKE 'F%' THEN 3
-                WHEN s.short_name LIKE 'S%' THEN 2  
-                WHEN s.short_name LIKE 'W%' THEN 1
-                ELSE 0
-            END DESC
+    # Counts are maintained by summary_tables.refresh_season_summary
+    seasons_data = conn.execute('''
+        SELECT FilterNumber, season_name, short_name, Champion, num_teams, games, players
+        FROM season_summary
+        ORDER BY season_sort DESC, FilterNumber
+    ''').fetchall()
 
-    '''
-    
-    seasons_data = conn.execute(seasons_query).fetchall()
-    
-    # Get overall league statistics
     overall_stats = conn.execute('''
-        SELECT 
-            COUNT(DISTINCT s.FilterNumber) as total_seasons,
-            COUNT(DISTINCT t.TeamNumber) as total_teams,
-            COUNT(DISTINCT g.GameNumber) as total_games,
-            COUNT(DISTINCT p.PersonNumber) as total_players
-        FROM Seasons s
-        LEFT JOIN Teams t ON t.LongTeamName LIKE '%' || s.short_name || '%'
-        LEFT JOIN game_stats g ON g.TeamNumber = t.TeamNumber
-        LEFT JOIN batting_stats b ON b.TeamNumber = t.TeamNumber
-        LEFT JOIN People p ON p.PersonNumber = b.PlayerNumber
-        WHERE p.LastName != 'Subs' OR p.LastName IS NULL
+        SELECT total_seasons, total_teams, total_games, total_players
+        FROM league_summary
     ''').fetchone()
     
-    conn.close()
-    
     return render_template('seasons.html', 
                          seasons=seasons_data,
                          overall_stats=overall_stats)
@@ -644,17 +1117,17 @@ def seasons():
 
 # Seasons Detail Route
 @app.route('/season/<filter_number>')
+@cached_response
 def season_detail(filter_number):
     conn = get_db_connection()
     
-    # Get season info
-    season = conn.execute('''
-        SELECT * FROM Seasons WHERE FilterNumber = ?
-    ''', (filter_number,)).fetchone()
-    
-    if not season:
+    context = get_season_context(conn, filter_number)
+    if not context:
         return "Season not found", 404
     
+    season = context.season
+    season_short = context.short_name
+    
     # Get teams for this season with their records (including ties)
     teams_query = '''
         SELECT 
@@ -668,12 +1141,12 @@ def season_detail(filter_number):
             SUM(g.OppRuns) as RunsAllowed
         FROM Teams t
         LEFT JOIN game_stats g ON t.TeamNumber = g.TeamNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
+        WHERE t.season_code = ?
         GROUP BY t.TeamNumber, t.LongTeamName, t.Manager
         ORDER BY Wins DESC, (SUM(g.Runs) - SUM(g.OppRuns)) DESC
     '''
     
-    teams_raw = conn.execute(teams_query, (season['short_name'],)).fetchall()
+    teams_raw = conn.execute(teams_query, (season_short,)).fetchall()
     
     # Process teams to add display names and detect divisions
     teams = []
@@ -682,20 +1155,14 @@ def season_detail(filter_number):
     
     for team in teams_raw:
         team_dict = dict(team)
-        team_name = team_dict['LongTeamName']
         
-        # Remove season codes (any format like W25, F24, S22, etc.)
-        team_name = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)            
-        team_dict['team_display_name'] = team_name
-            
-        # Check for ANY divisions in parentheses
-        division_match = re.search(r'\(([^)]+)\)', team_name)
-        if division_match:
+        # Display name and division (in parentheses) come from the season context
+        team_info = context.teams_by_number[team_dict['TeamNumber']]
+        team_dict['team_display_name'] = team_info['team_display_name']
+        
+        division_name = team_info['division']
+        if division_name:
             has_divisions = True
-            division_name = division_match.group(1)  # Extract what's inside parentheses
-            
-            # Remove division from display name (it's already in the heading)
-            team_dict['team_display_name'] = re.sub(r'\s*\([^)]+\)\s*', '', team_name).strip()
                 
             if division_name not in divisions:
                 divisions[division_name] = []
@@ -766,93 +1233,64 @@ def season_detail(filter_number):
                     gb = (leader_record - team_record) / 2.0
                     team['GB'] = f"{gb:.1f}" if gb % 1 != 0 else str(int(gb))
 
-    # Get season stats for calculating minimum PA
-    season_stats = conn.execute('''
-        SELECT 
-            COUNT(DISTINCT g.GameNumber) as TotalGames,
-            COUNT(DISTINCT CASE WHEN p.LastName != 'Subs' THEN p.PersonNumber END) as TotalPlayers,
-            SUM(b.HR) as TotalHRs
-        FROM game_stats g
-        JOIN Teams t ON g.TeamNumber = t.TeamNumber
-        LEFT JOIN batting_stats b ON b.TeamNumber = t.TeamNumber AND b.GameNumber = g.GameNumber
-        LEFT JOIN People p ON p.PersonNumber = b.PlayerNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-    ''', (season['short_name'],)).fetchone()
-
-    total_games = season_stats['TotalGames'] or 0
-    min_pa_for_leaders = int(total_games * 2.5)
+    # Season stats and minimum PA for leaders
+    season_stats = context.season_stats
+    min_pa_for_leaders = context.qualified_pa_threshold
 
     # Get batting leaders
     batting_leaders_query = '''
         SELECT 
             p.PersonNumber, p.FirstName, p.LastName, t.LongTeamName,
+            t.display_name as team_display_name,
             SUM(b.PA) as PA, SUM(b.H) as H, SUM(b.BB) as BB, SUM(b.SF) as SF,
             SUM(b.'2B') as '2B', SUM(b.'3B') as '3B', SUM(b.HR) as HR, SUM(b.OE) as OE
         FROM People p
         JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
         JOIN Teams t ON b.TeamNumber = t.TeamNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
+        WHERE t.season_code = ?
             AND p.LastName != 'Subs'
-        GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.LongTeamName
+        GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.LongTeamName, t.display_name
         HAVING SUM(b.PA) >= ?
         ORDER BY CAST(SUM(b.H) AS FLOAT) / SUM(b.PA - b.BB - b.SF) DESC
         LIMIT 10
     '''
     
-    batting_leaders_raw = conn.execute(batting_leaders_query, (season['short_name'], min_pa_for_leaders)).fetchall()
+    batting_leaders_raw = conn.execute(batting_leaders_query, (season_short, min_pa_for_leaders)).fetchall()
 
-    # Process batting leaders
-    batting_leaders = []
-    for player in batting_leaders_raw:
-        player_dict = calculate_batting_stats(dict(player))
-        team_name = player_dict['LongTeamName']
-        # Remove season codes AND division names
-        team_name = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)  # Remove season code
-        team_name = re.sub(r'\s*\([^)]+\)\s*', '', team_name).strip()  # Remove division
-        player_dict['team_display_name'] = team_name
-        batting_leaders.append(player_dict)
+    # Process batting leaders (team_display_name is stored on Teams)
+    batting_leaders = batting_lines(batting_leaders_raw)
 
     # Get HR leaders
     hr_leaders_query = '''
         SELECT 
-            p.PersonNumber, p.FirstName, p.LastName, t.LongTeamName, SUM(b.HR) as HR
+            p.PersonNumber, p.FirstName, p.LastName, t.LongTeamName,
+            t.display_name as team_display_name, SUM(b.HR) as HR
         FROM People p
         JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
         JOIN Teams t ON b.TeamNumber = t.TeamNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
+        WHERE t.season_code = ?
             AND p.LastName != 'Subs'
-        GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.LongTeamName
+        GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.LongTeamName, t.display_name
         HAVING SUM(b.HR) > 0
         ORDER BY SUM(b.HR) DESC
         LIMIT 5
     '''
     
-    hr_leaders_raw = conn.execute(hr_leaders_query, (season['short_name'],)).fetchall()
+    hr_leaders_raw = conn.execute(hr_leaders_query, (season_short,)).fetchall()
 
-    # Process HR leaders
-    hr_leaders = []
-    for player in hr_leaders_raw:
-        player_dict = dict(player)
-        team_name = player_dict['LongTeamName']
-        # Remove season codes AND division names
-        team_name = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)  # Remove season code
-        team_name = re.sub(r'\s*\([^)]+\)\s*', '', team_name).strip()  # Remove division
-        player_dict['team_display_name'] = team_name
-        hr_leaders.append(player_dict)
+    hr_leaders = [dict(player) for player in hr_leaders_raw]
 
-    conn.close()
-
-    return render_template('season_detail.html', 
-                            season=season, 
-                            teams=teams,
-                            divisions=divisions if has_divisions else None,
-                            has_divisions=has_divisions,
-                            total_teams=len(teams),
-                            batting_leaders=batting_leaders,
-                            hr_leaders=hr_leaders,
-                            season_stats=season_stats,
-                            min_pa_for_leaders=min_pa_for_leaders,
-                            league_avg='.000')
+    return render_page('season_detail.html', 
+                        season=season, 
+                        teams=teams,
+                        divisions=divisions if has_divisions else None,
+                        has_divisions=has_divisions,
+                        total_teams=len(teams),
+                        batting_leaders=batting_leaders,
+                        hr_leaders=hr_leaders,
+                        season_stats=season_stats,
+                        min_pa_for_leaders=min_pa_for_leaders,
+                        league_avg='.000')
 
 
 
@@ -860,192 +1298,79 @@ def season_detail(filter_number):
 
 # Season Batting Stats Route
 @app.route('/season/<filter_number>/batting')
+@cached_response
 def season_batting(filter_number):
     """Season-specific batting statistics page"""
     
     conn = get_db_connection()
     
-    # Get season info
-    season = conn.execute('''
-        SELECT * FROM Seasons WHERE FilterNumber = ?
-    ''', (filter_number,)).fetchone()
-    
-    if not season:
-        conn.close()
+    context = get_season_context(conn, filter_number)
+    if not context:
         return "Season not found", 404
     
-    # Get games played for this season (using same pattern as season_detail)
-    season_stats = conn.execute('''
-        SELECT 
-            COUNT(DISTINCT g.GameNumber) as TotalGames,
-            COUNT(DISTINCT CASE WHEN p.LastName != 'Subs' THEN p.PersonNumber END) as TotalPlayers,
-            SUM(b.HR) as TotalHRs
-        FROM game_stats g
-        JOIN Teams t ON g.TeamNumber = t.TeamNumber
-        LEFT JOIN batting_stats b ON b.TeamNumber = t.TeamNumber AND b.GameNumber = g.GameNumber
-        LEFT JOIN People p ON p.PersonNumber = b.PlayerNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-    ''', (season['short_name'],)).fetchone()
-    
-    games_played = season_stats['TotalGames'] if season_stats else 0
-    qualified_pa_threshold = int(games_played * 2.5)
+    season = context.season
+    season_short = context.short_name
+    qualified_pa_threshold = context.qualified_pa_threshold
     
-    # Get all batting stats for players in this season (using same pattern as season_detail)
-    batting_query = '''
-        SELECT 
-            p.PersonNumber,
-            p.FirstName,
-            p.LastName,
-            t.LongTeamName,
-            SUM(b.G) as Games,
-            SUM(b.PA) as PA,
-            SUM(b.R) as R,
-            SUM(b.H) as H,
-            SUM(b."2B") as Doubles,
-            SUM(b."3B") as Triples,
-            SUM(b.HR) as HR,
-            SUM(b.BB) as BB,
-            SUM(b.RBI) as RBI,
-            SUM(b.SF) as SF,
-            SUM(b.OE) as OE
-        FROM People p
-        JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
-        JOIN Teams t ON b.TeamNumber = t.TeamNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-            AND p.LastName != 'Subs'
-        GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.LongTeamName
-        HAVING SUM(b.G) > 0
-    '''
-    
-    raw_players = conn.execute(batting_query, (season['short_name'],)).fetchall()
-    
-    # Calculate batting averages and sort by OBP
-    players = []
-    for player in raw_players:
-        player_stats = calculate_batting_stats(dict(player))
-        
-        # Clean team name - remove season code AND division names
-        team_name = player_stats['LongTeamName']
-        team_name = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)  # Remove season code (W26, F25, etc.)
-        team_name = re.sub(r'\s*\([^)]+\)\s*', '', team_name).strip()  # Remove division (Ballers, Clippers, etc.)
-        player_stats['team_display_name'] = team_name
-        
-        players.append(player_stats)
-    
-    # Sort by OBP (descending), then PA (descending)
-    players.sort(key=lambda x: (x.get('OBP', 0), x.get('PA', 0)), reverse=True)
+    # Read pre-aggregated season lines (maintained by data_update.py)
+    raw_players = conn.execute('''
+        SELECT * FROM player_season_batting
+        WHERE season_code = ?
+        ORDER BY OBP DESC, PA DESC, PersonNumber, TeamNumber
+    ''', (season_short,)).fetchall()
     
-    conn.close()
+    # Already sorted by OBP (descending), then PA (descending)
+    players = [dict(player) for player in raw_players]
     
-    return render_template('season_batting.html',
-                         season=season,
-                         players=players,
-                         qualified_pa_threshold=qualified_pa_threshold,
-                         season_filter_number=filter_number)
+    return render_page('season_batting.html',
+                     season=season,
+                     players=players,
+                     qualified_pa_threshold=qualified_pa_threshold,
+                     season_filter_number=filter_number)
 
 
 # Season Metrics Route (Easter Egg)
 @app.route('/season/<filter_number>/metrics')
+@cached_response
 def season_metrics(filter_number):
     """Season-specific advanced metrics page (Easter Egg)"""
     
     conn = get_db_connection()
     
-    # Get season info
-    season = conn.execute('''
-        SELECT * FROM Seasons WHERE FilterNumber = ?
-    ''', (filter_number,)).fetchone()
-    
-    if not season:
-        conn.close()
+    context = get_season_context(conn, filter_number)
+    if not context:
         return "Season not found", 404
     
-    # Get total games for this season
-    season_stats = conn.execute('''
-        SELECT 
-            COUNT(DISTINCT g.GameNumber) as TotalGames,
-            COUNT(DISTINCT CASE WHEN p.LastName != 'Subs' THEN p.PersonNumber END) as TotalPlayers
-        FROM game_stats g
-        JOIN Teams t ON g.TeamNumber = t.TeamNumber
-        LEFT JOIN batting_stats b ON b.TeamNumber = t.TeamNumber AND b.GameNumber = g.GameNumber
-        LEFT JOIN People p ON p.PersonNumber = b.PlayerNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-    ''', (season['short_name'],)).fetchone()
-    
-    total_games = season_stats['TotalGames'] if season_stats else 0
-    qualified_pa_threshold = int(total_games * 2.5)
+    season = context.season
+    season_short = context.short_name
+    total_games = context.total_games
+    qualified_pa_threshold = context.qualified_pa_threshold
     
-    # Get number of teams in this season
-    season_short = season['short_name'].strip() if season['short_name'] else ''
-    
-    teams_count = conn.execute('''
-        SELECT COUNT(DISTINCT t.TeamNumber) as TeamCount
-        FROM Teams t
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-    ''', (season_short,)).fetchone()
-    
-    # Get the count from the query
-    if teams_count and 'TeamCount' in teams_count.keys():
-        num_teams_in_season = teams_count['TeamCount']
-        if num_teams_in_season == 0:
-            num_teams_in_season = 12  # No teams found, use default
-    else:
-        num_teams_in_season = 12  # Query failed, use default
-    
-    # Get batting stats for players with team context
-    batting_query = '''
-        SELECT 
-            p.PersonNumber,
-            p.FirstName,
-            p.LastName,
-            t.TeamNumber,
-            t.LongTeamName,
-            SUM(b.G) as Games,
-            SUM(b.PA) as PA,
-            SUM(b.R) as R,
-            SUM(b.H) as H,
-            SUM(b."2B") as Doubles,
-            SUM(b."3B") as Triples,
-            SUM(b.HR) as HR,
-            SUM(b.BB) as BB,
-            SUM(b.RBI) as RBI,
-            SUM(b.SF) as SF,
-            SUM(b.OE) as OE
-        FROM People p
-        JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
-        JOIN Teams t ON b.TeamNumber = t.TeamNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-            AND p.LastName != 'Subs'
-        GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.TeamNumber, t.LongTeamName
-        HAVING SUM(b.G) > 0
-    '''
+    # Number of teams in this season
+    num_teams_in_season = len(context.teams) or 12  # No teams found, use default
     
-    raw_players = conn.execute(batting_query, (season_short,)).fetchall()
+    # Read pre-aggregated season lines (maintained by data_update.py)
+    raw_players = conn.execute('''
+        SELECT * FROM player_season_batting
+        WHERE season_code = ?
+        ORDER BY convBA DESC, PA DESC, PersonNumber, TeamNumber
+    ''', (season_short,)).fetchall()
     
-    # Get BVP stats for ALL players vs pitcher #401 in a single batch query
-    bvp_batch_query = '''
+    # Career BVP stats for ALL players vs the selected pitcher (bvp_matchups)
+    bvp_pitcher_id = request.args.get('pitcher', BVP_DEFAULT_PITCHER, type=int)
+    bvp_pitcher = conn.execute('''
+        SELECT PersonNumber, FirstName, LastName FROM People WHERE PersonNumber = ?
+    ''', (bvp_pitcher_id,)).fetchone()
+    bvp_results = conn.execute('''
         SELECT 
-            b.PlayerNumber,
-            SUM(b.PA) as BVP_PA,
-            SUM(b.H) as BVP_H,
-            SUM(b.HR) as BVP_HR,
-            SUM(b.PA - b.BB - b.SF) as BVP_AB
-        FROM batting_stats b
-        JOIN game_stats g ON b.TeamNumber = g.TeamNumber AND b.GameNumber = g.GameNumber
-        JOIN pitching_stats ps ON ps.TeamNumber = g.OpponentTeamNumber 
-            AND ps.GameNumber = (
-                SELECT og.GameNumber 
-                FROM game_stats og 
-                WHERE og.TeamNumber = g.OpponentTeamNumber 
-                    AND og.Date = g.Date 
-                    AND og.OpponentTeamNumber = g.TeamNumber
-            )
-        WHERE ps.PlayerNumber = 401
-            AND (ps.W > 0 OR ps.L > 0)
-            AND b.G = 1
-        GROUP BY b.PlayerNumber
-    '''
-    bvp_results = conn.execute(bvp_batch_query).fetchall()
+            BatterNumber as PlayerNumber,
+            PA as BVP_PA,
+            H as BVP_H,
+            HR as BVP_HR,
+            AB as BVP_AB
+        FROM bvp_matchups
+        WHERE PitcherNumber = ?
+    ''', (bvp_pitcher_id,)).fetchall()
     
     # Create a lookup dictionary for BVP stats
     bvp_lookup = {}
@@ -1058,26 +1383,10 @@ def season_metrics(filter_number):
             'BVP_AVG': round(bvp['BVP_H'] / bvp_ab, 3) if bvp_ab > 0 else 0.000
         }
     
-    # Calculate advanced metrics for each player
+    # Attach BVP stats to each player (convBA is precomputed)
     players = []
     for player in raw_players:
-        player_stats = calculate_batting_stats(dict(player))
-        
-        # Calculate convBA: (((4*(H+BB)+TB)/PA)/0.305*0.25)/10
-        h = player_stats.get('H', 0)
-        bb = player_stats.get('BB', 0)
-        pa = player_stats.get('PA', 0)
-        doubles = player_stats.get('Doubles', 0)
-        triples = player_stats.get('Triples', 0)
-        hr = player_stats.get('HR', 0)
-        
-        # Total Bases = H + 2B + (2*3B) + (3*HR)
-        tb = h + doubles + (2 * triples) + (3 * hr)
-        
-        if pa > 0:
-            player_stats['convBA'] = round((((4*(h+bb)+tb)/pa)/0.305*0.25)/10, 3)
-        else:
-            player_stats['convBA'] = 0.000
+        player_stats = dict(player)
         
         # Get BVP stats from lookup (efficient batch approach)
         person_number = player_stats['PersonNumber']
@@ -1089,22 +1398,14 @@ def season_metrics(filter_number):
             player_stats['BVP_HR'] = 0
             player_stats['BVP_AVG'] = 0.000
         
-        # Clean team name - remove season code AND division names
-        team_name = player_stats['LongTeamName']
-        team_name = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)  # Remove season code
-        team_name = re.sub(r'\s*\([^)]+\)\s*', '', team_name).strip()  # Remove division
-        player_stats['team_display_name'] = team_name
-        
         players.append(player_stats)
     
-    # Sort by convBA (descending), then PA (descending)
-    players.sort(key=lambda x: (x.get('convBA', 0), x.get('PA', 0)), reverse=True)
-    
-    conn.close()
-    
     return render_template('season_metrics.html',
                          season=season,
                          players=players,
+                         bvp_pitcher=bvp_pitcher,
+                         bvp_pitcher_id=bvp_pitcher_id,
+                         bvp_pitchers=get_decision_pitchers(conn),
                          qualified_pa_threshold=qualified_pa_threshold,
                          season_filter_number=filter_number,
                          total_games=total_games,
@@ -1112,85 +1413,35 @@ def season_metrics(filter_number):
 
 
 @app.route('/season/<filter_number>/allstar')
+@cached_response
 def season_allstar(filter_number):
     """All-Star teams by division based on convBA"""
 
     conn = get_db_connection()
 
-    season = conn.execute(
-        'SELECT * FROM Seasons WHERE FilterNumber = ?', (filter_number,)
-    ).fetchone()
-
-    if not season:
-        conn.close()
+    context = get_season_context(conn, filter_number)
+    if not context:
         return "Season not found", 404
 
-    season_short = season['short_name'].strip() if season['short_name'] else ''
+    season = context.season
+    season_short = context.short_name
 
     min_games = 4
 
-    # Get all teams with division info
-    teams_raw = conn.execute('''
-        SELECT t.TeamNumber, t.LongTeamName
-        FROM Teams t
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-    ''', (season_short,)).fetchall()
-
-    # Build team → division mapping
-    team_division = {}
-    division_teams_count = {}
-    for team in teams_raw:
-        team_name = team['LongTeamName']
-        team_name_clean = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)
-        division_match = re.search(r'\(([^)]+)\)', team_name_clean)
-        division_name = division_match.group(1) if division_match else 'League'
-        team_division[team['TeamNumber']] = division_name
-        division_teams_count[division_name] = division_teams_count.get(division_name, 0) + 1
+    # Team → division mapping
+    team_division = context.team_division
 
     # Get batting stats per player
     raw_players = conn.execute('''
-        SELECT
-            p.PersonNumber, p.FirstName, p.LastName,
-            t.TeamNumber, t.LongTeamName,
-            SUM(b.G) as Games, SUM(b.PA) as PA,
-            SUM(b.R) as R, SUM(b.H) as H,
-            SUM(b."2B") as Doubles, SUM(b."3B") as Triples,
-            SUM(b.HR) as HR, SUM(b.BB) as BB,
-            SUM(b.RBI) as RBI, SUM(b.SF) as SF, SUM(b.OE) as OE
-        FROM People p
-        JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
-        JOIN Teams t ON b.TeamNumber = t.TeamNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-            AND p.LastName != 'Subs'
-        GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.TeamNumber, t.LongTeamName
-        HAVING SUM(b.G) > 0
+        SELECT * FROM player_season_batting
+        WHERE season_code = ?
+        ORDER BY PersonNumber, TeamNumber
     ''', (season_short,)).fetchall()
 
-    conn.close()
-
-    # Calculate convBA and group by division
+    # Group by division (convBA and display names are precomputed)
     division_players = {}
     for player in raw_players:
-        ps = calculate_batting_stats(dict(player))
-
-        h = ps.get('H', 0)
-        bb = ps.get('BB', 0)
-        pa = ps.get('PA', 0)
-        doubles = ps.get('Doubles', 0)
-        triples = ps.get('Triples', 0)
-        hr = ps.get('HR', 0)
-        tb = h + doubles + (2 * triples) + (3 * hr)
-
-        if pa > 0:
-            ps['convBA'] = round((((4 * (h + bb) + tb) / pa) / 0.305 * 0.25) / 10, 3)
-        else:
-            ps['convBA'] = 0.000
-
-        # Clean team name
-        team_name = ps['LongTeamName']
-        team_name = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)
-        team_name = re.sub(r'\s*\([^)]+\)\s*', '', team_name).strip()
-        ps['team_display_name'] = team_name
+        ps = dict(player)
 
         # Playoff-eligible = rostered for at least 4 games
         if (ps.get('Games') or 0) < min_games:
@@ -1237,72 +1488,25 @@ def season_allstar_export(filter_number):
 
     conn = get_db_connection()
 
-    season = conn.execute(
-        'SELECT * FROM Seasons WHERE FilterNumber = ?', (filter_number,)
-    ).fetchone()
-
-    if not season:
-        conn.close()
+    context = get_season_context(conn, filter_number)
+    if not context:
         return "Season not found", 404
 
-    season_short = season['short_name'].strip() if season['short_name'] else ''
+    season = context.season
+    season_short = context.short_name
     min_games = 4
 
-    teams_raw = conn.execute('''
-        SELECT t.TeamNumber, t.LongTeamName
-        FROM Teams t
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-    ''', (season_short,)).fetchall()
-
-    team_division = {}
-    division_teams_count = {}
-    for team in teams_raw:
-        team_name = team['LongTeamName']
-        team_name_clean = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)
-        division_match = re.search(r'\(([^)]+)\)', team_name_clean)
-        division_name = division_match.group(1) if division_match else 'League'
-        team_division[team['TeamNumber']] = division_name
-        division_teams_count[division_name] = division_teams_count.get(division_name, 0) + 1
+    team_division = context.team_division
 
     raw_players = conn.execute('''
-        SELECT
-            p.PersonNumber, p.FirstName, p.LastName,
-            t.TeamNumber, t.LongTeamName,
-            SUM(b.G) as Games, SUM(b.PA) as PA,
-            SUM(b.R) as R, SUM(b.H) as H,
-            SUM(b."2B") as Doubles, SUM(b."3B") as Triples,
-            SUM(b.HR) as HR, SUM(b.BB) as BB,
-            SUM(b.RBI) as RBI, SUM(b.SF) as SF, SUM(b.OE) as OE
-        FROM People p
-        JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
-        JOIN Teams t ON b.TeamNumber = t.TeamNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
-            AND p.LastName != 'Subs'
-        GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.TeamNumber, t.LongTeamName
-        HAVING SUM(b.G) > 0
+        SELECT * FROM player_season_batting
+        WHERE season_code = ?
+        ORDER BY PersonNumber, TeamNumber
     ''', (season_short,)).fetchall()
 
-    conn.close()
-
     division_players = {}
     for player in raw_players:
-        ps = calculate_batting_stats(dict(player))
-        h = ps.get('H', 0)
-        bb = ps.get('BB', 0)
-        pa = ps.get('PA', 0)
-        doubles = ps.get('Doubles', 0)
-        triples = ps.get('Triples', 0)
-        hr = ps.get('HR', 0)
-        tb = h + doubles + (2 * triples) + (3 * hr)
-        if pa > 0:
-            ps['convBA'] = round((((4 * (h + bb) + tb) / pa) / 0.305 * 0.25) / 10, 3)
-        else:
-            ps['convBA'] = 0.000
-
-        team_name = ps['LongTeamName']
-        team_name = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)
-        team_name = re.sub(r'\s*\([^)]+\)\s*', '', team_name).strip()
-        ps['team_display_name'] = team_name
+        ps = dict(player)
 
         if (ps.get('Games') or 0) < min_games:
             continue
@@ -1408,12 +1612,13 @@ def season_allstar_export(filter_number):
 
 # Season Rosters Route
 @app.route('/team/<int:team_number>')
+@cached_response
 def team_detail(team_number):
     conn = get_db_connection()
     
     # Get team info
     team = conn.execute('''
-        SELECT TeamNumber, LongTeamName, Manager 
+        SELECT TeamNumber, LongTeamName, Manager, display_name, season_code
         FROM Teams 
         WHERE TeamNumber = ?
     ''', (team_number,)).fetchone()
@@ -1421,9 +1626,8 @@ def team_detail(team_number):
     if not team:
         return "Team not found", 404
     
-    # Clean team display name - remove season code AND division names
-    team_display_name = re.sub(r'\s+[A-Z]\d{2}$', '', team['LongTeamName'])  # Remove season code
-    team_display_name = re.sub(r'\s*\([^)]+\)\s*', '', team_display_name).strip()  # Remove division
+    # Display name without season code or division (parsed at write time)
+    team_display_name = team['display_name']
     
 
     # Get team roster with stats (INCLUDING Subs)
@@ -1462,8 +1666,7 @@ def team_detail(team_number):
         'Triples': 0, 'HR': 0, 'BB': 0, 'RBI': 0, 'SF': 0, 'OE': 0
     }
     
-    for player in roster_raw:
-        player_stats = calculate_batting_stats(dict(player))
+    for player_stats in batting_lines(roster_raw):
         roster.append(player_stats)
         
         # Accumulate totals (skip Games - we'll get that separately)
@@ -1518,20 +1721,15 @@ def team_detail(team_number):
         fallback_roster_raw = conn.execute(fallback_roster_query, (team_number,)).fetchall()
         
         # Calculate stats for each player (will be zeros)
-        roster = []
-        for player in fallback_roster_raw:
-            player_dict = dict(player)
-            player_stats = calculate_batting_stats(player_dict)
-            # Add the IsManager flag from the query
-            player_stats['IsManager'] = player_dict['IsManager']
-            roster.append(player_stats)
+        # (IsManager comes through from the query)
+        roster = batting_lines(fallback_roster_raw)
     
     # Get game results
     results_query = '''
         SELECT 
             g.GameNumber,
             g.Date,
-            g.Opponent,
+            COALESCE(opp.display_name, g.Opponent) as Opponent,
             g.Runs,
             g.OppRuns,
             CASE 
@@ -1540,97 +1738,67 @@ def team_detail(team_number):
                 ELSE 'T'
             END as Result
         FROM game_stats g
+        LEFT JOIN Teams opp ON opp.TeamNumber = g.OpponentTeamNumber
         WHERE g.TeamNumber = ?
-        ORDER BY g.Date DESC
+        ORDER BY g.game_date DESC
     '''
-    results_raw = conn.execute(results_query, (team_number,)).fetchall()
-
-    results = []
-    for game in results_raw:
-        game_dict = dict(game)
-        # Clean opponent name - remove season codes like F24, W25, S22, etc.
-        opponent_name = game_dict['Opponent']
-        clean_opponent = re.sub(r'\s+[A-Z]\d{2}$', '', opponent_name)
-        game_dict['Opponent'] = clean_opponent
-        results.append(game_dict)
-    
+    results = [dict(game) for game in conn.execute(results_query, (team_number,)).fetchall()]
 
     # Get season info for breadcrumbs
-    season_code = re.search(r'([A-Z]\d{2})$', team['LongTeamName'])
     season_filter_number = None
     season_name = None
-    if season_code:
+    if team['season_code']:
         season_data = conn.execute('''
             SELECT FilterNumber, season_name FROM Seasons WHERE short_name = ?
-        ''', (season_code.group(1),)).fetchone()
+        ''', (team['season_code'],)).fetchone()
         if season_data:
             season_filter_number = season_data['FilterNumber']
             season_name = season_data['season_name']
     
-    conn.close()
-    return render_template('team_detail.html',
-                        team=team,
-                        team_display_name=team_display_name,
-                        roster=roster,
-                        team_totals=team_totals,
-                        results=results,
-                        season_filter_number=season_filter_number,
-                        season_name=season_name)
+    return render_page('team_detail.html',
+                    team=team,
+                    team_display_name=team_display_name,
+                    roster=roster,
+                    team_totals=team_totals,
+                    results=results,
+                    season_filter_number=season_filter_number,
+                    season_name=season_name)
 
 
 
 
 
 @app.route('/boxscore/<int:team_number>/<int:game_number>')
+@cached_response
 def boxscore(team_number, game_number):
     conn = get_db_connection()
     
-    # Get game info
+    # Get game info plus the opponent's side of it (game_pairs, summary_tables.py)
     game = conn.execute('''
-        SELECT * FROM game_stats 
-        WHERE TeamNumber = ? AND GameNumber = ?
+        SELECT g.*, gp.OppGameNumber
+        FROM game_stats g
+        LEFT JOIN game_pairs gp ON gp.GStatNumber = g.GStatNumber
+        WHERE g.TeamNumber = ? AND g.GameNumber = ?
     ''', (team_number, game_number)).fetchone()
     
     if not game:
         return "Game not found", 404
     
-    # Get home team info
-    home_team = conn.execute('''
-        SELECT t.TeamNumber, t.LongTeamName, t.Manager
+    # Both teams (and the season for breadcrumbs) in one lookup
+    teams = {team['TeamNumber']: team for team in conn.execute('''
+        SELECT t.TeamNumber, t.LongTeamName, t.Manager, t.display_name,
+               s.FilterNumber, s.season_name
         FROM Teams t
-        WHERE t.TeamNumber = ?
-    ''', (team_number,)).fetchone()
-    
-    # Get opponent team directly using OpponentTeamNumber - NO string matching needed!
-    opponent_team = None
-    opponent_game_number = None
-
-    if game['OpponentTeamNumber']:
-        # Get opponent team info directly
-        opponent_team = conn.execute('''
-            SELECT TeamNumber, LongTeamName, Manager
-            FROM Teams 
-            WHERE TeamNumber = ?
-        ''', (game['OpponentTeamNumber'],)).fetchone()
-        
-        if opponent_team:
-            # Find opponent's GameNumber for this same date by matching our team as their opponent
-            opponent_game_record = conn.execute('''
-                SELECT GameNumber 
-                FROM game_stats 
-                WHERE TeamNumber = ? 
-                  AND Date = ?
-                  AND OpponentTeamNumber = ?
-            ''', (opponent_team['TeamNumber'], game['Date'], team_number)).fetchone()
-            
-            if opponent_game_record:
-                opponent_game_number = opponent_game_record['GameNumber']
+        LEFT JOIN Seasons s ON s.short_name = t.season_code
+        WHERE t.TeamNumber IN (?, ?)
+    ''', (team_number, game['OpponentTeamNumber'])).fetchall()}
+    home_team = teams.get(team_number)
+    opponent_team = teams.get(game['OpponentTeamNumber']) if game['OpponentTeamNumber'] else None
+    opponent_game_number = game['OppGameNumber'] if opponent_team else None
 
-    # Clean team names - remove season codes AND division names from BOTH teams
-    this_team_name = re.sub(r'\s+[A-Z]\d{2}$', '', home_team['LongTeamName'])
-    this_team_name = re.sub(r'\s*\([^)]+\)\s*', '', this_team_name).strip()
-    opp_team_name = re.sub(r'\s+[A-Z]\d{2}$', '', game['Opponent'])
-    opp_team_name = re.sub(r'\s*\([^)]+\)\s*', '', opp_team_name).strip()
+    # Team names without season codes or divisions (parsed at write time)
+    this_team_name = home_team['display_name']
+    opp_team_name = opponent_team['display_name'] if opponent_team else game['Opponent']
     
     # Determine actual home/away based on HomeTeam field (1=home, 0=away)
     is_this_team_home = game['HomeTeam'] == 1
@@ -1641,181 +1809,109 @@ def boxscore(team_number, game_number):
         home_team_name = opp_team_name
         away_team_name = this_team_name
 
-    # Get batting stats for home team (INCLUDING Subs for totals)
-    home_batting_all = conn.execute('''
+    # Both sides of the game: (TeamNumber, GameNumber) for us and the opponent
+    # (the opponent side matches nothing when the game isn't paired)
+    sides = (team_number, game_number,
+             opponent_team['TeamNumber'] if opponent_game_number else None, opponent_game_number)
+
+    # Batting lines for both teams (INCLUDING Subs for totals)
+    batting_all = conn.execute('''
         SELECT 
+            b.TeamNumber,
             p.FirstName, p.LastName, p.PersonNumber,
             b.PA, b.R, b.H, b."2B" as Doubles, b."3B" as Triples, 
             b.HR, b.RBI, b.BB, b.OE, b.SF,
             CASE WHEN p.LastName = 'Subs' OR p.FirstName LIKE '%Sub%' THEN 1 ELSE 0 END as IsSub
-        FROM People p
-        JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
-        WHERE b.TeamNumber = ? AND b.GameNumber = ? AND b.G = 1
+        FROM batting_stats b
+        JOIN People p ON p.PersonNumber = b.PlayerNumber
+        WHERE ((b.TeamNumber = ? AND b.GameNumber = ?) OR (b.TeamNumber = ? AND b.GameNumber = ?))
+            AND b.G = 1
         ORDER BY 
             CASE WHEN p.LastName = 'Subs' OR p.FirstName LIKE '%Sub%' THEN 1 ELSE 0 END,
             b.PA DESC, p.LastName
-    ''', (team_number, game_number)).fetchall()
+    ''', sides).fetchall()
 
-    # Get batting stats for opponent team (using their GameNumber)
-    opponent_batting_all = []
-    if opponent_team and opponent_game_number:
-        opponent_batting_all = conn.execute('''
-            SELECT 
-                p.FirstName, p.LastName, p.PersonNumber,
-                b.PA, b.R, b.H, b."2B" as Doubles, b."3B" as Triples,
-                b.HR, b.RBI, b.BB, b.OE, b.SF,
-                CASE WHEN p.LastName = 'Subs' OR p.FirstName LIKE '%Sub%' THEN 1 ELSE 0 END as IsSub
-            FROM People p
-            JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
-            WHERE b.TeamNumber = ? AND b.GameNumber = ? AND b.G = 1
-            ORDER BY 
-                CASE WHEN p.LastName = 'Subs' OR p.FirstName LIKE '%Sub%' THEN 1 ELSE 0 END,
-                b.PA DESC, p.LastName
-        ''', (opponent_team['TeamNumber'], opponent_game_number)).fetchall()
-
-    # Calculate batting stats and team totals for home team
+    # Calculate batting stats and team totals for each side
     home_batting_stats = []
+    opponent_batting_stats = []
     home_team_totals = {'PA': 0, 'R': 0, 'H': 0, 'Doubles': 0, 'Triples': 0, 'HR': 0, 'RBI': 0, 'BB': 0, 'OE': 0, 'SF': 0}
+    opponent_team_totals = dict(home_team_totals)
 
-    for player in home_batting_all:
-        stats = calculate_batting_stats(dict(player))
-        home_batting_stats.append(stats)
+    for stats in batting_lines(batting_all):
+        if stats['TeamNumber'] == team_number:
+            lineup, totals = home_batting_stats, home_team_totals
+        else:
+            lineup, totals = opponent_batting_stats, opponent_team_totals
+        lineup.append(stats)
         
         # Add to team totals
-        for key in home_team_totals:
-            home_team_totals[key] += (stats.get(key) or 0)
+        for key in totals:
+            totals[key] += (stats.get(key) or 0)
 
     # Calculate team totals stats
     home_team_totals = calculate_batting_stats(home_team_totals)
-
-    # Calculate batting stats and team totals for opponent team
-    opponent_batting_stats = []
-    opponent_team_totals = {'PA': 0, 'R': 0, 'H': 0, 'Doubles': 0, 'Triples': 0, 'HR': 0, 'RBI': 0, 'BB': 0, 'OE': 0, 'SF': 0}
-
-    for player in opponent_batting_all:
-        stats = calculate_batting_stats(dict(player))
-        opponent_batting_stats.append(stats)
-        
-        # Add to team totals
-        for key in opponent_team_totals:
-            opponent_team_totals[key] += (stats.get(key) or 0)
-
-    # Calculate team totals stats
     opponent_team_totals = calculate_batting_stats(opponent_team_totals)
 
-    # Get pitching stats for home team - INCLUDE Subs
-    home_pitching = conn.execute('''
+    # Pitching lines for both teams - INCLUDE Subs
+    home_pitching = []
+    opponent_pitching = []
+    for pitcher in conn.execute('''
         SELECT 
+            ps.TeamNumber,
             p.FirstName, p.LastName,
             ps.IP, ps.BB, ps.IBB, ps.W, ps.L,
             CASE WHEN p.LastName = 'Subs' OR p.FirstName LIKE '%Sub%' THEN 1 ELSE 0 END as IsSub
-        FROM People p
-        JOIN pitching_stats ps ON p.PersonNumber = ps.PlayerNumber
-        WHERE ps.TeamNumber = ? AND ps.GameNumber = ? AND ps.IP > 0
+        FROM pitching_stats ps
+        JOIN People p ON p.PersonNumber = ps.PlayerNumber
+        WHERE ((ps.TeamNumber = ? AND ps.GameNumber = ?) OR (ps.TeamNumber = ? AND ps.GameNumber = ?))
+            AND ps.IP > 0
         ORDER BY 
             CASE WHEN p.LastName = 'Subs' OR p.FirstName LIKE '%Sub%' THEN 1 ELSE 0 END,
             ps.IP DESC
-    ''', (team_number, game_number)).fetchall()
-
-    # Get pitching stats for opponent team (using their GameNumber)  
-    opponent_pitching = []
-    if opponent_team and opponent_game_number:
-        opponent_pitching = conn.execute('''
-            SELECT 
-                p.FirstName, p.LastName,
-                ps.IP, ps.BB, ps.IBB, ps.W, ps.L,
-                CASE WHEN p.LastName = 'Subs' OR p.FirstName LIKE '%Sub%' THEN 1 ELSE 0 END as IsSub
-            FROM People p
-            JOIN pitching_stats ps ON p.PersonNumber = ps.PlayerNumber
-            WHERE ps.TeamNumber = ? AND ps.GameNumber = ? AND ps.IP > 0
-            ORDER BY 
-                CASE WHEN p.LastName = 'Subs' OR p.FirstName LIKE '%Sub%' THEN 1 ELSE 0 END,
-                ps.IP DESC
-        ''', (opponent_team['TeamNumber'], opponent_game_number)).fetchall()
-
-    # Get season info for breadcrumbs
-    season_code = re.search(r'([A-Z]\d{2})$', home_team['LongTeamName'])
-    season_filter_number = None
-    season_name = None
-    
-    if season_code:
-        season_data = conn.execute('''
-            SELECT FilterNumber, season_name FROM Seasons WHERE short_name = ?
-        ''', (season_code.group(1),)).fetchone()
-        if season_data:
-            season_filter_number = season_data['FilterNumber']
-            season_name = season_data['season_name']
-    
-    conn.close()
-    
-    return render_template('boxscore.html',
-                         game=game,
-                         home_team=home_team,
-                         opponent_team=opponent_team,
-                         home_team_name=home_team_name,
-                         away_team_name=away_team_name,
-                         is_this_team_home=is_this_team_home,
-                         this_team_name=this_team_name,
-                         opp_team_name=opp_team_name,
-                         home_batting_stats=home_batting_stats,
-                         opponent_batting_stats=opponent_batting_stats,
-                         home_team_totals=home_team_totals,           
-                         opponent_team_totals=opponent_team_totals,   
-                         home_pitching=home_pitching,
-                         opponent_pitching=opponent_pitching,
-                         season_filter_number=season_filter_number,
-                         season_name=season_name)
+    ''', sides).fetchall():
+        if pitcher['TeamNumber'] == team_number:
+            home_pitching.append(pitcher)
+        else:
+            opponent_pitching.append(pitcher)
+
+    # Season info for breadcrumbs
+    season_filter_number = home_team['FilterNumber']
+    season_name = home_team['season_name']
+    
+    return render_page('boxscore.html',
+                     game=game,
+                     home_team=home_team,
+                     opponent_team=opponent_team,
+                     home_team_name=home_team_name,
+                     away_team_name=away_team_name,
+                     is_this_team_home=is_this_team_home,
+                     this_team_name=this_team_name,
+                     opp_team_name=opp_team_name,
+                     home_batting_stats=home_batting_stats,
+                     opponent_batting_stats=opponent_batting_stats,
+                     home_team_totals=home_team_totals,           
+                     opponent_team_totals=opponent_team_totals,   
+                     home_pitching=home_pitching,
+                     opponent_pitching=opponent_pitching,
+                     season_filter_number=season_filter_number,
+                     season_name=season_name)
 
 
 @app.route('/pitching')
+@cached_response
 def pitching():
     conn = get_db_connection()
     
-    # Get all pitchers with career stats (exclude subs, only include those with actual pitching)
-    query = '''
-        SELECT 
-            p.PersonNumber,
-            p.FirstName,
-            p.LastName,
-            COUNT(*) as Games,
-            SUM(ps.IP) as IP,
-            SUM(ps.BB) as BB,
-            SUM(ps.W) as W,
-            SUM(ps.L) as L,
-            SUM(ps.IBB) as IBB,
-            CASE 
-                WHEN SUM(ps.IP) > 0 
-                THEN ROUND(CAST((SUM(ps.BB) - SUM(ps.IBB)) AS FLOAT) / SUM(ps.IP), 2)
-                ELSE 0.00
-            END as BB_per_IP,
-            CASE 
-                WHEN (SUM(ps.W) + SUM(ps.L)) > 0 
-                THEN ROUND(CAST(SUM(ps.W) AS FLOAT) / (SUM(ps.W) + SUM(ps.L)), 3)
-                ELSE 0.000
-            END as Win_Pct
-        FROM People p
-        JOIN pitching_stats ps ON p.PersonNumber = ps.PlayerNumber
-        WHERE p.LastName != 'Subs'
-            AND p.FirstName NOT LIKE '%Sub%' 
-            AND p.LastName NOT LIKE '%Sub%'
-            AND p.FirstName != 'Sub'
-            AND p.LastName != 'Sub'
-            AND LOWER(p.FirstName) NOT LIKE '%substitute%'
-            AND LOWER(p.LastName) NOT LIKE '%substitute%'
-            AND ps.IP > 0
-        GROUP BY p.PersonNumber, p.FirstName, p.LastName
-        HAVING SUM(ps.IP) > 0
-        ORDER BY COUNT(*) DESC, SUM(ps.IP) DESC, p.LastName, p.FirstName
-    '''
-    
-    pitchers = conn.execute(query).fetchall()
-    conn.close()
+    # Career pitching (exclude subs, only pitchers with innings) from pitcher_career
+    board = leaderboard(conn, 'pitcher_career', PITCHING_LEADERBOARD_SORTS,
+                        'games', 'IP', 'min_ip')
     
-    return render_template('pitching.html', pitchers=pitchers)
+    return render_page('pitching.html', pitchers=board['rows'], board=board)
 
 
 # Add new pitcher detail route:
 @app.route('/pitcher/<int:pitcher_id>')
+@cached_response
 def pitcher_detail(pitcher_id):
     conn = get_db_connection()
     
@@ -1867,6 +1963,8 @@ def pitcher_detail(pitcher_id):
         SELECT 
             ps.TeamNumber,
             t.LongTeamName,
+            t.display_name as team_display_name,
+            t.season_code,
             COUNT(*) as Games,
             SUM(ps.IP) as IP,
             SUM(ps.BB) as BB,
@@ -1877,7 +1975,7 @@ def pitcher_detail(pitcher_id):
         JOIN Teams t ON ps.TeamNumber = t.TeamNumber
         WHERE ps.PlayerNumber = ? AND ps.IP > 0
         GROUP BY ps.TeamNumber, t.LongTeamName
-        ORDER BY t.LongTeamName DESC
+        ORDER BY t.season_sort DESC, t.LongTeamName DESC  -- newest season first
     '''
     
     season_records_raw = conn.execute(records_query, (pitcher_id,)).fetchall()
@@ -1886,20 +1984,7 @@ def pitcher_detail(pitcher_id):
     season_records = []
     for record in season_records_raw:
         record_dict = dict(record)
-        team_name = record_dict['LongTeamName']
-        
-        # Extract season code from team name
-        season_match = re.search(r'([A-Z]\d{2})$', team_name)
-        season_filter_number = None
-        if season_match:
-            season_code = season_match.group(1)
-            season_filter_number = seasons_lookup.get(season_code)
-        
-        # Clean team name - remove season code AND division names
-        clean_team_name = re.sub(r'\s+[A-Z]\d{2}$', '', team_name)  # Remove season code
-        clean_team_name = re.sub(r'\s*\([^)]+\)\s*', '', clean_team_name).strip()  # Remove division
-        record_dict['team_display_name'] = clean_team_name
-        record_dict['season_filter_number'] = season_filter_number
+        record_dict['season_filter_number'] = seasons_lookup.get(record_dict['season_code'])
         
         # Calculate derived stats
         if record_dict['IP'] > 0:
@@ -1914,16 +1999,81 @@ def pitcher_detail(pitcher_id):
         
         season_records.append(record_dict)
     
-    # Sort by season (newest to oldest)
-    season_records.sort(key=lambda x: get_season_sort_key(x['LongTeamName']), reverse=True)
-    
-    conn.close()
-    
-    return render_template('pitcher_detail.html', 
-                         pitcher=pitcher, 
-                         career_stats=career_stats,
-                         season_records=season_records,
-                         total_seasons=len(season_records))
+    return render_page('pitcher_detail.html', 
+                     pitcher=pitcher, 
+                     career_stats=career_stats,
+                     season_records=season_records,
+                     total_seasons=len(season_records))
+
+
+# ============================================================
+# Batter vs pitcher
+# ============================================================
+
+# Pitcher shown in the metrics page BVP column unless ?pitcher= is given
+BVP_DEFAULT_PITCHER = 401
+
+
+def get_decision_pitchers(conn):
+    """Everyone who has a W or L on record, for pitcher pickers"""
+    return conn.execute('''
+        SELECT p.PersonNumber, p.FirstName, p.LastName
+        FROM People p
+        WHERE p.PersonNumber IN (SELECT PitcherNumber FROM game_decisions)
+            AND p.LastName != 'Subs'
+        ORDER BY p.LastName, p.FirstName
+    ''').fetchall()
+
+
+@app.route('/matchups')
+@cached_response
+def matchups():
+    """Career batter-vs-pitcher lines (?batter=, ?pitcher= or both)"""
+    conn = get_db_connection()
+
+    batter_id = request.args.get('batter', type=int)
+    pitcher_id = request.args.get('pitcher', type=int)
+
+    person_query = 'SELECT PersonNumber, FirstName, LastName FROM People WHERE PersonNumber = ?'
+    batter = conn.execute(person_query, (batter_id,)).fetchone() if batter_id else None
+    pitcher = conn.execute(person_query, (pitcher_id,)).fetchone() if pitcher_id else None
+    if batter_id and not batter:
+        return "Batter not found", 404
+    if pitcher_id and not pitcher:
+        return "Pitcher not found", 404
+
+    conditions, params = [], []
+    if batter_id:
+        conditions.append('m.BatterNumber = ?')
+        params.append(batter_id)
+    if pitcher_id:
+        conditions.append('m.PitcherNumber = ?')
+        params.append(pitcher_id)
+
+    lines = []
+    if conditions:
+        rows = conn.execute(f'''
+            SELECT 
+                m.BatterNumber, bp.FirstName as BatterFirst, bp.LastName as BatterLast,
+                m.PitcherNumber, pp.FirstName as PitcherFirst, pp.LastName as PitcherLast,
+                m.Games, m.PA, m.AB, m.H, m.HR, m.BB
+            FROM bvp_matchups m
+            JOIN People bp ON bp.PersonNumber = m.BatterNumber
+            JOIN People pp ON pp.PersonNumber = m.PitcherNumber
+            WHERE {' AND '.join(conditions)}
+                AND bp.LastName != 'Subs' AND pp.LastName != 'Subs'
+            ORDER BY m.PA DESC, m.H DESC, bp.LastName, pp.LastName
+        ''', params).fetchall()
+        for row in rows:
+            line = dict(row)
+            line['AVG'] = round(line['H'] / line['AB'], 3) if line['AB'] else 0.000
+            lines.append(line)
+
+    return render_template('matchups.html',
+                         batter=batter,
+                         pitcher=pitcher,
+                         lines=lines,
+                         pitchers=get_decision_pitchers(conn))
 
 
 @app.route('/draft')
@@ -1972,7 +2122,6 @@ def draft():
             for row in reader:
                 draft_data.append(row)
     except FileNotFoundError:
-        conn.close()
         return "Draft CSV file not found", 404
     
     # Process draft data and match to Excel
@@ -2009,8 +2158,6 @@ def draft():
             'is_manager': is_manager
         })
     
-    conn.close()
-    
     success = request.args.get('success') == '1'
     
     return render_template('draft.html',
@@ -2041,7 +2188,6 @@ def save_draft():
             for row in reader:
                 draft_data.append(row)
     except FileNotFoundError:
-        conn.close()
         return "Draft CSV file not found", 404
     
     # Create backup of original file
@@ -2087,13 +2233,365 @@ def save_draft():
         writer.writeheader()
         writer.writerows(draft_data)
     
-    conn.close()
-    
     # Redirect to draft page with success message
     from flask import redirect, url_for, flash
     return redirect('/draft?success=1')
 
 
+# ============================================================
+# Search
+# ============================================================
+# Players, teams and seasons are indexed in the search_index FTS5 table
+# (see summary_tables.refresh_search_index). Every word typed is matched as
+# a prefix, so "jo smi" finds John Smith; results come back in bm25 order.
+
+SEARCH_PAGE_LIMIT = 50
+SEARCH_SUGGEST_LIMIT = 10
+SEARCH_URLS = {'player': '/player/{}', 'team': '/team/{}', 'season': '/season/{}'}
+
+
+def search_entries(conn, text, limit):
+    """Index entries matching every word of text, best match first"""
+    words = re.findall(r'\w+', (text or '').lower())
+    if not words:
+        return []
+    # Quoted so FTS5 syntax in the input (AND, NEAR, -, ...) stays plain words
+    match = ' '.join(f'"{word}"*' for word in words)
+    rows = conn.execute('''
+        SELECT name, kind, ref, detail
+        FROM search_index
+        WHERE search_index MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    ''', (match, limit)).fetchall()
+    return [dict(row, url=SEARCH_URLS[row['kind']].format(row['ref'])) for row in rows]
+
+
+@app.route('/search')
+@cached_response
+def search():
+    """Players, teams and seasons whose names match ?q="""
+    q = request.args.get('q', '').strip()
+    results = search_entries(get_db_connection(), q, SEARCH_PAGE_LIMIT)
+    groups = OrderedDict((kind, []) for kind in SEARCH_URLS)
+    for result in results:
+        groups[result['kind']].append(result)
+    return render_page('search.html', q=q, results=results, groups=groups)
+
+
+# ============================================================
+# JSON API (/api/v1)
+# ============================================================
+# Read-only JSON mirrors of the main pages. Each endpoint reuses its page's
+# view (through render_page), so the numbers always match the HTML, and
+# goes through the same response cache / ETag layer. The player/pitcher
+# lists read the same career tables as the (paged) leaderboard pages.
+#
+# List endpoints take:
+#   ?limit=N          page size (default 100, max 1000)
+#   ?after=<cursor>   keyset cursor from the previous page's "next"
+#   ?sort=Field       sort on any returned field, -Field for descending
+#   ?fields=A,B,C     only return these fields
+#   ?format=columns   {"columns": [...], "rows": [[...], ...]} instead of objects
+# Detail endpoints take ?fields= to pick top-level sections.
+
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+@app.errorhandler(ApiError)
+def api_error(error):
+    return jsonify({'error': error.message}), error.status
+
+
+def page_context(view, **kwargs):
+    """Run a page view for its template context instead of HTML.
+    Calls the undecorated view so the HTML cache isn't involved."""
+    g.api_context = True
+    try:
+        result = view.__wrapped__(**kwargs)
+    finally:
+        g.api_context = False
+    if isinstance(result, tuple):  # ("... not found", 404)
+        message, status = result[0], result[1]
+        raise ApiError(message, status)
+    return result
+
+
+def to_json(value):
+    """sqlite3.Row -> dict, recursively, so contexts can be jsonify'd"""
+    if isinstance(value, sqlite3.Row):
+        return {key: value[key] for key in value.keys()}
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    return value
+
+
+def _encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return _as_key(json.loads(base64.urlsafe_b64decode(padded)))
+    except ValueError:
+        raise ApiError('Invalid cursor')
+
+
+def _is_cursor_scalar(value):
+    """Can this cursor part be bound and compared? (not a list, not a bool)"""
+    return value is None or (isinstance(value, (int, float, str)) and not isinstance(value, bool))
+
+
+def _as_key(value):
+    """JSON lists back to (comparable) tuples"""
+    return tuple(_as_key(item) for item in value) if isinstance(value, list) else value
+
+
+def _valid_list_cursor(cursor, key_count):
+    """Does cursor have the ((is_null, sort value), *keys) shape api_list writes?"""
+    return (isinstance(cursor, tuple) and len(cursor) == 1 + key_count
+            and isinstance(cursor[0], tuple) and len(cursor[0]) == 2
+            and isinstance(cursor[0][0], bool) and _is_cursor_scalar(cursor[0][1])
+            and all(map(_is_cursor_scalar, cursor[1:])))
+
+
+def _list_cursor():
+    """The ?after= cursor of a list endpoint, or None on the first page"""
+    after = request.args.get('after')
+    if not after:
+        return None
+    cursor = _decode_cursor(after)
+    if cursor is None:
+        raise ApiError('Invalid cursor')
+    return cursor
+
+
+def _list_limit():
+    limit = request.args.get('limit', API_DEFAULT_LIMIT, type=int)
+    return max(1, min(limit, API_MAX_LIMIT))
+
+
+def _select_fields(records, available):
+    fields = request.args.get('fields')
+    if not fields:
+        return records, list(available)
+    selected = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in selected if field not in available]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+    return [{field: record.get(field) for field in selected} for record in records], selected
+
+
+def api_list(records, key_fields, default_sort, **extra):
+    """Sort, keyset-paginate, trim and shape a list of dicts.
+    key_fields make each record unique, so cursors are stable across
+    pages; the cursor is the last record's (sort value, *keys)."""
+    records = to_json(records)
+    available = list(records[0].keys()) if records else []
+
+    sort = request.args.get('sort', default_sort)
+    descending = sort.startswith('-')
+    sort_field = sort.lstrip('-')
+    if records and sort_field not in available:
+        raise ApiError(f"Cannot sort on '{sort_field}'")
+
+    def record_key(record):
+        value = record.get(sort_field)
+        # NULLs sort last ascending, first descending
+        return ((value is None, value if value is not None else 0),) + tuple(
+            record.get(field) for field in key_fields)
+
+    records = sorted(records, key=record_key, reverse=descending)
+
+    cursor = _list_cursor()
+    if cursor is not None:
+        if not _valid_list_cursor(cursor, len(key_fields)):
+            raise ApiError('Invalid cursor')
+        try:
+            if descending:
+                records = [record for record in records if record_key(record) < cursor]
+            else:
+                records = [record for record in records if record_key(record) > cursor]
+        except TypeError:
+            # e.g. a text sort value on a numeric field
+            raise ApiError('Invalid cursor')
+
+    limit = _list_limit()
+    page, more = records[:limit], len(records) > limit
+    next_cursor = _encode_cursor(record_key(page[-1])) if more else None
+    return _list_response(page, available, next_cursor, extra)
+
+
+def api_table_list(conn, table, columns, default_sort):
+    """api_list for a whole table keyed on PersonNumber, sorted and paged in
+    SQL instead of in Python. Same ?sort=, cursors and NULL order: NULLs
+    sort last ascending, first descending. Each run (non-NULL values, then
+    NULLs, reversed for descending) is an index range scan where the sort
+    column has a (column, PersonNumber) index (the leaderboard columns)."""
+    sort = request.args.get('sort', default_sort)
+    descending = sort.startswith('-')
+    sort_field = sort.lstrip('-')
+    if sort_field not in columns:
+        raise ApiError(f"Cannot sort on '{sort_field}'")
+    order, seek = ('DESC', '<') if descending else ('ASC', '>')
+
+    cursor = _list_cursor()
+    runs = [True, False] if descending else [False, True]  # is_null per run
+    if cursor is not None:
+        if not _valid_list_cursor(cursor, 1):
+            raise ApiError('Invalid cursor')
+        (cursor_is_null, cursor_value), cursor_key = cursor
+        # SQLite would happily order text against numbers; api_list can't
+        sample = conn.execute(f"SELECT typeof({sort_field}) FROM {table} WHERE {sort_field} IS NOT NULL LIMIT 1").fetchone()
+        if (not isinstance(cursor_key, int)
+                or (not cursor_is_null and sample
+                    and isinstance(cursor_value, str) != (sample[0] == 'text'))):
+            raise ApiError('Invalid cursor')
+        runs = runs[runs.index(cursor_is_null):]
+
+    limit = _list_limit()
+    rows = []
+    for is_null in runs:
+        conditions = [f"{sort_field} IS {'' if is_null else 'NOT '}NULL"]
+        params = []
+        if cursor is not None and is_null == cursor_is_null:
+            if is_null:
+                conditions.append(f"PersonNumber {seek} ?")
+                params.append(cursor_key)
+            else:
+                conditions.append(f"({sort_field}, PersonNumber) {seek} (?, ?)")
+                params.extend([cursor_value, cursor_key])
+        rows += conn.execute(f'''
+            SELECT {', '.join(columns)} FROM {table}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {sort_field} {order}, PersonNumber {order}
+            LIMIT ?
+        ''', params + [limit + 1 - len(rows)]).fetchall()
+        if len(rows) > limit:
+            break
+
+    page, more = to_json(rows[:limit]), len(rows) > limit
+    next_cursor = None
+    if more:
+        value = page[-1][sort_field]
+        next_cursor = _encode_cursor([[value is None, value if value is not None else 0],
+                                      page[-1]['PersonNumber']])
+    return _list_response(page, list(columns), next_cursor, {})
+
+
+def _list_response(page, available, next_cursor, extra):
+    """?fields= / ?format= shaping shared by the list endpoints"""
+    page, fields = _select_fields(page, available)
+    if request.args.get('format') == 'columns':
+        data = {'columns': fields, 'rows': [[record.get(field) for field in fields] for record in page]}
+    else:
+        data = page
+
+    payload = dict(to_json(extra), data=data, count=len(page), next=next_cursor)
+    return jsonify(payload)
+
+
+def api_detail(context):
+    """Whole page context (or the ?fields= sections of it) as JSON"""
+    context = to_json(context)
+    fields = request.args.get('fields')
+    if fields:
+        selected = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in selected if field not in context]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}")
+        context = {field: context[field] for field in selected}
+    return jsonify({'data': context})
+
+
+API_PLAYER_FIELDS = ['PersonNumber', 'FirstName', 'LastName', 'Games', 'PA', 'R', 'H', 'Doubles',
+                     'Triples', 'HR', 'BB', 'RBI', 'SF', 'OE', 'AB', 'TB', 'AVG', 'OBP', 'SLG',
+                     'OPS', 'convBA']
+API_PITCHER_FIELDS = ['PersonNumber', 'FirstName', 'LastName', 'Games', 'IP', 'BB', 'W', 'L', 'IBB',
+                      'BB_per_IP', 'Win_Pct']
+
+
+@app.route('/api/v1/players')
+@cached_response
+def api_players():
+    return api_table_list(get_db_connection(), 'player_career_batting', API_PLAYER_FIELDS, '-Games')
+
+
+@app.route('/api/v1/players/<int:player_id>')
+@cached_response
+def api_player_detail(player_id):
+    return api_detail(page_context(player_detail, player_id=player_id))
+
+
+@app.route('/api/v1/players/<int:player_id>/games')
+@cached_response
+def api_player_games(player_id):
+    context = page_context(player_games, player_id=player_id)
+    return api_list(context['games'], ['TeamNumber', 'GameNumber'], '-game_date',
+                    player=context['player'], career_stats=context['career_stats'])
+
+
+@app.route('/api/v1/seasons/<filter_number>/standings')
+@cached_response
+def api_season_standings(filter_number):
+    context = page_context(season_detail, filter_number=filter_number)
+    return api_detail({key: context[key] for key in ('season', 'teams', 'divisions', 'has_divisions')})
+
+
+@app.route('/api/v1/seasons/<filter_number>/batting')
+@cached_response
+def api_season_batting(filter_number):
+    context = page_context(season_batting, filter_number=filter_number)
+    return api_list(context['players'], ['PersonNumber', 'TeamNumber'], '-OBP',
+                    season=context['season'],
+                    qualified_pa_threshold=context['qualified_pa_threshold'])
+
+
+@app.route('/api/v1/teams/<int:team_number>')
+@cached_response
+def api_team_detail(team_number):
+    return api_detail(page_context(team_detail, team_number=team_number))
+
+
+@app.route('/api/v1/boxscores/<int:team_number>/<int:game_number>')
+@cached_response
+def api_boxscore(team_number, game_number):
+    return api_detail(page_context(boxscore, team_number=team_number, game_number=game_number))
+
+
+@app.route('/api/v1/pitching')
+@cached_response
+def api_pitching():
+    return api_table_list(get_db_connection(), 'pitcher_career', API_PITCHER_FIELDS, '-Games')
+
+
+@app.route('/api/v1/pitchers/<int:pitcher_id>')
+@cached_response
+def api_pitcher_detail(pitcher_id):
+    return api_detail(page_context(pitcher_detail, pitcher_id=pitcher_id))
+
+
+@app.route('/api/v1/search')
+@cached_response
+def api_search():
+    """Autocomplete suggestions: ?q= (each word a prefix), ?limit= (default 10)"""
+    limit = request.args.get('limit', SEARCH_SUGGEST_LIMIT, type=int)
+    limit = max(1, min(limit, API_MAX_LIMIT))
+    results = search_entries(get_db_connection(), request.args.get('q'), limit)
+    return jsonify({'data': results, 'count': len(results)})
+
+
 if __name__ == '__main__':
     init_db()
     app.run(debug=True, use_reloader=False, port=5020)  # Changed port to avoid conflicts
\ No newline at end of file
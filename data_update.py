@@ -6,23 +6,62 @@ Preprocessing layer handles:
   1. PID remapping (CSV PIDs → DB PIDs) for mid-season player additions
   2. Pitching sub detection (overrides incorrect Roster flags using actual roster data)
   3. Error reporting for data quality issues
+
+USAGE:
+    python data_update.py              # backup, then sync into softball_stats.db in place
+    python data_update.py --publish    # sync a staged copy, validate, then swap it in
+                                       # atomically (see publish.py)
+    python data_update.py --full       # re-check every game (after hand edits to
+                                       # the stats tables)
+    python data_update.py --season F25 --season W26
+                                       # sync several seasons in one pass
+    python data_update.py --all-seasons --full
+                                       # reload every registered season
+
+Which teams belong to a season, each team's Subs PID and the names the
+export uses for opponents come from the season_teams registry (schema.py),
+which start_new_season.py fills in for every new season. Without --season
+only the newest registered season is synced; each season is preprocessed
+and synced on its own, all in one transaction.
+
+Only games whose CSV rows changed since the previous run (content hashes
+in the sync_state table) are staged, diffed and written, and only the
+teams in those games get their summary tables refreshed.
+
+A closed season frozen to static pages (freeze.py) that the sync changes
+(or that --full re-checks) is thawed: its frozen pages are deleted so the
+new numbers show, until python freeze.py re-freezes it.
 """
 
+import argparse
+import hashlib
+import io
 import sqlite3
 import pandas as pd
 from datetime import datetime
-import shutil
-import os
+
+from frozen import thaw_seasons
+from publish import discard_generation, publish_generation, stage_generation
+from schema import (backup_database, backfill_game_dates, bump_sync_version,
+                    normalize_game_date, upgrade_schema)
+from summary_tables import (refresh_bvp_matchups, refresh_game_decisions, refresh_game_pairs,
+                            refresh_pitcher_career, refresh_player_career_batting,
+                            refresh_player_season_batting, refresh_search_index,
+                            refresh_season_summary, season_codes_for_teams)
 
 # ============================================================
-# CONFIGURATION - Update these each season
+# CONFIGURATION
 # ============================================================
 
-# W26 Team Numbers (538-551)
-W26_TEAM_NUMBERS = set(range(538, 552))
+DB_PATH = "softball_stats.db"
+
+# Multi-table export from the data entry system
+CSV_PATH = "data.csv"
 
-# Season filter: 'W26' = only process W26 teams, None = process all
-SEASON_FILTER = 'W26'
+# The teams in each season, their Subs PIDs and opponent names are not
+# configured here: they come from the season_teams registry (SEASON
+# REGISTRY below). PID_REMAP is export-wide; which player PID 630 means is
+# worked out per season, and FORCE_ROSTER is keyed by season.
 
 # PID REMAPPING: CSV PersonNumber → DB PersonNumber
 # The data entry system diverged from our DB numbering at PID 628.
@@ -41,72 +80,98 @@ PID_REMAP = {
 }
 
 # PID 630 special case: In our DB, 630 = "Big Dawgs Subs".
-# CSV uses 630 for Mike Riley when he subs. Three-way logic:
-#   Team 544 (Big Dawgs)   → stay 630 (Big Dawgs Subs)
-#   Team 540 (Wolverines)  → remap to 620 (Mike Riley, his home team)
-#   Any other team         → remap to that team's Subs PID
+# CSV uses 630 for Mike Riley when he subs. Three-way logic, from the
+# season being synced (season_teams and the rosters):
+#   Team whose Subs PID is 630     → stay 630 (Big Dawgs Subs)
+#   Team with Mike Riley rostered  → remap to 620 (Mike Riley, his home team)
+#   Any other team                 → remap to that team's Subs PID
 PID_630_REAL_PLAYER = 620       # Mike Riley
-PID_630_HOME_TEAM = 544         # Big Dawgs
-PID_630_REAL_PLAYER_TEAM = 540  # Wolverines
-
-# HARDCODED SUB MAPPINGS - Team Number → Team's Subs PID
-SUBS_MAPPING_W26 = {
-    538: 493,   # Buckeyes Subs
-    539: 584,   # Norsemen Subs
-    540: 419,   # Wolverines Subs
-    541: 554,   # Xtreme Subs
-    542: 600,   # Bad News Bears Subs
-    543: 560,   # Bearcats Subs
-    544: 630,   # Big Dawgs Subs
-    545: 580,   # Death Stars Subs
-    546: 538,   # Gunslingers Subs
-    547: 540,   # Lightning Strikes Subs
-    548: 302,   # Rebels Subs
-    549: 548,   # Shorebirds Subs
-    550: 320,   # Team USA Subs
-    551: 415,   # Tigers Subs
-}
 
 # FORCE ROSTER: (pid, team) pairs where the CSV flag is wrong and we
 # must override Sub→Roster. Used for mid-season replacements whose
 # appearances were entered as Sub before RosterHistory tracking exists.
-# Format: {(pid, team): reason_string}
+# Format: {season_code: {(pid, team): reason_string}}
 FORCE_ROSTER = {
-    (634, 540): "Alan Humes (DB 634) is a rostered Wolverine — CSV flags him Sub",
+    'W26': {
+        (634, 540): "Alan Humes (DB 634) is a rostered Wolverine — CSV flags him Sub",
+    },
 }
 
-TEAM_MAPPING_W26 = {
-    'Bad News Bears': 542,
-    'Bearcats': 543,
-    'Big Dawgs': 544,
-    'Buckeyes': 538,
-    'Death Stars': 545,
-    'Gunslingers': 546,
-    'Lightning Strikes': 547,
-    'Norsemen': 539,
-    'Rebels': 548,
-    'Shorebirds': 549,
-    'Team USA': 550,
-    'TeamUSA': 550,
-    'Tigers': 551,
-    'Wolverines': 540,
-    'Xtreme': 541,
-}
+
+# ============================================================
+# SEASON REGISTRY
+# ============================================================
+
+def load_season_registry(conn, season_codes=None):
+    """Sync configuration per season from the season_teams registry,
+    oldest season first:
+        {season_code: {'code': season_code,
+                       'teams': set of TeamNumbers,
+                       'subs_pids': {TeamNumber: the team's Subs PID},
+                       'opponents': {export team name: TeamNumber}}}
+    season_codes=None loads every registered season; an empty list loads
+    the newest one. Raises ValueError for codes that aren't registered
+    (or when nothing is)."""
+    rows = conn.execute("""
+        SELECT st.season_code, st.TeamNumber, st.team_name, st.subs_pid
+        FROM season_teams st
+        LEFT JOIN Teams t ON t.TeamNumber = st.TeamNumber
+        ORDER BY IFNULL(t.season_sort, 0), st.season_code, st.TeamNumber
+    """).fetchall()
+    registry = {}
+    for code, team, name, subs_pid in rows:
+        season = registry.setdefault(code, {'code': code, 'teams': set(), 'subs_pids': {}, 'opponents': {}})
+        season['teams'].add(team)
+        if subs_pid is not None:
+            season['subs_pids'][team] = subs_pid
+        # The export sometimes drops the spaces ("TeamUSA")
+        season['opponents'][name] = team
+        season['opponents'][name.replace(' ', '')] = team
+
+    if not registry:
+        raise ValueError("The season_teams registry is empty (python schema.py --reparse-teams "
+                         "registers every season in Teams)")
+    if season_codes is None:
+        return registry
+    if not season_codes:
+        return dict(list(registry.items())[-1:])
+    unknown = [code for code in season_codes if code not in registry]
+    if unknown:
+        raise ValueError(f"Not in the season_teams registry: {', '.join(unknown)} "
+                         f"(registered: {', '.join(registry) or 'none'})")
+    return {code: season for code, season in registry.items() if code in season_codes}
+
+
+def season_rows(df, season, label):
+    """The export rows for one season's teams (None if the table is missing)"""
+    if df is None or 'TeamNumber' not in df.columns:
+        return df
+    season_df = df[df['TeamNumber'].isin(season['teams'])]
+    filtered_count = len(df) - len(season_df)
+    if filtered_count > 0:
+        print(f"Filtered out {filtered_count} {label} records from other seasons, "
+              f"keeping {len(season_df)} {season['code']} records")
+    return season_df
+
+
+def _in_list(column, ids):
+    """SQL: column IN (ids), with the ids inlined (they are integers)"""
+    return f"{column} IN ({','.join(str(int(i)) for i in sorted(ids))})"
 
 
 # ============================================================
 # PREPROCESSING
 # ============================================================
 
-def build_roster_lookup(conn):
+def build_roster_lookup(conn, team_numbers):
     """Build roster lookup from DB: {team_number: set of player PIDs}
     Excludes Subs placeholder entries."""
     cursor = conn.cursor()
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT r.TeamNumber, r.PersonNumber
         FROM Roster r
         JOIN People p ON r.PersonNumber = p.PersonNumber
-        WHERE r.TeamNumber BETWEEN 538 AND 551 AND p.LastName != 'Subs'
+        WHERE {_in_list('r.TeamNumber', team_numbers)} AND p.LastName != 'Subs'
     """)
     roster = {}
     for team, pid in cursor.fetchall():
@@ -116,10 +181,10 @@ def build_roster_lookup(conn):
     return roster
 
 
-def get_team_name_lookup(conn):
+def get_team_name_lookup(conn, team_numbers):
     """Build team number → short name lookup"""
     cursor = conn.cursor()
-    cursor.execute("SELECT TeamNumber, LongTeamName FROM Teams WHERE TeamNumber BETWEEN 538 AND 551")
+    cursor.execute(f"SELECT TeamNumber, LongTeamName FROM Teams WHERE {_in_list('TeamNumber', team_numbers)}")
     return {row[0]: row[1].split('(')[0].strip() for row in cursor.fetchall()}
 
 
@@ -130,135 +195,134 @@ def get_player_name_lookup(conn):
     return {row[0]: f"{row[1]} {row[2]}" for row in cursor.fetchall()}
 
 
-def remap_pids(df, report_lines):
-    """Remap CSV PersonNumbers to DB PersonNumbers.
-    Modifies df in place. Logs all remaps to report_lines."""
-    remap_count = 0
-
-    for i in range(len(df)):
-        pid = df.iloc[i]['PersonNumber']
-        team = df.iloc[i]['TeamNumber']
-
-        # Special case: PID 630 — three-way logic
-        if pid == 630:
-            if team == PID_630_HOME_TEAM:
-                # Big Dawgs (544) → leave as 630 (Big Dawgs Subs)
-                pass
-            elif team == PID_630_REAL_PLAYER_TEAM:
-                # Wolverines (540) → Mike Riley (his home team)
-                df.iloc[i, df.columns.get_loc('PersonNumber')] = PID_630_REAL_PLAYER
-                report_lines.append(
-                    f"  PID REMAP: 630 → {PID_630_REAL_PLAYER} (Mike Riley, Wolverines) "
-                    f"Team {team} Game {df.iloc[i]['GameNumber']}"
-                )
-                remap_count += 1
-            else:
-                # Any other team → that team's Subs PID
-                subs_pid = SUBS_MAPPING_W26[team]
-                df.iloc[i, df.columns.get_loc('PersonNumber')] = subs_pid
-                report_lines.append(
-                    f"  PID REMAP: 630 → {subs_pid} (Team {team} Subs) "
-                    f"Team {team} Game {df.iloc[i]['GameNumber']}"
-                )
-                remap_count += 1
-            continue
-
-        # Standard remaps
-        if pid in PID_REMAP:
-            new_pid = PID_REMAP[pid]
-            df.iloc[i, df.columns.get_loc('PersonNumber')] = new_pid
+def _key_frame(pairs, *extra_columns):
+    """(team, pid, ...) tuples -> DataFrame keyed on TeamNumber/PersonNumber"""
+    frame = pd.DataFrame(list(pairs), columns=['TeamNumber', 'PersonNumber', *extra_columns])
+    return frame.astype({'TeamNumber': 'int64', 'PersonNumber': 'int64'})
+
+
+def on_roster(df, roster):
+    """Boolean array: is each row's PersonNumber on its TeamNumber's roster?
+    One join against the roster pairs instead of a set lookup per row."""
+    pairs = _key_frame((team, pid) for team, pids in roster.items() for pid in pids)
+    keys = df[['TeamNumber', 'PersonNumber']].astype('int64')
+    joined = keys.merge(pairs, on=['TeamNumber', 'PersonNumber'], how='left', indicator=True)
+    return joined['_merge'].eq('both').to_numpy()
+
+
+def remap_pids(df, report_lines, subs_pids, roster):
+    """Remap CSV PersonNumbers to DB PersonNumbers. subs_pids is the
+    season's {TeamNumber: Subs PID} and roster its build_roster_lookup().
+    Returns the remapped df. Logs all remaps to report_lines."""
+    pids = df['PersonNumber']
+    teams = df['TeamNumber']
+
+    # Standard remaps
+    new_pids = pids.map(PID_REMAP)
+
+    # Special case: PID 630 — three-way logic. The team whose Subs PID is
+    # 630 (Big Dawgs) leaves it as is, a team with Mike Riley on its roster
+    # gets him, any other team gets that team's Subs PID.
+    is_630 = pids.eq(630)
+    team_subs = teams.map(subs_pids)
+    real_player_teams = [team for team, team_pids in roster.items() if PID_630_REAL_PLAYER in team_pids]
+    to_remap = is_630 & team_subs.ne(630)
+    to_real_player = to_remap & teams.isin(real_player_teams)
+    to_team_subs = to_remap & ~to_real_player & team_subs.notna()
+    new_pids = new_pids.mask(to_real_player, PID_630_REAL_PLAYER).mask(to_team_subs, team_subs)
+    # No Subs PID registered for the team: nothing to credit it to
+    report_lines.extend(_flag_lines(
+        df, (to_remap & ~to_real_player & team_subs.isna()).to_numpy(),
+        "  WARNING: PID {pid} left as is for Team {team} Game {game} "
+        "(Mike Riley isn't on the roster and the team has no Subs PID in season_teams)"
+    ))
+
+    remapped = new_pids.notna()
+    for pid, new_pid, team, game in zip(pids[remapped].tolist(), new_pids[remapped].tolist(),
+                                        teams[remapped].tolist(),
+                                        df.loc[remapped, 'GameNumber'].tolist()):
+        new_pid = int(new_pid)
+        if pid != 630:
+            report_lines.append(f"  PID REMAP: {pid} → {new_pid} Team {team} Game {game}")
+        elif new_pid == PID_630_REAL_PLAYER:
             report_lines.append(
-                f"  PID REMAP: {pid} → {new_pid} "
-                f"Team {team} Game {df.iloc[i]['GameNumber']}"
+                f"  PID REMAP: 630 → {new_pid} (Mike Riley, rostered) Team {team} Game {game}"
             )
-            remap_count += 1
+        else:
+            report_lines.append(f"  PID REMAP: 630 → {new_pid} (Team {team} Subs) Team {team} Game {game}")
 
+    remap_count = int(remapped.sum())
     if remap_count > 0:
         report_lines.insert(0, f"PID Remaps applied: {remap_count}")
+        df = df.assign(PersonNumber=pids.mask(remapped, new_pids).astype(pids.dtype))
     return df
 
 
+def _flag_lines(df, mask, template):
+    """One report line per masked row, in row order"""
+    rows = df.loc[mask, ['PersonNumber', 'TeamNumber', 'GameNumber']]
+    return [
+        template.format(pid=int(pid), team=int(team), game=game)
+        for pid, team, game in zip(rows['PersonNumber'].tolist(), rows['TeamNumber'].tolist(),
+                                   rows['GameNumber'].tolist())
+    ]
+
+
 def fix_pitching_subs(df, roster, report_lines):
     """For pitching stats, check actual roster membership.
     If a pitcher is not on the team's roster, force Roster='Sub'
     regardless of what the CSV says. This catches data entry errors
     where sub pitchers are incorrectly marked as 'Roster'."""
-    fix_count = 0
-
     if 'Roster' not in df.columns:
         return df
 
-    for i in range(len(df)):
-        pid = int(df.iloc[i]['PersonNumber'])
-        team = int(df.iloc[i]['TeamNumber'])
-        roster_flag = df.iloc[i]['Roster']
-
-        # Skip if already marked Sub
-        if roster_flag == 'Sub':
-            continue
-
-        # Check if player is actually on this team's roster
-        team_roster = roster.get(team, set())
-        if pid not in team_roster:
-            df.iloc[i, df.columns.get_loc('Roster')] = 'Sub'
-            report_lines.append(
-                f"  PITCHING SUB FIX: PID {pid} marked Roster→Sub "
-                f"for Team {team} Game {df.iloc[i]['GameNumber']} "
-                f"(not on roster)"
-            )
-            fix_count += 1
-
+    # Rows already marked Sub are left alone
+    to_sub = df['Roster'].ne('Sub').to_numpy() & ~on_roster(df, roster)
+    fix_count = int(to_sub.sum())
     if fix_count > 0:
+        report_lines.extend(_flag_lines(
+            df, to_sub,
+            "  PITCHING SUB FIX: PID {pid} marked Roster→Sub for Team {team} Game {game} (not on roster)"
+        ))
         report_lines.insert(0, f"Pitching Sub fixes applied: {fix_count}")
+        df = df.assign(Roster=df['Roster'].mask(to_sub, 'Sub'))
     return df
 
 
-def fix_roster_flags(df, roster, report_lines):
+def fix_roster_flags(df, roster, report_lines, forced_roster):
     """For batting stats, correct players flagged Roster on a team they are NOT on.
     Safe direction only: Roster→Sub. Never flips Sub→Roster (would corrupt
     legitimate pre-roster sub appearances for mid-season replacements).
-    Runs after remap_pids so PIDs are already corrected."""
-    fix_count = 0
-
+    Runs after remap_pids so PIDs are already corrected. forced_roster is
+    the season's FORCE_ROSTER entry."""
     if 'Roster' not in df.columns:
         return df
 
-    for i in range(len(df)):
-        if df.iloc[i]['Roster'] != 'Roster':
-            continue
-
-        pid = int(df.iloc[i]['PersonNumber'])
-        team = int(df.iloc[i]['TeamNumber'])
-        team_roster = roster.get(team, set())
-
-        if pid not in team_roster:
-            df.iloc[i, df.columns.get_loc('Roster')] = 'Sub'
-            report_lines.append(
-                f"  ROSTER FLAG FIX: PID {pid} marked Roster→Sub "
-                f"for Team {team} Game {df.iloc[i]['GameNumber']} "
-                f"(not on roster)"
-            )
-            fix_count += 1
+    to_sub = df['Roster'].eq('Roster').to_numpy() & ~on_roster(df, roster)
+    fix_count = int(to_sub.sum())
+    report_lines.extend(_flag_lines(
+        df, to_sub,
+        "  ROSTER FLAG FIX: PID {pid} marked Roster→Sub for Team {team} Game {game} (not on roster)"
+    ))
+    flags = df['Roster'].mask(to_sub, 'Sub')
 
     # Force Sub→Roster for known exceptions (mid-season replacements
     # the CSV incorrectly flags as Sub)
-    force_count = 0
-    for i in range(len(df)):
-        pid = int(df.iloc[i]['PersonNumber'])
-        team = int(df.iloc[i]['TeamNumber'])
-        key = (pid, team)
-        if key in FORCE_ROSTER and df.iloc[i]['Roster'] == 'Sub':
-            df.iloc[i, df.columns.get_loc('Roster')] = 'Roster'
-            report_lines.append(
-                f"  FORCE ROSTER: PID {pid} Sub→Roster "
-                f"Team {team} Game {df.iloc[i]['GameNumber']} "
-                f"— {FORCE_ROSTER[key]}"
-            )
-            force_count += 1
+    forced = _key_frame(((team, pid, reason) for (pid, team), reason in forced_roster.items()), 'reason')
+    keys = df[['TeamNumber', 'PersonNumber']].astype('int64')
+    reasons = keys.merge(forced, on=['TeamNumber', 'PersonNumber'], how='left')['reason']
+    to_roster = reasons.notna().to_numpy() & flags.eq('Sub').to_numpy()
+    force_count = int(to_roster.sum())
+    lines = _flag_lines(df, to_roster, "  FORCE ROSTER: PID {pid} Sub→Roster Team {team} Game {game}")
+    report_lines.extend(
+        f"{line} — {reason}" for line, reason in zip(lines, reasons[to_roster].tolist())
+    )
+    flags = flags.mask(to_roster, 'Roster')
 
     total = fix_count + force_count
     if total > 0:
         report_lines.insert(0, f"Roster flag fixes applied: {fix_count} corrected, {force_count} forced")
+        df = df.assign(Roster=flags)
     return df
 
 
@@ -318,633 +382,730 @@ def print_preprocess_report(report_lines):
 # CSV EXTRACTION
 # ============================================================
 
-def extract_table(csv_file, table_name):
-    """Extract a specific table from the multi-table CSV"""
-    with open(csv_file, 'r') as f:
-        lines = f.readlines()
-
-    start_idx = None
-    for i, line in enumerate(lines):
-        if line.strip().startswith(f"Table: {table_name}"):
-            start_idx = i + 1
-            break
-
-    if start_idx is None:
-        print(f"Table {table_name} not found")
-        return None
-
-    end_idx = len(lines)
-    for i in range(start_idx, len(lines)):
-        if lines[i].strip().startswith("Table: "):
-            end_idx = i
-            break
+# Tables the sync reads, with the dtypes pandas infers from a normal export
+# spelled out (so one odd value can't quietly turn a column into text)
+EXPORT_TABLE_DTYPES = {
+    'BattingStats': {
+        'TeamNumber': 'int64', 'GameNumber': 'int64', 'PersonNumber': 'int64',
+        'GameType': 'int64', 'HomeTeam': 'bool',
+        'PA': 'int64', 'AB': 'int64', 'R': 'int64', 'H': 'int64', 'S': 'int64',
+        'D': 'int64', 'T': 'int64', 'HR': 'int64', 'TB': 'int64', 'FC': 'int64',
+        'BB': 'int64', 'RBI': 'int64', 'SF': 'int64', 'IBB': 'int64', 'OE': 'int64',
+        'OBP': 'float64', 'Sig': 'float64', 'BA': 'float64',
+        'SeasonID': 'int64', 'Roster': 'str', 'GamesPlayed': 'float64', 'LeagueID': 'int64',
+    },
+    'PitchingStats': {
+        'TeamNumber': 'int64', 'GameNumber': 'int64', 'PersonNumber': 'int64',
+        'GameType': 'int64', 'SeasonID': 'int64', 'HomeTeam': 'bool',
+        'IP': 'float64', 'R': 'int64', 'BB': 'int64', 'IBB': 'int64',
+        'W': 'int64', 'L': 'int64', 'T': 'float64', 'Starter': 'float64',
+        'Roster': 'str', 'LeagueID': 'int64',
+    },
+    'GameStats': {
+        'TeamNumber': 'int64', 'GameNumber': 'int64', 'GameDate': 'str',
+        'GameType': 'int64', 'Location': 'str', 'Innings': 'int64', 'HomeTeam': 'bool',
+        'Opponent': 'str', 'Runs': 'int64', 'OppRuns': 'int64', 'SeasonID': 'int64',
+        'INN1': 'int64', 'INN2': 'int64', 'INN3': 'int64', 'INN4': 'int64', 'INN5': 'int64',
+        'INN6': 'int64', 'INN7': 'int64', 'INN8': 'int64', 'INN9': 'int64', 'Mercy': 'str',
+    },
+}
 
-    temp_file = f"temp_{table_name.lower()}.csv"
-    with open(temp_file, 'w') as f:
-        f.writelines(lines[start_idx:end_idx])
 
-    return temp_file
+def read_export_tables(csv_file, table_names):
+    """Split the multi-table CSV into DataFrames in a single pass.
+    Only the requested "Table: X" sections are buffered, and reading stops
+    once the last of them ends. Returns {table_name: DataFrame}; tables not
+    in the file are left out."""
+    wanted = set(table_names)
+    sections = {}
+    current = None
+    with open(csv_file, 'r') as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith("Table: "):
+                if wanted.issubset(sections):
+                    break
+                name = stripped[len("Table: "):].strip()
+                # First section wins if a table is repeated
+                current = name if name in wanted and name not in sections else None
+                if current:
+                    sections[current] = []
+            elif current:
+                sections[current].append(line)
+
+    tables = {}
+    for name, lines in sections.items():
+        text = ''.join(lines)
+        try:
+            tables[name] = pd.read_csv(io.StringIO(text), dtype=EXPORT_TABLE_DTYPES.get(name))
+        except (ValueError, TypeError) as error:
+            print(f"  {name}: values don't fit the expected column types ({error}); "
+                  f"reading it with inferred types")
+            tables[name] = pd.read_csv(io.StringIO(text))
+    return tables
 
 
 # ============================================================
 # SUB LOGIC (existing - redirects Sub players to team Subs PID)
 # ============================================================
 
-def apply_subs_logic(df):
+def apply_subs_logic(df, subs_pids):
     """Apply sub player redirections - replaces individual sub PIDs
-    with the team's Subs placeholder PID."""
+    with the team's Subs placeholder PID (subs_pids: {TeamNumber: PID})."""
     sub_count = 0
     if 'Roster' in df.columns:
-        for i in range(len(df)):
-            if df.iloc[i]['Roster'] == 'Sub':
-                team_num = df.iloc[i]['TeamNumber']
-                if team_num in SUBS_MAPPING_W26:
-                    old_player = df.iloc[i]['PersonNumber']
-                    new_player = SUBS_MAPPING_W26[team_num]
-                    df.iloc[i, df.columns.get_loc('PersonNumber')] = new_player
-                    sub_count += 1
+        team_subs = df['TeamNumber'].map(subs_pids)
+        redirect = df['Roster'].eq('Sub') & team_subs.notna()
+        sub_count = int(redirect.sum())
+        if sub_count > 0:
+            pids = df['PersonNumber']
+            df = df.assign(PersonNumber=pids.mask(redirect, team_subs).astype(pids.dtype))
     if sub_count > 0:
         print(f"  Redirected {sub_count} sub records to team Subs PIDs")
     return df
 
 
+# ============================================================
+# SYNC STATE (content hashes of the previous import)
+# ============================================================
+
+# One block = one team's rows for one game
+BLOCK_KEY = ['TeamNumber', 'GameNumber']
+
+
+def block_hashes(df):
+    """{(TeamNumber, GameNumber): content hash} for the rows about to be
+    staged. Rows are hashed in key order, so an export that only reorders
+    rows hashes the same; the column names are part of the hash."""
+    if df.empty:
+        return {}
+    sort_cols = [col for col in ('TeamNumber', 'GameNumber', 'PlayerNumber') if col in df.columns]
+    ordered = df.sort_values(sort_cols)
+    row_hashes = pd.util.hash_pandas_object(ordered, index=False).to_numpy()
+    header = ','.join(map(str, ordered.columns)).encode()
+    hashes = {}
+    for (team, game), positions in ordered.groupby(BLOCK_KEY, sort=False).indices.items():
+        digest = hashlib.sha1(header)
+        digest.update(row_hashes[positions].tobytes())
+        hashes[(int(team), int(game))] = digest.hexdigest()
+    return hashes
+
+
+def stale_blocks(conn, table, hashes):
+    """Blocks whose hash differs from (or is missing in) sync_state"""
+    previous = {
+        (team, game): content_hash
+        for team, game, content_hash in conn.execute(
+            "SELECT TeamNumber, GameNumber, content_hash FROM sync_state WHERE table_name = ?",
+            (table,))
+    }
+    return {key for key, content_hash in hashes.items() if previous.get(key) != content_hash}
+
+
+def record_block_hashes(conn, table, hashes):
+    """Remember the hashes just synced. Caller is responsible for committing."""
+    conn.executemany("""
+        INSERT INTO sync_state (table_name, TeamNumber, GameNumber, content_hash, synced_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (table_name, TeamNumber, GameNumber) DO UPDATE
+        SET content_hash = excluded.content_hash, synced_at = excluded.synced_at
+    """, [(table, team, game, content_hash) for (team, game), content_hash in hashes.items()])
+
+
+def rows_in_blocks(df, blocks):
+    """The rows of df that belong to the given (TeamNumber, GameNumber) blocks"""
+    keys = pd.MultiIndex.from_frame(df[BLOCK_KEY].astype('int64'))
+    return df[keys.isin(list(blocks))]
+
+
+def filter_stale_blocks(conn, table, df, label):
+    """Keep only the games whose content changed since the last sync.
+    Returns (rows to stage, their hashes to record once written)."""
+    hashes = block_hashes(df)
+    stale = stale_blocks(conn, table, hashes)
+    print(f"  {label}: staging {len(stale)} of {len(hashes)} games (new or changed since the last sync)")
+    return rows_in_blocks(df, stale), {key: hashes[key] for key in stale}
+
+
+def print_touched_games(touched, team_names):
+    """touched: {table: set of (TeamNumber, GameNumber) written this run}"""
+    games = set().union(*touched.values())
+    if not games:
+        print("\nNo games changed since the last sync")
+        return
+    print(f"\nTOUCHED GAMES ({len(games)})")
+    for team in sorted({team for team, _ in games}):
+        numbers = sorted(game for game_team, game in games if game_team == team)
+        tables = sorted(table for table, keys in touched.items()
+                        if any(key[0] == team for key in keys))
+        print(f"  {team_names.get(team, f'Team {team}')}: "
+              f"game(s) {', '.join(map(str, numbers))} ({', '.join(tables)})")
+
+
 # ============================================================
 # SYNC FUNCTIONS
 # ============================================================
 
-def sync_batting_stats(conn, roster, team_names, player_names):
-    """Sync batting stats with preprocessing + sub aggregation"""
-    print("\n--- SYNCING BATTING STATS ---")
+# Upsert keys and the columns a re-sync may change
+BATTING_KEY = ['TeamNumber', 'GameNumber', 'PlayerNumber']
+BATTING_STAT_COLUMNS = ['PA', 'R', 'H', '2B', '3B', 'HR', 'OE', 'BB', 'RBI', 'SF']
+BATTING_UPDATE_COLUMNS = ['HomeTeam'] + BATTING_STAT_COLUMNS + ['G']
+PITCHING_KEY = ['TeamNumber', 'GameNumber', 'PlayerNumber']
+PITCHING_UPDATE_COLUMNS = ['HomeTeam', 'IP', 'BB', 'W', 'L', 'IBB']
 
-    temp_file = extract_table("data.csv", "BattingStats")
-    if not temp_file:
-        return 0, 0, 0
 
-    try:
-        df = pd.read_csv(temp_file)
-        print(f"Loaded {len(df)} batting records from CSV")
-
-        # Filter to W26 only
-        if SEASON_FILTER == 'W26' and 'TeamNumber' in df.columns:
-            before_count = len(df)
-            df = df[df['TeamNumber'].isin(W26_TEAM_NUMBERS)]
-            filtered_count = before_count - len(df)
-            if filtered_count > 0:
-                print(f"Filtered out {filtered_count} non-W26 records, keeping {len(df)} W26 records")
-
-        # PREPROCESSING: Remap PIDs
-        report = []
-        df = remap_pids(df, report)
-
-        # PREPROCESSING: Fix Roster flags (Roster→Sub for players not on team)
-        df = fix_roster_flags(df, roster, report)
-
-        # PREPROCESSING: Validate
-        validate_data(df, 'BattingStats', roster, team_names, player_names, report)
-
-        if report:
-            print("  Batting preprocessing:")
-            for line in report:
-                print(f"    {line}")
-
-        # Apply sub logic (redirect Sub entries to team Subs PID)
-        df = apply_subs_logic(df)
-
-        # Column fixes
-        df = df.rename(columns={'PersonNumber': 'PlayerNumber', 'D': '2B', 'T': '3B'})
-        df['G'] = 1
-
-        # Keep only needed columns
-        cols = ['TeamNumber', 'GameNumber', 'PlayerNumber', 'HomeTeam', 'PA', 'R', 'H',
-                '2B', '3B', 'HR', 'OE', 'BB', 'RBI', 'SF', 'G']
-        available_cols = [col for col in cols if col in df.columns]
-        df_clean = df[available_cols]
-
-        print(f"  Before aggregation: {len(df_clean)} records")
-
-        # Aggregate sub stats
-        numeric_cols_to_sum = ['PA', 'R', 'H', '2B', '3B', 'HR', 'OE', 'BB', 'RBI', 'SF']
-        available_numeric_to_sum = [col for col in numeric_cols_to_sum if col in df_clean.columns]
-
-        df_aggregated = df_clean.groupby(['TeamNumber', 'GameNumber', 'PlayerNumber']).agg({
-            'HomeTeam': 'first',
-            **{col: 'sum' for col in available_numeric_to_sum},
-            'G': lambda x: 1
-        }).reset_index()
-
-        print(f"  After aggregation: {len(df_aggregated)} unique player/game records")
-
-        # Sync with database
-        cursor = conn.cursor()
-        cursor.execute("DROP TABLE IF EXISTS temp_staging_batting")
-        df_aggregated.to_sql("temp_staging_batting", conn, index=False)
-
-        cursor.execute("""
-        SELECT COUNT(*) FROM temp_staging_batting s
-        LEFT JOIN batting_stats b ON s.TeamNumber = b.TeamNumber
-                                 AND s.GameNumber = b.GameNumber
-                                 AND s.PlayerNumber = b.PlayerNumber
-        WHERE b.TeamNumber IS NULL
-        """)
-        new_count = cursor.fetchone()[0]
-
-        # Subs PIDs — only update if incoming PA >= existing (DB aggregate may be more complete)
-        subs_pids = set(SUBS_MAPPING_W26.values())
-
-        # Fetch all changed rows with detail for the summary log
-        cursor.execute("""
-        SELECT s.TeamNumber, s.GameNumber, s.PlayerNumber,
-               b.PA, b.R, b.H, b.[2B], b.[3B], b.HR, b.OE, b.BB, b.RBI, b.SF,
-               s.PA, s.R, s.H, s.[2B], s.[3B], s.HR, s.OE, s.BB, s.RBI, s.SF
-        FROM temp_staging_batting s
-        JOIN batting_stats b ON s.TeamNumber = b.TeamNumber
-                            AND s.GameNumber = b.GameNumber
-                            AND s.PlayerNumber = b.PlayerNumber
-        WHERE s.HomeTeam != b.HomeTeam OR s.PA != b.PA OR s.R != b.R OR s.H != b.H
-           OR s.[2B] != b.[2B] OR s.[3B] != b.[3B] OR s.HR != b.HR OR s.OE != b.OE
-           OR s.BB != b.BB OR s.RBI != b.RBI OR s.SF != b.SF OR s.G != b.G
-        """)
-        changed_rows = cursor.fetchall()
-
-        # Split into allowed updates vs skipped (Subs PID with lower incoming PA)
-        allowed_changes = []
-        skipped_changes = []
-        for row in changed_rows:
+def stage_frame(conn, table, df):
+    """Load df into a TEMP staging table. (DataFrame.to_sql commits, which
+    would end the sync's transaction part-way through.)"""
+    def sql_type(dtype):
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(dtype):
+            return 'REAL'
+        return 'TEXT'
+
+    columns = ', '.join(f'[{col}] {sql_type(dtype)}' for col, dtype in df.dtypes.items())
+    conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+    conn.execute(f"CREATE TEMP TABLE {table} ({columns})")
+    values = df.astype(object).where(df.notna(), None)
+    conn.executemany(
+        f"INSERT INTO {table} VALUES ({', '.join('?' for _ in df.columns)})",
+        values.itertuples(index=False, name=None)
+    )
+
+
+def columns_differ(columns, new, old):
+    """SQL: does any column differ between two row aliases? IS NOT treats
+    NULL as a value, so NULL → 3 and 3 → NULL count as changes."""
+    return ' OR '.join(f'{new}.[{col}] IS NOT {old}.[{col}]' for col in columns)
+
+
+def subs_pa_guard(new, old, subs_pids):
+    """SQL: true when a Subs PID row would be replaced by one with fewer PA"""
+    is_subs_pid = _in_list(f'{old}.PlayerNumber', set(subs_pids.values()))
+    return f"({is_subs_pid} AND IFNULL({new}.PA, 0) < IFNULL({old}.PA, 0))"
+
+
+def sync_batting_stats(conn, df, season, roster, team_names, player_names):
+    """Sync one season's batting stats with preprocessing + sub aggregation.
+    Returns (new, changed, unchanged, touched (TeamNumber, GameNumber) set)."""
+    print(f"\n--- SYNCING {season['code']} BATTING STATS ---")
+
+    if df is None:
+        print("Table BattingStats not found")
+        return 0, 0, 0, set()
+
+    print(f"Loaded {len(df)} batting records from CSV")
+
+    # Only this season's teams
+    df = season_rows(df, season, 'batting')
+
+    # PREPROCESSING: Remap PIDs
+    report = []
+    df = remap_pids(df, report, season['subs_pids'], roster)
+
+    # PREPROCESSING: Fix Roster flags (Roster→Sub for players not on team)
+    df = fix_roster_flags(df, roster, report, FORCE_ROSTER.get(season['code'], {}))
+
+    # PREPROCESSING: Validate
+    validate_data(df, 'BattingStats', roster, team_names, player_names, report)
+
+    if report:
+        print("  Batting preprocessing:")
+        for line in report:
+            print(f"    {line}")
+
+    # Apply sub logic (redirect Sub entries to team Subs PID)
+    df = apply_subs_logic(df, season['subs_pids'])
+
+    # Column fixes
+    df = df.rename(columns={'PersonNumber': 'PlayerNumber', 'D': '2B', 'T': '3B'})
+    df['G'] = 1
+
+    # Keep only needed columns
+    cols = ['TeamNumber', 'GameNumber', 'PlayerNumber', 'HomeTeam', 'PA', 'R', 'H',
+            '2B', '3B', 'HR', 'OE', 'BB', 'RBI', 'SF', 'G']
+    available_cols = [col for col in cols if col in df.columns]
+    df_clean = df[available_cols]
+
+    print(f"  Before aggregation: {len(df_clean)} records")
+
+    # Aggregate sub stats
+    numeric_cols_to_sum = ['PA', 'R', 'H', '2B', '3B', 'HR', 'OE', 'BB', 'RBI', 'SF']
+    available_numeric_to_sum = [col for col in numeric_cols_to_sum if col in df_clean.columns]
+
+    df_aggregated = df_clean.groupby(['TeamNumber', 'GameNumber', 'PlayerNumber']).agg({
+        'HomeTeam': 'first',
+        **{col: 'sum' for col in available_numeric_to_sum},
+        'G': lambda x: 1
+    }).reset_index()
+
+    print(f"  After aggregation: {len(df_aggregated)} unique player/game records")
+
+    # Only games whose rows changed since the last sync are staged and diffed
+    df_stage, stage_hashes = filter_stale_blocks(conn, 'batting_stats', df_aggregated, 'Batting')
+
+    # Sync with database (one upsert; the whole sync is one transaction)
+    cursor = conn.cursor()
+    stage_frame(conn, "temp_staging_batting", df_stage)
+
+    cursor.execute("""
+    SELECT s.TeamNumber, s.GameNumber FROM temp_staging_batting s
+    LEFT JOIN batting_stats b ON s.TeamNumber = b.TeamNumber
+                             AND s.GameNumber = b.GameNumber
+                             AND s.PlayerNumber = b.PlayerNumber
+    WHERE b.TeamNumber IS NULL
+    """)
+    new_rows = cursor.fetchall()
+    new_count = len(new_rows)
+
+    # Fetch all changed rows with detail for the summary log, flagged when the
+    # Subs guard will skip them (Subs PIDs only update if incoming PA >= existing;
+    # the DB aggregate may be more complete)
+    cursor.execute(f"""
+    SELECT s.TeamNumber, s.GameNumber, s.PlayerNumber,
+           {', '.join(f'b.[{col}]' for col in BATTING_STAT_COLUMNS)},
+           {', '.join(f's.[{col}]' for col in BATTING_STAT_COLUMNS)},
+           {subs_pa_guard('s', 'b', season['subs_pids'])}
+    FROM temp_staging_batting s
+    JOIN batting_stats b ON s.TeamNumber = b.TeamNumber
+                        AND s.GameNumber = b.GameNumber
+                        AND s.PlayerNumber = b.PlayerNumber
+    WHERE {columns_differ(BATTING_UPDATE_COLUMNS, 's', 'b')}
+    """)
+    changed_rows = cursor.fetchall()
+
+    # Split into allowed updates vs skipped (Subs PID with lower incoming PA)
+    allowed_changes = [row for row in changed_rows if not row[23]]
+    skipped_changes = [row for row in changed_rows if row[23]]
+
+    changed_count = len(allowed_changes)
+    skipped_count = len(skipped_changes)
+
+    column_list = ', '.join(f'[{col}]' for col in BATTING_KEY + BATTING_UPDATE_COLUMNS)
+    cursor.execute(f"""
+    INSERT INTO batting_stats ({column_list})
+    SELECT {column_list} FROM temp_staging_batting WHERE true
+    ON CONFLICT (TeamNumber, GameNumber, PlayerNumber) DO UPDATE
+    SET {', '.join(f'[{col}] = excluded.[{col}]' for col in BATTING_UPDATE_COLUMNS)}
+    WHERE ({columns_differ(BATTING_UPDATE_COLUMNS, 'excluded', 'batting_stats')})
+      AND NOT ({subs_pa_guard('excluded', 'batting_stats', season['subs_pids'])})
+    """)
+
+    cursor.execute("DROP TABLE temp_staging_batting")
+    record_block_hashes(conn, 'batting_stats', stage_hashes)
+    touched = {(row[0], row[1]) for row in new_rows + allowed_changes}
+    unchanged_count = len(df_aggregated) - new_count - changed_count - skipped_count
+
+    # Detailed change summary
+    stat_cols = BATTING_STAT_COLUMNS
+    if allowed_changes:
+        print(f"\n  --- BATTING CHANGES APPLIED ---")
+        for row in allowed_changes:
             team, game, pid = row[0], row[1], row[2]
-            db_pa, s_pa = row[3], row[13]
-            if pid in subs_pids and s_pa < db_pa:
-                skipped_changes.append(row)
-            else:
-                allowed_changes.append(row)
-
-        changed_count = len(allowed_changes)
-        skipped_count = len(skipped_changes)
-
-        if new_count > 0:
-            cursor.execute("""
-            INSERT INTO batting_stats (TeamNumber, GameNumber, PlayerNumber, HomeTeam, PA, R, H,
-                                       [2B], [3B], HR, OE, BB, RBI, SF, G)
-            SELECT TeamNumber, GameNumber, PlayerNumber, HomeTeam, PA, R, H,
-                   [2B], [3B], HR, OE, BB, RBI, SF, G
-            FROM temp_staging_batting s
-            WHERE NOT EXISTS (
-                SELECT 1 FROM batting_stats b
-                WHERE s.TeamNumber = b.TeamNumber
-                AND s.GameNumber = b.GameNumber
-                AND s.PlayerNumber = b.PlayerNumber
-            )
-            """)
-
-        if changed_count > 0:
-            # Only update rows that passed the guard
-            allowed_keys = [(r[0], r[1], r[2]) for r in allowed_changes]
-            for team, game, pid in allowed_keys:
-                cursor.execute("""
-                UPDATE batting_stats
-                SET HomeTeam = s.HomeTeam, PA = s.PA, R = s.R, H = s.H, [2B] = s.[2B],
-                    [3B] = s.[3B], HR = s.HR, OE = s.OE, BB = s.BB, RBI = s.RBI, SF = s.SF, G = s.G
-                FROM temp_staging_batting s
-                WHERE batting_stats.TeamNumber = s.TeamNumber
-                AND batting_stats.GameNumber = s.GameNumber
-                AND batting_stats.PlayerNumber = s.PlayerNumber
-                AND batting_stats.TeamNumber = ? AND batting_stats.GameNumber = ?
-                AND batting_stats.PlayerNumber = ?
-                """, (team, game, pid))
-
-        cursor.execute("DROP TABLE temp_staging_batting")
-        unchanged_count = len(df_aggregated) - new_count - changed_count - skipped_count
-
-        # Detailed change summary
-        stat_cols = ['PA','R','H','2B','3B','HR','OE','BB','RBI','SF']
-        if allowed_changes:
-            print(f"\n  --- BATTING CHANGES APPLIED ---")
-            for row in allowed_changes:
-                team, game, pid = row[0], row[1], row[2]
-                db_vals = dict(zip(stat_cols, row[3:13]))
-                sv_vals = dict(zip(stat_cols, row[13:23]))
-                diffs = {k: (db_vals[k], sv_vals[k]) for k in stat_cols if db_vals[k] != sv_vals[k]}
-                pname = player_names.get(int(pid), f'PID {pid}')
-                tname = team_names.get(int(team), f'Team {team}')
-                print(f"    {pname} | {tname} Game {game}")
-                for stat, (old, new) in diffs.items():
-                    print(f"      {stat}: {old} → {new}")
-
-        if skipped_changes:
-            print(f"\n  --- BATTING UPDATES SKIPPED (Subs PID, DB has more complete data) ---")
-            for row in skipped_changes:
-                team, game, pid = row[0], row[1], row[2]
-                tname = team_names.get(int(team), f'Team {team}')
-                print(f"    Team {tname} Game {game} Subs PID {pid}: "
-                      f"DB PA={row[3]} kept over CSV PA={row[13]}")
-
-        print(f"\n  Batting: {new_count} new, {changed_count} changed, "
-              f"{skipped_count} skipped (Subs guard), {unchanged_count} unchanged")
-        return new_count, changed_count, unchanged_count
+            db_vals = dict(zip(stat_cols, row[3:13]))
+            sv_vals = dict(zip(stat_cols, row[13:23]))
+            diffs = {k: (db_vals[k], sv_vals[k]) for k in stat_cols if db_vals[k] != sv_vals[k]}
+            pname = player_names.get(int(pid), f'PID {pid}')
+            tname = team_names.get(int(team), f'Team {team}')
+            print(f"    {pname} | {tname} Game {game}")
+            for stat, (old, new) in diffs.items():
+                print(f"      {stat}: {old} → {new}")
 
-    finally:
-        os.remove(temp_file)
+    if skipped_changes:
+        print(f"\n  --- BATTING UPDATES SKIPPED (Subs PID, DB has more complete data) ---")
+        for row in skipped_changes:
+            team, game, pid = row[0], row[1], row[2]
+            tname = team_names.get(int(team), f'Team {team}')
+            print(f"    Team {tname} Game {game} Subs PID {pid}: "
+                  f"DB PA={row[3]} kept over CSV PA={row[13]}")
 
+    print(f"\n  Batting: {new_count} new, {changed_count} changed, "
+          f"{skipped_count} skipped (Subs guard), {unchanged_count} unchanged")
+    return new_count, changed_count, unchanged_count, touched
 
-def sync_pitching_stats(conn, roster, team_names, player_names):
-    """Sync pitching stats with preprocessing + sub aggregation"""
-    print("\n--- SYNCING PITCHING STATS ---")
 
-    temp_file = extract_table("data.csv", "PitchingStats")
-    if not temp_file:
-        return 0, 0, 0
 
-    try:
-        df = pd.read_csv(temp_file)
-        print(f"Loaded {len(df)} pitching records from CSV")
-
-        # Filter to W26 only
-        if SEASON_FILTER == 'W26' and 'TeamNumber' in df.columns:
-            before_count = len(df)
-            df = df[df['TeamNumber'].isin(W26_TEAM_NUMBERS)]
-            filtered_count = before_count - len(df)
-            if filtered_count > 0:
-                print(f"Filtered out {filtered_count} non-W26 records, keeping {len(df)} W26 records")
-
-        # PREPROCESSING: Remap PIDs
-        report = []
-        df = remap_pids(df, report)
-
-        # PREPROCESSING: Fix pitching sub flags using actual roster data
-        fix_pitching_subs(df, roster, report)
-
-        # PREPROCESSING: Validate
-        validate_data(df, 'PitchingStats', roster, team_names, player_names, report)
-
-        if report:
-            print("  Pitching preprocessing:")
-            for line in report:
-                print(f"    {line}")
-
-        # Apply sub logic (redirect Sub entries to team Subs PID)
-        df = apply_subs_logic(df)
-
-        # Column fixes
-        df = df.rename(columns={'PersonNumber': 'PlayerNumber'})
-
-        # Keep only needed columns
-        cols = ['TeamNumber', 'GameNumber', 'PlayerNumber', 'HomeTeam', 'IP', 'BB', 'W', 'L', 'IBB']
-        available_cols = [col for col in cols if col in df.columns]
-        df_clean = df[available_cols]
-
-        if df_clean.empty:
-            print("No valid pitching data found")
-            return 0, 0, 0
-
-        # Aggregate pitching stats
-        numeric_cols_to_sum = ['IP', 'BB', 'W', 'L', 'IBB']
-        available_numeric_to_sum = [col for col in numeric_cols_to_sum if col in df_clean.columns]
-
-        df_aggregated = df_clean.groupby(['TeamNumber', 'GameNumber', 'PlayerNumber']).agg({
-            'HomeTeam': 'first',
-            **{col: 'sum' for col in available_numeric_to_sum}
-        }).reset_index()
-
-        print(f"  Pitching aggregated from {len(df_clean)} to {len(df_aggregated)} records")
-
-        # Sync with database
-        cursor = conn.cursor()
-        cursor.execute("DROP TABLE IF EXISTS temp_staging_pitching")
-        df_aggregated.to_sql("temp_staging_pitching", conn, index=False)
-
-        cursor.execute("""
-        SELECT COUNT(*) FROM temp_staging_pitching s
-        LEFT JOIN pitching_stats p ON s.TeamNumber = p.TeamNumber
-                                   AND s.GameNumber = p.GameNumber
-                                   AND s.PlayerNumber = p.PlayerNumber
-        WHERE p.TeamNumber IS NULL
-        """)
-        new_count = cursor.fetchone()[0]
-
-        # Fetch all changed rows with detail for the summary log
-        cursor.execute("""
-        SELECT s.TeamNumber, s.GameNumber, s.PlayerNumber,
-               p.IP, p.BB, p.W, p.L, p.IBB,
-               s.IP, s.BB, s.W, s.L, s.IBB
-        FROM temp_staging_pitching s
-        JOIN pitching_stats p ON s.TeamNumber = p.TeamNumber
-                             AND s.GameNumber = p.GameNumber
-                             AND s.PlayerNumber = p.PlayerNumber
-        WHERE s.IP != p.IP OR s.BB != p.BB OR s.W != p.W OR s.L != p.L
-        """)
-        changed_rows = cursor.fetchall()
-        changed_count = len(changed_rows)
-
-        # Pitching Subs guard: don't insert a Subs PID row if a rostered
-        # pitcher already exists for that team/game
-        subs_pids_list = ','.join(str(p) for p in SUBS_MAPPING_W26.values())
-
-        if new_count > 0:
-            cursor.execute("""
-            INSERT INTO pitching_stats (TeamNumber, GameNumber, PlayerNumber, HomeTeam, IP, BB, W, L, IBB)
-            SELECT TeamNumber, GameNumber, PlayerNumber, HomeTeam, IP, BB, W, L, IBB
-            FROM temp_staging_pitching s
-            WHERE NOT EXISTS (
-                SELECT 1 FROM pitching_stats p
-                WHERE s.TeamNumber = p.TeamNumber
-                AND s.GameNumber = p.GameNumber
-                AND s.PlayerNumber = p.PlayerNumber
-            )
-            """)
-            # Remove Subs PID rows just inserted only when the CSV had NO rostered
-            # pitcher for that game — i.e. the Subs row is the only CSV entry.
-            # If the CSV legitimately has both a rostered pitcher AND a sub pitcher,
-            # keep both rows (e.g. two-pitcher games where sub finished).
-            cursor.execute(f"""
-            DELETE FROM pitching_stats
-            WHERE PlayerNumber IN ({subs_pids_list})
-            AND TeamNumber BETWEEN 538 AND 551
-            AND EXISTS (
-                SELECT 1 FROM temp_staging_pitching s
-                WHERE s.TeamNumber = pitching_stats.TeamNumber
-                AND s.GameNumber = pitching_stats.GameNumber
-                AND s.PlayerNumber = pitching_stats.PlayerNumber
-            )
-            AND EXISTS (
-                SELECT 1 FROM pitching_stats p2
-                WHERE p2.TeamNumber = pitching_stats.TeamNumber
-                AND p2.GameNumber = pitching_stats.GameNumber
-                AND p2.PlayerNumber NOT IN ({subs_pids_list})
-            )
-            AND NOT EXISTS (
-                SELECT 1 FROM temp_staging_pitching s2
-                WHERE s2.TeamNumber = pitching_stats.TeamNumber
-                AND s2.GameNumber = pitching_stats.GameNumber
-                AND s2.PlayerNumber NOT IN ({subs_pids_list})
-            )
-            """)
-            suppressed_count = cursor.rowcount
-            if suppressed_count > 0:
-                new_count = max(0, new_count - suppressed_count)
-                print(f"\n  --- PITCHING SUBS INSERTS BLOCKED (rostered pitcher exists) ---")
-                print(f"    {suppressed_count} duplicate Subs row(s) suppressed")
-
-        if changed_count > 0:
-            cursor.execute("""
-            UPDATE pitching_stats
-            SET HomeTeam = s.HomeTeam, IP = s.IP, BB = s.BB, W = s.W, L = s.L, IBB = s.IBB
-            FROM temp_staging_pitching s
-            WHERE pitching_stats.TeamNumber = s.TeamNumber
-            AND pitching_stats.GameNumber = s.GameNumber
-            AND pitching_stats.PlayerNumber = s.PlayerNumber
-            """)
-
-        cursor.execute("DROP TABLE temp_staging_pitching")
-        unchanged_count = len(df_aggregated) - new_count - changed_count
-
-        # Detailed change summary
-        if changed_rows:
-            stat_cols = ['IP','BB','W','L','IBB']
-            print(f"\n  --- PITCHING CHANGES APPLIED ---")
-            for row in changed_rows:
-                team, game, pid = row[0], row[1], row[2]
-                db_vals = dict(zip(stat_cols, row[3:8]))
-                sv_vals = dict(zip(stat_cols, row[8:13]))
-                diffs = {k: (db_vals[k], sv_vals[k]) for k in stat_cols if db_vals[k] != sv_vals[k]}
-                pname = player_names.get(int(pid), f'PID {pid}')
-                tname = team_names.get(int(team), f'Team {team}')
-                print(f"    {pname} | {tname} Game {game}")
-                for stat, (old, new) in diffs.items():
-                    print(f"      {stat}: {old} → {new}")
-
-        print(f"\n  Pitching: {new_count} new, {changed_count} changed, {unchanged_count} unchanged")
-        return new_count, changed_count, unchanged_count
+def sync_pitching_stats(conn, df, season, roster, team_names, player_names):
+    """Sync one season's pitching stats with preprocessing + sub aggregation.
+    Returns (new, changed, unchanged, touched (TeamNumber, GameNumber) set)."""
+    print(f"\n--- SYNCING {season['code']} PITCHING STATS ---")
 
-    finally:
-        os.remove(temp_file)
+    if df is None:
+        print("Table PitchingStats not found")
+        return 0, 0, 0, set()
 
+    print(f"Loaded {len(df)} pitching records from CSV")
 
-def sync_game_stats(conn):
-    """Sync game stats with missing fields populated"""
-    print("\n--- SYNCING GAME STATS ---")
+    # Only this season's teams
+    df = season_rows(df, season, 'pitching')
 
-    temp_file = extract_table("data.csv", "GameStats")
-    if not temp_file:
-        return 0, 0, 0
+    # PREPROCESSING: Remap PIDs
+    report = []
+    df = remap_pids(df, report, season['subs_pids'], roster)
 
-    try:
-        df = pd.read_csv(temp_file)
-        print(f"Loaded {len(df)} game records from CSV")
-
-        # Filter to W26 only
-        if SEASON_FILTER == 'W26' and 'TeamNumber' in df.columns:
-            before_count = len(df)
-            df = df[df['TeamNumber'].isin(W26_TEAM_NUMBERS)]
-            filtered_count = before_count - len(df)
-            if filtered_count > 0:
-                print(f"Filtered out {filtered_count} non-W26 records, keeping {len(df)} W26 records")
-
-        # Map CSV columns to database columns
-        column_mapping = {
-            'GameDate': 'Date',
-            'INN1': 'RunsInning1', 'INN2': 'RunsInning2', 'INN3': 'RunsInning3',
-            'INN4': 'RunsInning4', 'INN5': 'RunsInning5', 'INN6': 'RunsInning6',
-            'INN7': 'RunsInning7', 'INN8': 'RunsInning8', 'INN9': 'RunsInning9'
-        }
-        df = df.rename(columns=column_mapping)
-
-        # Convert date format from M/D/YYYY to YYYY-MM-DD
-        if 'Date' in df.columns:
-            def fix_date_format(date_str):
-                try:
-                    date_part = str(date_str).split()[0]
-                    month, day, year = date_part.split('/')
-                    return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-                except:
-                    return date_str
-
-            df['Date'] = df['Date'].apply(fix_date_format)
-            print(f"  Sample converted dates: {df['Date'].head(3).tolist()}")
-
-        # Add OpponentTeamNumber
-        if 'Opponent' in df.columns:
-            df['OpponentTeamNumber'] = df['Opponent'].map(TEAM_MAPPING_W26)
-            unmapped = df[df['OpponentTeamNumber'].isna()]['Opponent'].unique()
-            if len(unmapped) > 0:
-                print(f"  WARNING: Unmapped opponents: {unmapped}")
-
-        # Keep only the columns we need
-        base_cols = ['TeamNumber', 'GameNumber', 'Date', 'Innings', 'HomeTeam',
-                     'Opponent', 'OpponentTeamNumber', 'Runs', 'OppRuns']
-        inning_cols = ['RunsInning1', 'RunsInning2', 'RunsInning3', 'RunsInning4',
-                       'RunsInning5', 'RunsInning6', 'RunsInning7', 'RunsInning8',
-                       'RunsInning9']
-
-        all_possible_cols = base_cols + inning_cols
-        available_cols = [col for col in all_possible_cols if col in df.columns]
-        df_clean = df[available_cols]
-
-        if df_clean.empty:
-            print("No valid game data found")
-            return 0, 0, 0
-
-        # Get current max GStatNumber
-        cursor = conn.cursor()
-        cursor.execute("SELECT COALESCE(MAX(GStatNumber), 0) FROM game_stats")
-        max_gstat = cursor.fetchone()[0]
-
-        # Add sequential GStatNumbers
-        df_clean = df_clean.copy()
-        df_clean['GStatNumber'] = range(max_gstat + 1, max_gstat + 1 + len(df_clean))
-        available_cols = ['GStatNumber'] + available_cols
-
-        # Add missing columns to database if needed
-        cursor.execute("PRAGMA table_info(game_stats)")
-        existing_columns = [row[1] for row in cursor.fetchall()]
-
-        needed_columns = [
-            ('GStatNumber', 'INTEGER'),
-            ('OpponentTeamNumber', 'INTEGER'),
-            ('OpponentGStatNumber', 'INTEGER'),
-        ] + [(f'OppRunsInning{i}', 'INTEGER DEFAULT 0') for i in range(1, 10)]
-
-        for col_name, col_def in needed_columns:
-            if col_name not in existing_columns:
-                print(f"  Adding missing column: {col_name}")
-                cursor.execute(f"ALTER TABLE game_stats ADD COLUMN {col_name} {col_def}")
-
-        # Sync with database
-        cursor.execute("DROP TABLE IF EXISTS temp_staging_game")
-        df_clean.to_sql("temp_staging_game", conn, index=False)
-
-        cursor.execute("""
-        SELECT COUNT(*) FROM temp_staging_game s
-        LEFT JOIN game_stats g ON s.TeamNumber = g.TeamNumber
-                              AND s.GameNumber = g.GameNumber
-        WHERE g.TeamNumber IS NULL
-        """)
-        new_count = cursor.fetchone()[0]
-
-        # Fetch changed rows with detail
-        cursor.execute("""
-        SELECT s.TeamNumber, s.GameNumber, s.Opponent,
-               g.Runs, g.OppRuns, g.Innings,
-               s.Runs, s.OppRuns, s.Innings
-        FROM temp_staging_game s
-        JOIN game_stats g ON s.TeamNumber = g.TeamNumber
-                         AND s.GameNumber = g.GameNumber
-        WHERE s.Runs != g.Runs OR s.OppRuns != g.OppRuns OR s.Innings != g.Innings
-        """)
-        changed_rows = cursor.fetchall()
-        changed_count = len(changed_rows)
-
-        if new_count > 0:
-            col_list = ', '.join(available_cols)
-            cursor.execute(f"""
-            INSERT INTO game_stats ({col_list})
-            SELECT {col_list}
-            FROM temp_staging_game s
-            WHERE NOT EXISTS (
-                SELECT 1 FROM game_stats g
-                WHERE s.TeamNumber = g.TeamNumber
-                AND s.GameNumber = g.GameNumber
-            )
-            """)
-
-        if changed_count > 0:
-            set_clauses = [f"{col} = s.{col}" for col in available_cols
-                           if col not in ['TeamNumber', 'GameNumber']]
-            cursor.execute(f"""
-            UPDATE game_stats
-            SET {', '.join(set_clauses)}
-            FROM temp_staging_game s
-            WHERE game_stats.TeamNumber = s.TeamNumber
-            AND game_stats.GameNumber = s.GameNumber
-            """)
-
-        cursor.execute("DROP TABLE temp_staging_game")
-
-        # Detailed change summary
-        if changed_rows:
-            print(f"\n  --- GAME STATS CHANGES APPLIED ---")
-            for row in changed_rows:
-                team, game, opp = row[0], row[1], row[2]
-                tname = team_names.get(int(team), f'Team {team}')
-                diffs = []
-                if row[3] != row[6]: diffs.append(f"Runs: {row[3]} → {row[6]}")
-                if row[4] != row[7]: diffs.append(f"OppRuns: {row[4]} → {row[7]}")
-                if row[5] != row[8]: diffs.append(f"Innings: {row[5]} → {row[8]}")
-                print(f"    {tname} Game {game} vs {opp}: {', '.join(diffs)}")
-
-        # Link opponent data
-        print("  Linking opponent data...")
-        cursor.execute("""
+    # PREPROCESSING: Fix pitching sub flags using actual roster data
+    df = fix_pitching_subs(df, roster, report)
+
+    # PREPROCESSING: Validate
+    validate_data(df, 'PitchingStats', roster, team_names, player_names, report)
+
+    if report:
+        print("  Pitching preprocessing:")
+        for line in report:
+            print(f"    {line}")
+
+    # Apply sub logic (redirect Sub entries to team Subs PID)
+    df = apply_subs_logic(df, season['subs_pids'])
+
+    # Column fixes
+    df = df.rename(columns={'PersonNumber': 'PlayerNumber'})
+
+    # Keep only needed columns
+    cols = ['TeamNumber', 'GameNumber', 'PlayerNumber', 'HomeTeam', 'IP', 'BB', 'W', 'L', 'IBB']
+    available_cols = [col for col in cols if col in df.columns]
+    df_clean = df[available_cols]
+
+    if df_clean.empty:
+        print("No valid pitching data found")
+        return 0, 0, 0, set()
+
+    # Aggregate pitching stats
+    numeric_cols_to_sum = ['IP', 'BB', 'W', 'L', 'IBB']
+    available_numeric_to_sum = [col for col in numeric_cols_to_sum if col in df_clean.columns]
+
+    df_aggregated = df_clean.groupby(['TeamNumber', 'GameNumber', 'PlayerNumber']).agg({
+        'HomeTeam': 'first',
+        **{col: 'sum' for col in available_numeric_to_sum}
+    }).reset_index()
+
+    print(f"  Pitching aggregated from {len(df_clean)} to {len(df_aggregated)} records")
+
+    # Only games whose rows changed since the last sync are staged and diffed
+    df_stage, stage_hashes = filter_stale_blocks(conn, 'pitching_stats', df_aggregated, 'Pitching')
+
+    # Sync with database (one upsert; the whole sync is one transaction)
+    cursor = conn.cursor()
+    stage_frame(conn, "temp_staging_pitching", df_stage)
+
+    cursor.execute("""
+    SELECT s.TeamNumber, s.GameNumber, s.PlayerNumber FROM temp_staging_pitching s
+    LEFT JOIN pitching_stats p ON s.TeamNumber = p.TeamNumber
+                               AND s.GameNumber = p.GameNumber
+                               AND s.PlayerNumber = p.PlayerNumber
+    WHERE p.TeamNumber IS NULL
+    """)
+    new_rows = cursor.fetchall()
+    new_count = len(new_rows)
+
+    # Fetch all changed rows with detail for the summary log
+    cursor.execute(f"""
+    SELECT s.TeamNumber, s.GameNumber, s.PlayerNumber,
+           p.IP, p.BB, p.W, p.L, p.IBB,
+           s.IP, s.BB, s.W, s.L, s.IBB
+    FROM temp_staging_pitching s
+    JOIN pitching_stats p ON s.TeamNumber = p.TeamNumber
+                         AND s.GameNumber = p.GameNumber
+                         AND s.PlayerNumber = p.PlayerNumber
+    WHERE {columns_differ(PITCHING_UPDATE_COLUMNS, 's', 'p')}
+    """)
+    changed_rows = cursor.fetchall()
+    changed_count = len(changed_rows)
+
+    # Pitching Subs guard: don't insert a Subs PID row if a rostered pitcher
+    # already exists for that team/game and the CSV has NO rostered pitcher
+    # for it (the Subs row is the only CSV entry). If the CSV legitimately has
+    # both a rostered pitcher AND a sub pitcher, both rows go in (e.g.
+    # two-pitcher games where a sub finished).
+    subs_pids_list = ','.join(str(p) for p in sorted(set(season['subs_pids'].values())))
+    blocked_subs = f"""
+        s.PlayerNumber IN ({subs_pids_list})
+        AND {_in_list('s.TeamNumber', season['teams'])}
+        AND NOT EXISTS (
+            SELECT 1 FROM pitching_stats p
+            WHERE p.TeamNumber = s.TeamNumber
+            AND p.GameNumber = s.GameNumber
+            AND p.PlayerNumber = s.PlayerNumber
+        )
+        AND EXISTS (
+            SELECT 1 FROM pitching_stats p2
+            WHERE p2.TeamNumber = s.TeamNumber
+            AND p2.GameNumber = s.GameNumber
+            AND p2.PlayerNumber NOT IN ({subs_pids_list})
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM temp_staging_pitching s2
+            WHERE s2.TeamNumber = s.TeamNumber
+            AND s2.GameNumber = s.GameNumber
+            AND s2.PlayerNumber NOT IN ({subs_pids_list})
+        )
+    """
+    cursor.execute(f"""
+    SELECT s.TeamNumber, s.GameNumber, s.PlayerNumber FROM temp_staging_pitching s
+    WHERE {blocked_subs}
+    """)
+    blocked_rows = cursor.fetchall()
+    suppressed_count = len(blocked_rows)
+
+    column_list = ', '.join(PITCHING_KEY + PITCHING_UPDATE_COLUMNS)
+    cursor.execute(f"""
+    INSERT INTO pitching_stats ({column_list})
+    SELECT {column_list} FROM temp_staging_pitching s WHERE NOT ({blocked_subs})
+    ON CONFLICT (TeamNumber, GameNumber, PlayerNumber) DO UPDATE
+    SET {', '.join(f'{col} = excluded.{col}' for col in PITCHING_UPDATE_COLUMNS)}
+    WHERE {columns_differ(PITCHING_UPDATE_COLUMNS, 'excluded', 'pitching_stats')}
+    """)
+
+    if suppressed_count > 0:
+        new_count = max(0, new_count - suppressed_count)
+        print(f"\n  --- PITCHING SUBS INSERTS BLOCKED (rostered pitcher exists) ---")
+        print(f"    {suppressed_count} duplicate Subs row(s) suppressed")
+
+    cursor.execute("DROP TABLE temp_staging_pitching")
+    record_block_hashes(conn, 'pitching_stats', stage_hashes)
+    inserted = set(new_rows) - set(blocked_rows)
+    touched = {(row[0], row[1]) for row in list(inserted) + changed_rows}
+    unchanged_count = len(df_aggregated) - new_count - changed_count
+
+    # Detailed change summary
+    if changed_rows:
+        stat_cols = ['IP','BB','W','L','IBB']
+        print(f"\n  --- PITCHING CHANGES APPLIED ---")
+        for row in changed_rows:
+            team, game, pid = row[0], row[1], row[2]
+            db_vals = dict(zip(stat_cols, row[3:8]))
+            sv_vals = dict(zip(stat_cols, row[8:13]))
+            diffs = {k: (db_vals[k], sv_vals[k]) for k in stat_cols if db_vals[k] != sv_vals[k]}
+            pname = player_names.get(int(pid), f'PID {pid}')
+            tname = team_names.get(int(team), f'Team {team}')
+            print(f"    {pname} | {tname} Game {game}")
+            for stat, (old, new) in diffs.items():
+                print(f"      {stat}: {old} → {new}")
+
+    print(f"\n  Pitching: {new_count} new, {changed_count} changed, {unchanged_count} unchanged")
+    return new_count, changed_count, unchanged_count, touched
+
+
+
+def sync_game_stats(conn, df, season, team_names):
+    """Sync one season's game stats with missing fields populated.
+    Returns (new, changed, unchanged, touched (TeamNumber, GameNumber) set)."""
+    print(f"\n--- SYNCING {season['code']} GAME STATS ---")
+
+    if df is None:
+        print("Table GameStats not found")
+        return 0, 0, 0, set()
+
+    print(f"Loaded {len(df)} game records from CSV")
+
+    # Only this season's teams
+    df = season_rows(df, season, 'game')
+
+    # Map CSV columns to database columns
+    column_mapping = {
+        'GameDate': 'Date',
+        'INN1': 'RunsInning1', 'INN2': 'RunsInning2', 'INN3': 'RunsInning3',
+        'INN4': 'RunsInning4', 'INN5': 'RunsInning5', 'INN6': 'RunsInning6',
+        'INN7': 'RunsInning7', 'INN8': 'RunsInning8', 'INN9': 'RunsInning9'
+    }
+    df = df.rename(columns=column_mapping)
+
+    # Convert date format from M/D/YYYY to YYYY-MM-DD (game_date is the
+    # indexed sort key; Date keeps the raw value if it can't be parsed)
+    if 'Date' in df.columns:
+        df['game_date'] = df['Date'].apply(normalize_game_date)
+        df['Date'] = df['game_date'].fillna(df['Date'])
+        print(f"  Sample converted dates: {df['Date'].head(3).tolist()}")
+
+    # Add OpponentTeamNumber (opponents are always in the same season)
+    if 'Opponent' in df.columns:
+        df['OpponentTeamNumber'] = df['Opponent'].map(season['opponents'])
+        unmapped = df[df['OpponentTeamNumber'].isna()]['Opponent'].unique()
+        if len(unmapped) > 0:
+            print(f"  WARNING: Unmapped opponents: {unmapped}")
+
+    # Keep only the columns we need
+    base_cols = ['TeamNumber', 'GameNumber', 'Date', 'game_date', 'Innings', 'HomeTeam',
+                 'Opponent', 'OpponentTeamNumber', 'Runs', 'OppRuns']
+    inning_cols = ['RunsInning1', 'RunsInning2', 'RunsInning3', 'RunsInning4',
+                   'RunsInning5', 'RunsInning6', 'RunsInning7', 'RunsInning8',
+                   'RunsInning9']
+
+    all_possible_cols = base_cols + inning_cols
+    available_cols = [col for col in all_possible_cols if col in df.columns]
+    df_clean = df[available_cols]
+
+    if df_clean.empty:
+        print("No valid game data found")
+        return 0, 0, 0, set()
+
+    # Only games whose rows changed since the last sync are staged and diffed
+    df_stage, stage_hashes = filter_stale_blocks(conn, 'game_stats', df_clean, 'Game Stats')
+
+    # Get current max GStatNumber
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(GStatNumber), 0) FROM game_stats")
+    max_gstat = cursor.fetchone()[0]
+
+    # Add sequential GStatNumbers
+    df_stage = df_stage.copy()
+    df_stage['GStatNumber'] = range(max_gstat + 1, max_gstat + 1 + len(df_stage))
+    available_cols = ['GStatNumber'] + available_cols
+
+    # Add missing columns to database if needed
+    cursor.execute("PRAGMA table_info(game_stats)")
+    existing_columns = [row[1] for row in cursor.fetchall()]
+
+    needed_columns = [
+        ('GStatNumber', 'INTEGER'),
+        ('OpponentTeamNumber', 'INTEGER'),
+        ('OpponentGStatNumber', 'INTEGER'),
+    ] + [(f'OppRunsInning{i}', 'INTEGER DEFAULT 0') for i in range(1, 10)]
+
+    for col_name, col_def in needed_columns:
+        if col_name not in existing_columns:
+            print(f"  Adding missing column: {col_name}")
+            cursor.execute(f"ALTER TABLE game_stats ADD COLUMN {col_name} {col_def}")
+
+    # Sync with database (one upsert; the whole sync is one transaction).
+    # Existing games keep their GStatNumber so opponent links stay valid;
+    # the staged numbers are only used by new rows.
+    stage_frame(conn, "temp_staging_game", df_stage[available_cols])
+
+    cursor.execute("""
+    SELECT s.TeamNumber, s.GameNumber FROM temp_staging_game s
+    LEFT JOIN game_stats g ON s.TeamNumber = g.TeamNumber
+                          AND s.GameNumber = g.GameNumber
+    WHERE g.TeamNumber IS NULL
+    """)
+    new_rows = cursor.fetchall()
+    new_count = len(new_rows)
+
+    update_cols = [col for col in available_cols if col not in ['GStatNumber', 'TeamNumber', 'GameNumber']]
+
+    # Fetch changed rows with detail
+    cursor.execute(f"""
+    SELECT s.TeamNumber, s.GameNumber, s.Opponent,
+           {', '.join(f'g.{col}' for col in update_cols)},
+           {', '.join(f's.{col}' for col in update_cols)}
+    FROM temp_staging_game s
+    JOIN game_stats g ON s.TeamNumber = g.TeamNumber
+                     AND s.GameNumber = g.GameNumber
+    WHERE {columns_differ(update_cols, 's', 'g')}
+    """)
+    changed_rows = cursor.fetchall()
+    changed_count = len(changed_rows)
+
+    col_list = ', '.join(available_cols)
+    cursor.execute(f"""
+    INSERT INTO game_stats ({col_list})
+    SELECT {col_list} FROM temp_staging_game WHERE true
+    ON CONFLICT (TeamNumber, GameNumber) DO UPDATE
+    SET {', '.join(f'{col} = excluded.{col}' for col in update_cols)}
+    WHERE {columns_differ(update_cols, 'excluded', 'game_stats')}
+    """)
+
+    cursor.execute("DROP TABLE temp_staging_game")
+    record_block_hashes(conn, 'game_stats', stage_hashes)
+    touched = {(row[0], row[1]) for row in new_rows + changed_rows}
+
+    # Rows whose Date came from elsewhere (hand edits, older syncs)
+    backfill_game_dates(conn)
+
+    # Detailed change summary
+    if changed_rows:
+        print(f"\n  --- GAME STATS CHANGES APPLIED ---")
+        for row in changed_rows:
+            team, game, opp = row[0], row[1], row[2]
+            tname = team_names.get(int(team), f'Team {team}')
+            db_vals = row[3:3 + len(update_cols)]
+            sv_vals = row[3 + len(update_cols):]
+            diffs = [f"{col}: {old} → {new}" for col, old, new in zip(update_cols, db_vals, sv_vals)
+                     if old != new]
+            print(f"    {tname} Game {game} vs {opp}: {', '.join(diffs)}")
+
+    # Link opponent data for the teams in touched games and their opponents
+    # (an opponent's OppRunsInning columns copy this side's innings)
+    print("  Linking opponent data...")
+    touched_games = rows_in_blocks(df_stage, touched)
+    link_teams = set(touched_games['TeamNumber'])
+    if 'OpponentTeamNumber' in touched_games.columns:
+        link_teams |= set(touched_games['OpponentTeamNumber'].dropna())
+    link_teams = sorted(int(team) for team in link_teams)
+    team_placeholders = ','.join('?' for _ in link_teams)
+    cursor.execute(f"""
+    UPDATE game_stats
+    SET OpponentGStatNumber = (
+        SELECT opp.GStatNumber
+        FROM game_stats opp
+        WHERE opp.TeamNumber = game_stats.OpponentTeamNumber
+        AND opp.GameNumber = game_stats.GameNumber
+    )
+    WHERE OpponentTeamNumber IS NOT NULL
+    AND TeamNumber IN ({team_placeholders})
+    """, link_teams)
+
+    for i in range(1, 10):
+        cursor.execute(f"""
         UPDATE game_stats
-        SET OpponentGStatNumber = (
-            SELECT opp.GStatNumber
+        SET OppRunsInning{i} = (
+            SELECT opp.RunsInning{i}
             FROM game_stats opp
-            WHERE opp.TeamNumber = game_stats.OpponentTeamNumber
-            AND opp.GameNumber = game_stats.GameNumber
+            WHERE opp.GStatNumber = game_stats.OpponentGStatNumber
         )
-        WHERE OpponentTeamNumber IS NOT NULL
-        AND GStatNumber > ?
-        """, (max_gstat,))
-
-        for i in range(1, 10):
-            cursor.execute(f"""
-            UPDATE game_stats
-            SET OppRunsInning{i} = (
-                SELECT opp.RunsInning{i}
-                FROM game_stats opp
-                WHERE opp.GStatNumber = game_stats.OpponentGStatNumber
-            )
-            WHERE OpponentGStatNumber IS NOT NULL
-            AND GStatNumber > ?
-            """, (max_gstat,))
+        WHERE OpponentGStatNumber IS NOT NULL
+        AND TeamNumber IN ({team_placeholders})
+        """, link_teams)
 
-        print("  Opponent data linked successfully")
+    # Canonical both-sides link for box scores
+    pair_count = refresh_game_pairs(conn, link_teams)
+    print(f"  Opponent data linked successfully ({pair_count} game pairs)")
 
-        unchanged_count = len(df_clean) - new_count - changed_count
+    unchanged_count = len(df_clean) - new_count - changed_count
 
-        print(f"  Game Stats: {new_count} new, {changed_count} changed, {unchanged_count} unchanged")
-        return new_count, changed_count, unchanged_count
+    print(f"  Game Stats: {new_count} new, {changed_count} changed, {unchanged_count} unchanged")
+    return new_count, changed_count, unchanged_count, touched
 
-    finally:
-        os.remove(temp_file)
 
 
 # ============================================================
 # POST-SYNC VALIDATION
 # ============================================================
 
-def post_sync_validation(conn):
-    """Run validation checks after sync to catch any remaining issues."""
+def post_sync_validation(conn, team_numbers):
+    """Run validation checks on the synced teams to catch any remaining issues."""
     print("\n--- POST-SYNC VALIDATION ---")
     issues = []
 
     cursor = conn.cursor()
 
     # Orphan PIDs in batting
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT DISTINCT b.PlayerNumber
         FROM batting_stats b
         LEFT JOIN People p ON b.PlayerNumber = p.PersonNumber
-        WHERE b.TeamNumber BETWEEN 538 AND 551 AND p.PersonNumber IS NULL
+        WHERE {_in_list('b.TeamNumber', team_numbers)} AND p.PersonNumber IS NULL
     """)
     orphans = [row[0] for row in cursor.fetchall()]
     if orphans:
         issues.append(f"ORPHAN PIDs in batting (no People record): {orphans}")
 
     # Orphan PIDs in pitching
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT DISTINCT ps.PlayerNumber
         FROM pitching_stats ps
         LEFT JOIN People p ON ps.PlayerNumber = p.PersonNumber
-        WHERE ps.TeamNumber BETWEEN 538 AND 551 AND p.PersonNumber IS NULL
+        WHERE {_in_list('ps.TeamNumber', team_numbers)} AND p.PersonNumber IS NULL
     """)
     orphans = [row[0] for row in cursor.fetchall()]
     if orphans:
         issues.append(f"ORPHAN PIDs in pitching (no People record): {orphans}")
 
     # Multiple wins same team/game
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT TeamNumber, GameNumber, COUNT(*)
         FROM pitching_stats
-        WHERE TeamNumber BETWEEN 538 AND 551 AND W = 1
+        WHERE {_in_list('TeamNumber', team_numbers)} AND W = 1
         GROUP BY TeamNumber, GameNumber HAVING COUNT(*) > 1
     """)
     dupes = cursor.fetchall()
@@ -953,10 +1114,10 @@ def post_sync_validation(conn):
             issues.append(f"MULTIPLE WINS: Team {team} Game {game} ({count} pitchers with W)")
 
     # Multiple losses same team/game
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT TeamNumber, GameNumber, COUNT(*)
         FROM pitching_stats
-        WHERE TeamNumber BETWEEN 538 AND 551 AND L = 1
+        WHERE {_in_list('TeamNumber', team_numbers)} AND L = 1
         GROUP BY TeamNumber, GameNumber HAVING COUNT(*) > 1
     """)
     dupes = cursor.fetchall()
@@ -965,11 +1126,11 @@ def post_sync_validation(conn):
             issues.append(f"MULTIPLE LOSSES: Team {team} Game {game} ({count} pitchers with L)")
 
     # IP vs innings mismatch
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT ps.TeamNumber, ps.GameNumber, SUM(ps.IP), gs.Innings
         FROM pitching_stats ps
         JOIN game_stats gs ON ps.TeamNumber = gs.TeamNumber AND ps.GameNumber = gs.GameNumber
-        WHERE ps.TeamNumber BETWEEN 538 AND 551
+        WHERE {_in_list('ps.TeamNumber', team_numbers)}
         GROUP BY ps.TeamNumber, ps.GameNumber
         HAVING ABS(SUM(ps.IP) - gs.Innings) > 1.5
     """)
@@ -979,10 +1140,10 @@ def post_sync_validation(conn):
             issues.append(f"IP MISMATCH: Team {team} Game {game}: Total IP={total_ip}, Innings={innings}")
 
     # Duplicate batting entries (same player/team/game)
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT PlayerNumber, TeamNumber, GameNumber, COUNT(*)
         FROM batting_stats
-        WHERE TeamNumber BETWEEN 538 AND 551
+        WHERE {_in_list('TeamNumber', team_numbers)}
         GROUP BY PlayerNumber, TeamNumber, GameNumber
         HAVING COUNT(*) > 1
     """)
@@ -1005,56 +1166,201 @@ def post_sync_validation(conn):
 # MAIN
 # ============================================================
 
-def main():
-    print("COMPLETE SOFTBALL STATS SYNC")
-    print("=" * 50)
+def run_sync(db_path, full=False, season_codes=()):
+    """Sync the CSV into db_path and refresh the summary tables. Games whose
+    CSV rows hash the same as last time are skipped unless full is set.
+    season_codes picks the registered seasons to sync (default: the newest;
+    None: all of them); each one is preprocessed and synced separately.
+    Returns (new, changed, unchanged) record counts, the synced teams and
+    the seasons whose data may have changed (with full, every synced one)."""
+    conn = sqlite3.connect(db_path)
 
-    # Create backup
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = f"softball_stats.db.backup_{timestamp}"
-    shutil.copy2("softball_stats.db", backup_path)
-    print(f"Backup created: {backup_path}")
+    try:
+        # Bring indexes / unique keys / summary tables up to date
+        upgrade_schema(conn)
 
-    conn = sqlite3.connect("softball_stats.db")
+        # Everything from here to the commit is one transaction: a failed
+        # sync leaves the database exactly as it was
+        conn.execute('BEGIN')
+
+        registry = load_season_registry(conn, season_codes)
+        synced_teams = set().union(*(season['teams'] for season in registry.values()))
+        print(f"Syncing {', '.join(registry) or 'no seasons'} ({len(synced_teams)} teams)")
 
-    try:
         # Build lookup tables from DB
-        roster = build_roster_lookup(conn)
-        team_names = get_team_name_lookup(conn)
+        roster = build_roster_lookup(conn, synced_teams)
+        team_names = get_team_name_lookup(conn, synced_teams)
         player_names = get_player_name_lookup(conn)
         print(f"Loaded roster data for {len(roster)} teams")
 
-        # Sync all tables
-        bat_new, bat_changed, bat_unchanged = sync_batting_stats(conn, roster, team_names, player_names)
-        pitch_new, pitch_changed, pitch_unchanged = sync_pitching_stats(conn, roster, team_names, player_names)
-        game_new, game_changed, game_unchanged = sync_game_stats(conn)
-
+        if full:
+            conn.execute(f"DELETE FROM sync_state WHERE {_in_list('TeamNumber', synced_teams)}")
+            print("Full sync: every game is re-checked")
+
+        # Sync all tables, one season at a time
+        tables = read_export_tables(CSV_PATH, EXPORT_TABLE_DTYPES)
+        new = changed = unchanged = 0
+        touched = {'batting_stats': set(), 'pitching_stats': set(), 'game_stats': set()}
+        for code, season in registry.items():
+            if len(registry) > 1:
+                print(f"\n{'=' * 50}\nSEASON {code} ({len(season['teams'])} teams)\n{'=' * 50}")
+            results = {
+                'batting_stats': sync_batting_stats(
+                    conn, tables.get('BattingStats'), season, roster, team_names, player_names),
+                'pitching_stats': sync_pitching_stats(
+                    conn, tables.get('PitchingStats'), season, roster, team_names, player_names),
+                'game_stats': sync_game_stats(conn, tables.get('GameStats'), season, team_names),
+            }
+            for table, (table_new, table_changed, table_unchanged, games) in results.items():
+                new, changed, unchanged = (
+                    new + table_new, changed + table_changed, unchanged + table_unchanged)
+                touched[table] |= games
+
+        print_touched_games(touched, team_names)
+
+        # Downstream refreshes only cover the teams whose games were written
+        bat_teams = sorted({team for team, _ in touched['batting_stats']})
+        pitch_teams = sorted({team for team, _ in touched['pitching_stats']})
+        game_teams = sorted({team for team, _ in touched['game_stats']})
+        touched_teams = sorted(set(bat_teams) | set(pitch_teams) | set(game_teams))
+
+        # Rebuild per-season and career batting aggregates for what this sync touched
+        if bat_teams:
+            touched_seasons = season_codes_for_teams(conn, bat_teams)
+            summary_rows = refresh_player_season_batting(conn, touched_seasons)
+            print(f"\nRefreshed player_season_batting for {', '.join(touched_seasons)} "
+                  f"({summary_rows} rows)")
+            career_rows = refresh_player_career_batting(conn, bat_teams)
+            print(f"Refreshed player_career_batting ({career_rows} rows)")
+
+        # Career pitching leaderboard rows for the touched teams' pitchers
+        if pitch_teams:
+            pitcher_rows = refresh_pitcher_career(conn, pitch_teams)
+            print(f"Refreshed pitcher_career ({pitcher_rows} rows)")
+
+        # Decision pitchers per game (needs the GStatNumbers sync_game_stats assigns)
+        if pitch_teams or game_teams:
+            decision_rows = refresh_game_decisions(conn, sorted(set(pitch_teams) | set(game_teams)))
+            print(f"Refreshed game_decisions ({decision_rows} rows)")
+
+        # Career batter-vs-pitcher lines for everyone who faced these teams
+        if touched_teams:
+            matchup_rows = refresh_bvp_matchups(conn, touched_teams)
+            print(f"Refreshed bvp_matchups ({matchup_rows} rows)")
+
+        # Search entries for the touched teams and everyone on them (mid-season
+        # pickups are added to People/Roster by hand before their stats arrive)
+        if bat_teams or pitch_teams:
+            teams = sorted(set(bat_teams) | set(pitch_teams))
+            placeholders = ','.join('?' for _ in teams)
+            people = [row[0] for row in conn.execute(f"""
+                SELECT PersonNumber FROM Roster WHERE TeamNumber IN ({placeholders})
+                UNION
+                SELECT PlayerNumber FROM batting_stats WHERE TeamNumber IN ({placeholders})
+            """, teams + teams).fetchall()]
+            search_rows = refresh_search_index(conn, people, teams)
+            print(f"Refreshed search_index ({search_rows} entries)")
+
+        # Team/game/player counts on the /seasons index
+        if touched_teams:
+            refresh_season_summary(conn, season_codes_for_teams(conn, touched_teams))
+            print("Refreshed season_summary and league_summary")
+
+        # Invalidate the web app's cached pages (only when a game was written)
+        if touched_teams:
+            print(f"Data version bumped to {bump_sync_version(conn)}")
+
+        changed_seasons = list(registry) if full else season_codes_for_teams(conn, touched_teams)
         conn.commit()
+    finally:
         conn.close()
 
-        # Reopen for validation to ensure clean committed state
-        conn = sqlite3.connect("softball_stats.db")
+    return new, changed, unchanged, sorted(synced_teams), changed_seasons
 
-        # Post-sync validation
-        issues = post_sync_validation(conn)
 
-        # Final results
-        print("\n" + "=" * 50)
-        print("SYNC RESULTS")
-        print("=" * 50)
-        print(f"  New records:       {bat_new + pitch_new + game_new}")
-        print(f"  Changed records:   {bat_changed + pitch_changed + game_changed}")
-        print(f"  Unchanged records: {bat_unchanged + pitch_unchanged + game_unchanged}")
+def validate_database(db_path, team_numbers):
+    """post_sync_validation on a fresh connection (only committed data)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return post_sync_validation(conn, team_numbers)
+    finally:
+        conn.close()
 
-        if issues:
-            print(f"\n  !! {len(issues)} validation issue(s) found - review above !!")
-        else:
-            print(f"\n  All clean ✓")
 
-        print("\nSYNC COMPLETE")
+def main():
+    parser = argparse.ArgumentParser(description='Sync data.csv into softball_stats.db')
+    parser.add_argument('--publish', action='store_true',
+                        help='sync a staged copy and swap it in atomically once it validates')
+    parser.add_argument('--allow-issues', action='store_true',
+                        help='with --publish: publish even if validation finds issues')
+    parser.add_argument('--full', action='store_true',
+                        help='re-check every game, not just those whose CSV rows changed')
+    parser.add_argument('--season', action='append', default=[], metavar='CODE',
+                        help='season to sync (repeatable; default: the newest registered season)')
+    parser.add_argument('--all-seasons', action='store_true',
+                        help='sync every season in the season_teams registry')
+    args = parser.parse_args()
 
-    finally:
-        conn.close()
+    print("COMPLETE SOFTBALL STATS SYNC")
+    print("=" * 50)
+
+    if args.publish:
+        # The live database is only read (by the backup API); the previous
+        # generation stays on disk as the rollback
+        db_path = stage_generation(DB_PATH)
+        print(f"Staged copy: {db_path}")
+    else:
+        # Create backup
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = f"{DB_PATH}.backup_{timestamp}"
+        backup_database(DB_PATH, backup_path)
+        print(f"Backup created: {backup_path}")
+        db_path = DB_PATH
+
+    try:
+        new, changed, unchanged, synced_teams, changed_seasons = run_sync(
+            db_path, args.full, None if args.all_seasons else args.season)
+    except ValueError as error:
+        print(f"ERROR: {error}")
+        if args.publish:
+            discard_generation(db_path)
+            print("Staged copy removed - the live database is unchanged")
+        return
+
+    # Post-sync validation
+    issues = validate_database(db_path, synced_teams)
+
+    # Final results
+    print("\n" + "=" * 50)
+    print("SYNC RESULTS")
+    print("=" * 50)
+    print(f"  New records:       {new}")
+    print(f"  Changed records:   {changed}")
+    print(f"  Unchanged records: {unchanged}")
+
+    if issues:
+        print(f"\n  !! {len(issues)} validation issue(s) found - review above !!")
+    else:
+        print(f"\n  All clean ✓")
+
+    if args.publish:
+        if issues and not args.allow_issues:
+            print(f"\nNOT PUBLISHED - the live database is unchanged. Staged copy kept at {db_path}")
+            print("(re-run with --allow-issues to publish anyway)")
+            return
+        removed = publish_generation(DB_PATH, db_path)
+        print(f"\nPublished: {DB_PATH} -> {db_path}")
+        if removed:
+            print(f"Removed old generations: {', '.join(removed)}")
+        print("Roll back with: python publish.py --rollback")
+
+    # Frozen pages of the seasons just changed would keep the old numbers
+    thawed = thaw_seasons(changed_seasons)
+    if thawed:
+        print(f"\nThawed frozen pages for {', '.join(thawed)} "
+              f"(re-run python freeze.py {' '.join(thawed)})")
+
+    print("\nSYNC COMPLETE")
 
 
 if __name__ == "__main__":
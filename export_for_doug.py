@@ -26,7 +26,7 @@ def export_for_doug(season_code='W26'):
     teams_query = '''
         SELECT TeamNumber, LongTeamName, Manager
         FROM Teams
-        WHERE LongTeamName LIKE '%' || ? || '%'
+        WHERE season_code = ?
         ORDER BY LongTeamName
     '''
     teams = conn.execute(teams_query, (season_code,)).fetchall()
@@ -88,7 +88,7 @@ def export_for_doug(season_code='W26'):
         SELECT DISTINCT r.PersonNumber
         FROM Roster r
         JOIN Teams t ON r.TeamNumber = t.TeamNumber
-        WHERE t.LongTeamName LIKE '%' || ? || '%'
+        WHERE t.season_code = ?
     '''
     w26_player_ids = [row['PersonNumber'] for row in conn.execute(w26_players_query, (season_code,)).fetchall()]
     
@@ -0,0 +1,155 @@
+"""
+Freeze closed seasons to static HTML.
+
+Seasons before the current one never change, yet every visit to one of
+their pages re-ran the queries. This renders each closed season's pages
+(season detail, batting, all-star, every team page and box score) through
+the app into FROZEN_DIR, with a precompressed .gz next to every file.
+app.py serves them before running any queries, as long as the database's
+sync_version is still the one they were frozen at (any sync bumps it, so
+re-run this after syncing); a fronting server can serve the tree itself,
+e.g. nginx:
+
+    location / { try_files /frozen$uri/index.html @app; gzip_static on; }
+
+The season metrics page is left live: its BVP column shows career
+matchups, which keep changing after the season ends.
+
+Seasons already frozen at the current sync_version are skipped, so once a
+new season is created, a plain run renders only the season that just
+closed, and after a sync it re-renders the seasons that went stale.
+
+USAGE:
+    python freeze.py                  # freeze closed seasons not frozen (or
+                                      # frozen at an older sync_version)
+    python freeze.py F25 S25          # (re)freeze specific seasons
+    python freeze.py --all            # re-freeze every closed season
+    python freeze.py --current W26    # open season (default: the newest one)
+    python freeze.py --list           # show what is frozen
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+
+# Render with the live app, not from pages frozen earlier
+os.environ['SERVE_FROZEN'] = '0'
+
+import app as webapp  # noqa: E402  (must follow SERVE_FROZEN)
+from app import DB_PATH  # noqa: E402
+from frozen import (FROZEN_DIR, frozen_file_path, load_manifest, remove_frozen_pages,  # noqa: E402
+                    save_manifest, write_atomic)
+
+
+def season_pages(conn, filter_number, season_code):
+    """Every frozen URL for one season"""
+    pages = [
+        f'/season/{filter_number}',
+        f'/season/{filter_number}/batting',
+        f'/season/{filter_number}/allstar',
+    ]
+    teams = [row[0] for row in conn.execute(
+        'SELECT TeamNumber FROM Teams WHERE season_code = ? ORDER BY TeamNumber', (season_code,)
+    )]
+    pages += [f'/team/{team}' for team in teams]
+    pages += [f'/boxscore/{team}/{game}' for team, game in conn.execute(f'''
+        SELECT TeamNumber, GameNumber FROM game_stats
+        WHERE TeamNumber IN ({','.join('?' for _ in teams)})
+        ORDER BY TeamNumber, GameNumber
+    ''', teams)]
+    return pages
+
+
+def freeze_season(client, conn, filter_number, season_code, old_pages):
+    """Render one season's pages to disk. Returns {path: etag}."""
+    pages = {}
+    for url in season_pages(conn, filter_number, season_code):
+        response = client.get(url)
+        if response.status_code != 200:
+            print(f"  skipped {url} ({response.status_code})")
+            continue
+        body = response.get_data()
+        file_path = frozen_file_path(url)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        write_atomic(file_path, body)
+        # mtime=0 keeps the .gz byte-identical between runs
+        write_atomic(file_path + '.gz', gzip.compress(body, compresslevel=9, mtime=0))
+        pages[url] = hashlib.sha1(body).hexdigest()
+
+    # Pages that no longer exist (e.g. a deleted team) come off disk too
+    remove_frozen_pages(set(old_pages) - set(pages))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Freeze closed seasons to static HTML')
+    parser.add_argument('seasons', nargs='*', help='season codes to (re)freeze')
+    parser.add_argument('--all', action='store_true', help='re-freeze every closed season')
+    parser.add_argument('--current', help='the open season, never frozen (default: newest)')
+    parser.add_argument('--list', action='store_true', help='show frozen seasons and exit')
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    if args.list:
+        for code, entry in sorted(manifest['seasons'].items()):
+            print(f"{code:<6} {len(entry['pages']):>5} pages  frozen {entry['frozen_at']}  "
+                  f"sync_version {entry.get('sync_version')}")
+        return
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        seasons = conn.execute('''
+            SELECT FilterNumber, season_code
+            FROM season_summary
+            WHERE season_code IS NOT NULL AND season_code != ''
+            ORDER BY season_sort DESC
+        ''').fetchall()
+        if not seasons:
+            print("No seasons found (run python summary_tables.py first)")
+            return
+
+        current = args.current or seasons[0][1]
+        closed = {code: filter_number for filter_number, code in seasons if code != current}
+        sync_version = conn.execute(
+            "SELECT value FROM app_meta WHERE key = 'sync_version'"
+        ).fetchone()[0]
+        if args.seasons:
+            unknown = [code for code in args.seasons if code not in closed]
+            if unknown:
+                print(f"Not a closed season: {', '.join(unknown)} (open season is {current})")
+                return
+            targets = args.seasons
+        elif args.all:
+            targets = list(closed)
+        else:
+            targets = [code for code in closed
+                       if manifest['seasons'].get(code, {}).get('sync_version') != sync_version]
+
+        if not targets:
+            print(f"Nothing to freeze ({len(manifest['seasons'])} season(s) already frozen "
+                  f"at sync_version {sync_version}, open season is {current})")
+            return
+
+        client = webapp.app.test_client()
+        for code in targets:
+            old_pages = manifest['seasons'].get(code, {}).get('pages', {})
+            pages = freeze_season(client, conn, closed[code], code, old_pages)
+            manifest['seasons'][code] = {
+                'FilterNumber': closed[code],
+                'frozen_at': datetime.now().isoformat(timespec='seconds'),
+                'sync_version': sync_version,
+                'pages': pages,
+            }
+            # Saved per season so an interrupted run keeps what it finished
+            save_manifest(manifest)
+            print(f"Froze {code}: {len(pages)} pages")
+    finally:
+        conn.close()
+
+    print(f"\nFrozen pages are in {FROZEN_DIR}/ (open season: {current})")
+
+
+if __name__ == '__main__':
+    main()
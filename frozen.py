@@ -0,0 +1,65 @@
+"""
+The frozen season pages on disk.
+
+freeze.py renders closed seasons to static HTML under FROZEN_DIR and lists
+them in FROZEN_DIR/manifest.json; app.py serves them from there (so can a
+fronting server, straight from the tree). A sync that changes a frozen
+season thaws it: the season comes out of the manifest and its files are
+deleted, so its pages render live until freeze.py is re-run for it.
+"""
+import json
+import os
+
+FROZEN_DIR = os.environ.get('FROZEN_DIR', 'frozen')
+
+
+def frozen_manifest_path():
+    return os.path.join(FROZEN_DIR, 'manifest.json')
+
+
+def frozen_file_path(path):
+    """/season/77/batting -> FROZEN_DIR/season/77/batting/index.html"""
+    return os.path.join(FROZEN_DIR, *path.strip('/').split('/'), 'index.html')
+
+
+def write_atomic(path, data):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def load_manifest():
+    try:
+        with open(frozen_manifest_path(), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'seasons': {}}
+
+
+def save_manifest(manifest):
+    os.makedirs(FROZEN_DIR, exist_ok=True)
+    write_atomic(frozen_manifest_path(), json.dumps(manifest, indent=1, sort_keys=True).encode())
+
+
+def remove_frozen_pages(urls):
+    """Delete the files (and .gz) of frozen pages"""
+    for url in urls:
+        for path in (frozen_file_path(url), frozen_file_path(url) + '.gz'):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def thaw_seasons(season_codes):
+    """Take seasons out of the manifest and delete their pages. Returns the
+    codes that were frozen (the others are ignored)."""
+    manifest = load_manifest()
+    thawed = [code for code in season_codes if code in manifest['seasons']]
+    if not thawed:
+        return []
+    entries = [manifest['seasons'].pop(code) for code in thawed]
+    # Manifest first, so the app never points at a file that's gone
+    save_manifest(manifest)
+    for entry in entries:
+        remove_frozen_pages(entry['pages'])
+    return thawed
@@ -0,0 +1,200 @@
+"""
+Request metrics shared by every gunicorn worker.
+
+app.py records one observation per request: endpoint, method, status
+code, latency, response size, and how many SQL statements the request ran
+and how long they took. Each worker adds these up in memory and folds the
+totals into a small SQLite file every few seconds, so /metrics reports the
+whole server (not just the worker that answered) in Prometheus text format.
+
+Counters only ever grow; delete the file (or use --reset) to start over.
+Prometheus treats that like a restart.
+
+USAGE:
+    python metrics.py            # print the current totals
+    python metrics.py --reset    # start counting from zero
+"""
+import argparse
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+METRICS_DB_PATH = os.environ.get('METRICS_DB', 'metrics.db')
+
+# How often a worker folds its in-memory totals into the shared file
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+
+Metric = namedtuple('Metric', ['kind', 'help', 'labels', 'buckets'])
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+SQL_STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SQL_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+METRICS = {
+    'softball_http_requests_total': Metric(
+        'counter', 'Requests handled, by endpoint, method and status code',
+        ('endpoint', 'method', 'status'), None),
+    'softball_http_request_duration_seconds': Metric(
+        'histogram', 'Time from request start to response, by endpoint',
+        ('endpoint',), LATENCY_BUCKETS),
+    'softball_http_response_size_bytes': Metric(
+        'histogram', 'Response body size, by endpoint',
+        ('endpoint',), SIZE_BUCKETS),
+    'softball_sql_statements_per_request': Metric(
+        'histogram', 'SQL statements executed per request, by endpoint',
+        ('endpoint',), SQL_STATEMENT_BUCKETS),
+    'softball_sql_seconds_per_request': Metric(
+        'histogram', 'Time spent in SQL execute() calls per request, by endpoint',
+        ('endpoint',), SQL_TIME_BUCKETS),
+}
+
+# One row per sample. For histograms, bucket i counts observations that fell
+# in bucket i alone (len(buckets) is +Inf) and SUM_BUCKET holds their total;
+# cumulative counts are worked out when rendering. Counters use bucket 0.
+SUM_BUCKET = -1
+
+METRICS_DDL = '''
+    CREATE TABLE IF NOT EXISTS samples (
+        name    TEXT NOT NULL,
+        labels  TEXT NOT NULL,
+        bucket  INTEGER NOT NULL,
+        value   REAL NOT NULL,
+        PRIMARY KEY (name, labels, bucket)
+    ) WITHOUT ROWID
+'''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def open_store(path=METRICS_DB_PATH):
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(METRICS_DDL)
+    return conn
+
+
+class MetricsRecorder:
+    """Per-process totals, flushed into the shared store as deltas"""
+
+    def __init__(self, path=METRICS_DB_PATH, flush_seconds=METRICS_FLUSH_SECONDS):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def _observe(self, name, labels, value):
+        """Add one histogram observation (caller holds the lock)"""
+        buckets = METRICS[name].buckets
+        self._pending[(name, labels, bisect.bisect_left(buckets, value))] += 1
+        self._pending[(name, labels, SUM_BUCKET)] += value
+
+    def record_request(self, endpoint, method, status, seconds, size, sql_statements, sql_seconds):
+        counter = METRICS['softball_http_requests_total']
+        counter_labels = _label_text(counter.labels, (endpoint, method, status))
+        labels = _label_text(('endpoint',), (endpoint,))
+        with self._lock:
+            self._pending[('softball_http_requests_total', counter_labels, 0)] += 1
+            self._observe('softball_http_request_duration_seconds', labels, seconds)
+            self._observe('softball_http_response_size_bytes', labels, size)
+            self._observe('softball_sql_statements_per_request', labels, sql_statements)
+            self._observe('softball_sql_seconds_per_request', labels, sql_seconds)
+            due = time.monotonic() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Fold pending totals into the store. If the store can't be written
+        (locked, read-only disk) they are kept and retried next time."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            # Opened per flush (every few seconds) so forked workers never share a handle
+            conn = open_store(self.path)
+            try:
+                with conn:
+                    conn.executemany('''
+                        INSERT INTO samples (name, labels, bucket, value) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (name, labels, bucket) DO UPDATE SET value = value + excluded.value
+                    ''', [key + (value,) for key, value in pending.items()])
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] += value
+
+    def render(self):
+        """Prometheus text exposition of everything in the store"""
+        self.flush()
+        try:
+            conn = open_store(self.path)
+            try:
+                rows = conn.execute('SELECT name, labels, bucket, value FROM samples').fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            rows = []
+        return render_samples(rows)
+
+
+def render_samples(rows):
+    """(name, labels, bucket, value) rows -> Prometheus text format"""
+    by_metric = defaultdict(lambda: defaultdict(dict))
+    for name, labels, bucket, value in rows:
+        by_metric[name][labels][bucket] = value
+
+    lines = []
+    for name, metric in METRICS.items():
+        lines.append(f'# HELP {name} {metric.help}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for labels, values in sorted(by_metric[name].items()):
+            if metric.kind == 'counter':
+                lines.append(f'{name}{{{labels}}} {_number(values.get(0, 0))}')
+                continue
+            cumulative = 0
+            bounds = [_number(bound) for bound in metric.buckets] + ['+Inf']
+            for index, bound in enumerate(bounds):
+                cumulative += values.get(index, 0)
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {_number(cumulative)}')
+            lines.append(f'{name}_sum{{{labels}}} {_number(values.get(SUM_BUCKET, 0))}')
+            lines.append(f'{name}_count{{{labels}}} {_number(cumulative)}')
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show or reset the shared request metrics')
+    parser.add_argument('--db', default=METRICS_DB_PATH)
+    parser.add_argument('--reset', action='store_true', help='delete every sample')
+    args = parser.parse_args()
+
+    if args.reset:
+        conn = open_store(args.db)
+        with conn:
+            count = conn.execute('DELETE FROM samples').rowcount
+        conn.close()
+        print(f"Deleted {count} samples from {args.db}")
+        return
+
+    print(MetricsRecorder(args.db).render(), end='')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+Benchmark for the data_update.py preprocessing steps.
+
+remap_pids, fix_roster_flags, fix_pitching_subs and apply_subs_logic used
+to walk the export one df.iloc[i] at a time; they are now column-wise
+maps, masks and a join against the roster. This builds a synthetic
+multi-season export (14 teams a season, W26 last), runs the old per-row
+versions kept below and the current ones on it, checks that both produce
+the same frames and the same report lines, and prints the timings.
+
+The sync preprocesses one season at a time, so a real run only hands these
+one season's rows; the extra seasons are here to show how each version
+scales.
+
+USAGE:
+    python preprocess_benchmark.py                 # 6 seasons
+    python preprocess_benchmark.py --seasons 12 --repeat 5
+"""
+import argparse
+import contextlib
+import io
+import random
+import time
+
+import pandas as pd
+
+from data_update import (EXPORT_TABLE_DTYPES, FORCE_ROSTER, PID_630_REAL_PLAYER, PID_REMAP,
+                         apply_subs_logic, fix_pitching_subs, fix_roster_flags, remap_pids)
+
+TEAMS_PER_SEASON = 14
+GAMES_PER_TEAM = 18
+BATTERS_PER_GAME = 11
+ROSTER_SIZE = 13
+
+# W26's Subs PIDs as registered in season_teams (TeamNumber -> PID)
+W26_SUBS_PIDS = {
+    538: 493, 539: 584, 540: 419, 541: 554, 542: 600, 543: 560, 544: 630,
+    545: 580, 546: 538, 547: 540, 548: 302, 549: 548, 550: 320, 551: 415,
+}
+W26_FORCE_ROSTER = FORCE_ROSTER['W26']
+
+# The W26 teams the per-row remap had PID 630 hardcoded to
+PID_630_HOME_TEAM = 544         # Big Dawgs
+PID_630_REAL_PLAYER_TEAM = 540  # Wolverines
+
+
+# ============================================================
+# Per-row versions (as they were before vectorizing)
+# ============================================================
+
+def remap_pids_per_row(df, report_lines):
+    remap_count = 0
+
+    for i in range(len(df)):
+        pid = df.iloc[i]['PersonNumber']
+        team = df.iloc[i]['TeamNumber']
+
+        if pid == 630:
+            if team == PID_630_HOME_TEAM:
+                pass
+            elif team == PID_630_REAL_PLAYER_TEAM:
+                df.iloc[i, df.columns.get_loc('PersonNumber')] = PID_630_REAL_PLAYER
+                report_lines.append(
+                    f"  PID REMAP: 630 → {PID_630_REAL_PLAYER} (Mike Riley, rostered) "
+                    f"Team {team} Game {df.iloc[i]['GameNumber']}"
+                )
+                remap_count += 1
+            else:
+                subs_pid = W26_SUBS_PIDS[team]
+                df.iloc[i, df.columns.get_loc('PersonNumber')] = subs_pid
+                report_lines.append(
+                    f"  PID REMAP: 630 → {subs_pid} (Team {team} Subs) "
+                    f"Team {team} Game {df.iloc[i]['GameNumber']}"
+                )
+                remap_count += 1
+            continue
+
+        if pid in PID_REMAP:
+            new_pid = PID_REMAP[pid]
+            df.iloc[i, df.columns.get_loc('PersonNumber')] = new_pid
+            report_lines.append(
+                f"  PID REMAP: {pid} → {new_pid} "
+                f"Team {team} Game {df.iloc[i]['GameNumber']}"
+            )
+            remap_count += 1
+
+    if remap_count > 0:
+        report_lines.insert(0, f"PID Remaps applied: {remap_count}")
+    return df
+
+
+def fix_pitching_subs_per_row(df, roster, report_lines):
+    fix_count = 0
+
+    if 'Roster' not in df.columns:
+        return df
+
+    for i in range(len(df)):
+        pid = int(df.iloc[i]['PersonNumber'])
+        team = int(df.iloc[i]['TeamNumber'])
+        roster_flag = df.iloc[i]['Roster']
+
+        if roster_flag == 'Sub':
+            continue
+
+        team_roster = roster.get(team, set())
+        if pid not in team_roster:
+            df.iloc[i, df.columns.get_loc('Roster')] = 'Sub'
+            report_lines.append(
+                f"  PITCHING SUB FIX: PID {pid} marked Roster→Sub "
+                f"for Team {team} Game {df.iloc[i]['GameNumber']} "
+                f"(not on roster)"
+            )
+            fix_count += 1
+
+    if fix_count > 0:
+        report_lines.insert(0, f"Pitching Sub fixes applied: {fix_count}")
+    return df
+
+
+def fix_roster_flags_per_row(df, roster, report_lines):
+    fix_count = 0
+
+    if 'Roster' not in df.columns:
+        return df
+
+    for i in range(len(df)):
+        if df.iloc[i]['Roster'] != 'Roster':
+            continue
+
+        pid = int(df.iloc[i]['PersonNumber'])
+        team = int(df.iloc[i]['TeamNumber'])
+        team_roster = roster.get(team, set())
+
+        if pid not in team_roster:
+            df.iloc[i, df.columns.get_loc('Roster')] = 'Sub'
+            report_lines.append(
+                f"  ROSTER FLAG FIX: PID {pid} marked Roster→Sub "
+                f"for Team {team} Game {df.iloc[i]['GameNumber']} "
+                f"(not on roster)"
+            )
+            fix_count += 1
+
+    force_count = 0
+    for i in range(len(df)):
+        pid = int(df.iloc[i]['PersonNumber'])
+        team = int(df.iloc[i]['TeamNumber'])
+        key = (pid, team)
+        if key in W26_FORCE_ROSTER and df.iloc[i]['Roster'] == 'Sub':
+            df.iloc[i, df.columns.get_loc('Roster')] = 'Roster'
+            report_lines.append(
+                f"  FORCE ROSTER: PID {pid} Sub→Roster "
+                f"Team {team} Game {df.iloc[i]['GameNumber']} "
+                f"— {W26_FORCE_ROSTER[key]}"
+            )
+            force_count += 1
+
+    total = fix_count + force_count
+    if total > 0:
+        report_lines.insert(0, f"Roster flag fixes applied: {fix_count} corrected, {force_count} forced")
+    return df
+
+
+def apply_subs_logic_per_row(df):
+    sub_count = 0
+    if 'Roster' in df.columns:
+        for i in range(len(df)):
+            if df.iloc[i]['Roster'] == 'Sub':
+                team_num = df.iloc[i]['TeamNumber']
+                if team_num in W26_SUBS_PIDS:
+                    new_player = W26_SUBS_PIDS[team_num]
+                    df.iloc[i, df.columns.get_loc('PersonNumber')] = new_player
+                    sub_count += 1
+    if sub_count > 0:
+        print(f"  Redirected {sub_count} sub records to team Subs PIDs")
+    return df
+
+
+# ============================================================
+# Synthetic export
+# ============================================================
+
+def synthetic_export(seasons, seed=26):
+    """Batting and pitching frames for `seasons` seasons ending with W26,
+    plus a roster lookup covering every team. About 1 row in 40 is a sub
+    and 1 in 150 is flagged Roster on a team the player isn't on; W26
+    also gets the remapped CSV PIDs, PID 630 and the FORCE_ROSTER player."""
+    rng = random.Random(seed)
+    w26_first = min(W26_SUBS_PIDS)
+    roster = {}
+    next_pid = 1000
+    for season in range(seasons):
+        for team in range(w26_first - season * TEAMS_PER_SEASON,
+                          w26_first - (season - 1) * TEAMS_PER_SEASON):
+            roster[team] = set(range(next_pid, next_pid + ROSTER_SIZE))
+            next_pid += ROSTER_SIZE
+    # The CSV PID that remaps onto each FORCE_ROSTER player
+    forced = {}
+    for (pid, team), _ in W26_FORCE_ROSTER.items():
+        roster[team].discard(pid)
+        forced[team] = next((csv_pid for csv_pid, db_pid in PID_REMAP.items() if db_pid == pid), pid)
+    csv_pids = sorted(PID_REMAP) + [630]
+    lineups = {team: sorted(pids) for team, pids in roster.items()}
+    # Mike Riley's home team (where the current remap sends PID 630 to him)
+    roster[PID_630_REAL_PLAYER_TEAM].add(PID_630_REAL_PLAYER)
+
+    batting, pitching = [], []
+    for team, pids in sorted(lineups.items()):
+        is_w26 = team in W26_SUBS_PIDS
+        for game in range(1, GAMES_PER_TEAM + 1):
+            lineup = rng.sample(pids, BATTERS_PER_GAME)
+            for slot, pid in enumerate(lineup):
+                flag = 'Roster'
+                roll = rng.random()
+                if roll < 1 / 40:
+                    pid, flag = rng.randrange(1000, next_pid), 'Sub'
+                elif roll < 1 / 40 + 1 / 150:
+                    pid = rng.randrange(1000, next_pid)
+                elif is_w26 and roll < 0.1:
+                    pid, flag = rng.choice(csv_pids), rng.choice(['Roster', 'Sub'])
+                elif team in forced and roll < 0.15:
+                    pid, flag = forced[team], 'Sub'
+                batting.append((team, game, pid, game % 2 == 0, flag, rng.randrange(2, 6)))
+                if slot == 0:
+                    pitching.append((team, game, pid, game % 2 == 0, flag, 7.0))
+
+    batting_df = pd.DataFrame(batting, columns=['TeamNumber', 'GameNumber', 'PersonNumber',
+                                                'HomeTeam', 'Roster', 'PA'])
+    pitching_df = pd.DataFrame(pitching, columns=['TeamNumber', 'GameNumber', 'PersonNumber',
+                                                  'HomeTeam', 'Roster', 'IP'])
+    batting_df = batting_df.astype({col: EXPORT_TABLE_DTYPES['BattingStats'][col] for col in batting_df})
+    pitching_df = pitching_df.astype({col: EXPORT_TABLE_DTYPES['PitchingStats'][col] for col in pitching_df})
+    return batting_df, pitching_df, roster
+
+
+# ============================================================
+# Benchmark
+# ============================================================
+
+def preprocess_batting(df, roster, per_row):
+    report = []
+    if per_row:
+        df = remap_pids_per_row(df, report)
+        df = fix_roster_flags_per_row(df, roster, report)
+        df = apply_subs_logic_per_row(df)
+    else:
+        df = remap_pids(df, report, W26_SUBS_PIDS, roster)
+        df = fix_roster_flags(df, roster, report, W26_FORCE_ROSTER)
+        df = apply_subs_logic(df, W26_SUBS_PIDS)
+    return df, report
+
+
+def preprocess_pitching(df, roster, per_row):
+    report = []
+    if per_row:
+        df = remap_pids_per_row(df, report)
+        df = fix_pitching_subs_per_row(df, roster, report)
+        df = apply_subs_logic_per_row(df)
+    else:
+        df = remap_pids(df, report, W26_SUBS_PIDS, roster)
+        df = fix_pitching_subs(df, roster, report)
+        df = apply_subs_logic(df, W26_SUBS_PIDS)
+    return df, report
+
+
+def _run(step, df, roster, per_row, repeat):
+    """Best time of `repeat` runs, each on a fresh copy, plus the last result"""
+    best = None
+    for _ in range(repeat):
+        frame = df.copy()
+        # apply_subs_logic prints its count; keep the table readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = step(frame, roster, per_row)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-row vs vectorized preprocessing')
+    parser.add_argument('--seasons', type=int, default=6, help='seasons in the synthetic export')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case (best time is reported)')
+    args = parser.parse_args()
+
+    batting, pitching, roster = synthetic_export(args.seasons)
+    print(f"Synthetic export: {args.seasons} seasons, {len(roster)} teams, "
+          f"{len(batting)} batting rows, {len(pitching)} pitching rows\n")
+
+    print(f"{'table':<10} {'rows':>7} {'report':>7} {'per-row':>10} {'vectorized':>11} {'speedup':>8}")
+    for label, step, df in [('batting', preprocess_batting, batting),
+                            ('pitching', preprocess_pitching, pitching)]:
+        per_row_time, (per_row_df, per_row_report) = _run(step, df, roster, True, args.repeat)
+        vector_time, (vector_df, vector_report) = _run(step, df, roster, False, args.repeat)
+        speedup = per_row_time / vector_time if vector_time else 0
+        print(f"{label:<10} {len(df):>7} {len(vector_report):>7} {per_row_time * 1000:>8.1f}ms "
+              f"{vector_time * 1000:>9.1f}ms {speedup:>7.1f}x")
+
+        if vector_report != per_row_report:
+            print(f"  !! report lines differ from the per-row version")
+        try:
+            pd.testing.assert_frame_equal(vector_df, per_row_df)
+        except AssertionError as error:
+            print(f"  !! frames differ from the per-row version: {error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Generation-based publishing of softball_stats.db.
+
+`python data_update.py --publish` never writes to the file the web app is
+reading. It copies the live database into a new generation file with the
+SQLite online backup API, syncs and validates that copy, and only then
+repoints softball_stats.db (a symlink) at it with one atomic rename.
+Workers notice the new target on their next request and reopen; until
+then they keep reading the previous generation, so no reader waits on the
+sync's write lock or sees half of a sync.
+
+SQLite follows the symlink, so each generation keeps its own -wal/-shm
+files. The newest few generations are kept and rolling back is another
+symlink swap. Scripts that open softball_stats.db directly keep working
+(they write to the live generation).
+
+Needs symlinks, i.e. Linux/macOS (the server). The first publish turns
+the plain softball_stats.db into a generation of its own.
+
+USAGE:
+    python publish.py --list                  # generations, newest first
+    python publish.py --rollback              # back to the previous generation
+    python publish.py --to softball_stats.20260118_193000_000000.db
+"""
+import argparse
+import glob
+import os
+import sqlite3
+from datetime import datetime
+
+from schema import APP_META_DDL, backup_database
+
+DB_PATH = 'softball_stats.db'
+
+# Generations kept on disk (the live one is never removed)
+KEEP_GENERATIONS = 3
+
+
+def generation_path(db_path):
+    """softball_stats.db -> softball_stats.<timestamp>.db (sorts oldest to newest)"""
+    base, ext = os.path.splitext(db_path)
+    return f"{base}.{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}{ext}"
+
+
+def list_generations(db_path):
+    """Generation files for db_path, newest first"""
+    base, ext = os.path.splitext(db_path)
+    pattern = f"{glob.escape(base)}.[0-9]*_[0-9]*_[0-9]*{ext}"
+    return sorted(glob.glob(pattern), reverse=True)
+
+
+def live_generation(db_path):
+    """The generation db_path points at (None while it is still a plain file)"""
+    if not os.path.islink(db_path):
+        return None
+    return os.path.join(os.path.dirname(db_path), os.readlink(db_path))
+
+
+def _sync_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute("SELECT value FROM app_meta WHERE key = 'sync_version'").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    return row[0] if row else 0
+
+
+def _point_at(db_path, generation):
+    """Atomically repoint db_path at generation (same directory)"""
+    temp_link = db_path + '.publish'
+    if os.path.lexists(temp_link):
+        os.remove(temp_link)
+    os.symlink(os.path.basename(generation), temp_link)
+    os.replace(temp_link, db_path)
+
+
+def stage_generation(db_path):
+    """Copy the live database into a new generation and return its path.
+    A plain (never published) database is first copied into a generation
+    of its own, so there is something to roll back to."""
+    if not os.path.islink(db_path):
+        backup_database(db_path, generation_path(db_path))
+    staged = generation_path(db_path)
+    backup_database(db_path, staged)
+    return staged
+
+
+def publish_generation(db_path, generation, keep=KEEP_GENERATIONS):
+    """Make generation the live database, then prune old generations"""
+    # Fold the sync's WAL into the file so the generation stands alone
+    conn = sqlite3.connect(generation)
+    try:
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+    was_plain_file = not os.path.islink(db_path)
+    _point_at(db_path, generation)
+    if was_plain_file:
+        # The old file's WAL now belongs to nothing reachable; remove it so
+        # it can never be replayed into a file restored under that name
+        for file_path in (db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+    return prune_generations(db_path, keep)
+
+
+def discard_generation(generation):
+    """Delete a generation file and its -wal/-shm"""
+    for file_path in (generation, generation + '-wal', generation + '-shm'):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def prune_generations(db_path, keep=KEEP_GENERATIONS):
+    """Delete all but the newest `keep` generations (never the live one).
+    Workers still reading a deleted generation keep their open file."""
+    live = live_generation(db_path)
+    removed = []
+    for path in list_generations(db_path)[keep:]:
+        if live and os.path.samefile(path, live):
+            continue
+        discard_generation(path)
+        removed.append(path)
+    return removed
+
+
+def rollback(db_path, target=None):
+    """Point db_path at target (default: the generation before the live one).
+    The target's sync_version is moved past the live one so web caches
+    never mistake it for pages they already hold."""
+    live = live_generation(db_path)
+    if live is None:
+        raise ValueError(f"{db_path} has not been published yet - nothing to roll back to")
+    generations = list_generations(db_path)
+    if target is None:
+        older = [path for path in generations if os.path.basename(path) < os.path.basename(live)]
+        if not older:
+            raise ValueError("No older generation to roll back to")
+        target = older[0]
+    elif not os.path.exists(target):
+        raise ValueError(f"No such generation: {target}")
+
+    version = max(_sync_version(live), _sync_version(target)) + 1
+    conn = sqlite3.connect(target)
+    try:
+        with conn:
+            conn.execute(APP_META_DDL)
+            conn.execute('''
+                INSERT INTO app_meta (key, value, updated_at)
+                VALUES ('sync_version', ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            ''', (version,))
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    finally:
+        conn.close()
+    _point_at(db_path, target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List or roll back published database generations')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--list', action='store_true', help='show generations')
+    parser.add_argument('--rollback', action='store_true', help='go back one generation')
+    parser.add_argument('--to', help='generation file to make live')
+    args = parser.parse_args()
+
+    if args.rollback or args.to:
+        try:
+            target = rollback(args.db, args.to)
+        except ValueError as error:
+            print(f"ERROR: {error}")
+            return
+        print(f"{args.db} -> {os.path.basename(target)} (web workers reopen on their next request)")
+        return
+
+    live = live_generation(args.db)
+    if live is None:
+        print(f"{args.db} is a plain file (not published yet)")
+    for path in list_generations(args.db):
+        marker = '*' if live and os.path.samefile(path, live) else ' '
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"{marker} {os.path.basename(path)}  {size:6.1f} MB  sync_version {_sync_version(path)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -204,17 +204,7 @@ WITH games_normalized AS (
         p.LastName,
         b.TeamNumber,
         b.GameNumber,
-        CASE
-            WHEN g.Date LIKE '____-__-__' THEN g.Date
-            WHEN substr(g.Date, 7, 2) < '50' THEN
-                '20' || substr(g.Date, 7, 2) || '-' ||
-                CASE WHEN length(substr(g.Date, 1, 2)) = 1 THEN '0' || substr(g.Date, 1, 2) ELSE substr(g.Date, 1, 2) END || '-' ||
-                CASE WHEN length(substr(g.Date, 4, 2)) = 1 THEN '0' || substr(g.Date, 4, 2) ELSE substr(g.Date, 4, 2) END
-            ELSE
-                '19' || substr(g.Date, 7, 2) || '-' ||
-                CASE WHEN length(substr(g.Date, 1, 2)) = 1 THEN '0' || substr(g.Date, 1, 2) ELSE substr(g.Date, 1, 2) END || '-' ||
-                CASE WHEN length(substr(g.Date, 4, 2)) = 1 THEN '0' || substr(g.Date, 4, 2) ELSE substr(g.Date, 4, 2) END
-        END AS game_date,
+        g.game_date,  -- ISO YYYY-MM-DD (schema.py v5)
         CASE WHEN COALESCE(b.H, 0) > 0 OR COALESCE(b.BB, 0) > 0 THEN 1 ELSE 0 END AS on_base
     FROM batting_stats b
     JOIN game_stats g
@@ -271,17 +261,7 @@ WITH games_normalized AS (
         p.LastName,
         b.TeamNumber,
         b.GameNumber,
-        CASE
-            WHEN g.Date LIKE '____-__-__' THEN g.Date
-            WHEN substr(g.Date, 7, 2) < '50' THEN
-                '20' || substr(g.Date, 7, 2) || '-' ||
-                CASE WHEN length(substr(g.Date, 1, 2)) = 1 THEN '0' || substr(g.Date, 1, 2) ELSE substr(g.Date, 1, 2) END || '-' ||
-                CASE WHEN length(substr(g.Date, 4, 2)) = 1 THEN '0' || substr(g.Date, 4, 2) ELSE substr(g.Date, 4, 2) END
-            ELSE
-                '19' || substr(g.Date, 7, 2) || '-' ||
-                CASE WHEN length(substr(g.Date, 1, 2)) = 1 THEN '0' || substr(g.Date, 1, 2) ELSE substr(g.Date, 1, 2) END || '-' ||
-                CASE WHEN length(substr(g.Date, 4, 2)) = 1 THEN '0' || substr(g.Date, 4, 2) ELSE substr(g.Date, 4, 2) END
-        END AS game_date,
+        g.game_date,  -- ISO YYYY-MM-DD (schema.py v5)
         CASE WHEN COALESCE(b.H, 0) > 0 OR COALESCE(b.BB, 0) > 0 THEN 1 ELSE 0 END AS on_base
     FROM batting_stats b
     JOIN game_stats g
@@ -0,0 +1,188 @@
+"""
+Opt-in SQL profiler for development and staging.
+
+With SQL_PROFILE=1 every read connection gets a trace callback and app.py
+records each statement a request runs, with its execute() time. When the
+request finishes, each statement not seen before is run through EXPLAIN
+QUERY PLAN and flagged if it scans a whole table or builds a temp B-tree
+(ORDER BY / GROUP BY / DISTINCT that no index covers). Totals are on
+/_debug/queries and every request is appended to a JSON-lines log.
+
+Times cover execute(): preparing the statement and producing the first
+row, which for sorted or grouped queries is nearly all of the work. Rows
+fetched after that aren't timed.
+
+USAGE:
+    SQL_PROFILE=1 python app.py
+    python query_profiler.py                 # slowest statements in sql_profile.jsonl
+    python query_profiler.py --top 20 --flagged
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+
+SQL_PROFILE = os.environ.get('SQL_PROFILE') == '1'
+SQL_PROFILE_LOG = os.environ.get('SQL_PROFILE_LOG', 'sql_profile.jsonl')
+
+# Requests kept in memory for /_debug/queries
+RECENT_REQUESTS = 50
+
+
+def statement_key(sql):
+    """Statements are grouped by their text with whitespace collapsed"""
+    return ' '.join(sql.split())
+
+
+def plan_flags(details):
+    """Full table scans and temp B-trees in EXPLAIN QUERY PLAN details.
+    Index scans, subquery/CTE results and FTS lookups aren't flagged."""
+    full_scans = [
+        detail for detail in details
+        if detail.startswith('SCAN ')
+        and 'INDEX' not in detail
+        and 'CONSTANT ROW' not in detail
+        and not detail.startswith('SCAN (')
+    ]
+    temp_btrees = [detail for detail in details if 'USE TEMP B-TREE' in detail]
+    return full_scans, temp_btrees
+
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN for one statement -> {'plan', 'full_scans', 'temp_btrees'}"""
+    try:
+        # Straight to sqlite3 so app.py's statement counters don't see it
+        rows = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+    except (sqlite3.Error, ValueError) as error:
+        return {'plan': [], 'full_scans': [], 'temp_btrees': [], 'error': str(error)}
+    details = [row[3] for row in rows]
+    full_scans, temp_btrees = plan_flags(details)
+    return {'plan': details, 'full_scans': full_scans, 'temp_btrees': temp_btrees}
+
+
+class QueryProfiler:
+    """Per-process statement totals, query plans and recent requests"""
+
+    def __init__(self, log_path=SQL_PROFILE_LOG, recent=RECENT_REQUESTS):
+        self.log_path = log_path
+        self.plans = {}
+        self.totals = {}
+        self.recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+
+    def finish_request(self, conn, method, path, endpoint, status, statements):
+        """Record one request's statements ({'sql', 'params', 'seconds'}
+        dicts, in the order they ran). conn is used for EXPLAIN QUERY PLAN."""
+        queries = []
+        for statement in statements:
+            key = statement_key(statement['sql'])
+            with self._lock:
+                plan = self.plans.get(key)
+            if plan is None and not key.upper().startswith(('PRAGMA', 'EXPLAIN')):
+                plan = explain(conn, statement['sql'], statement['params'])
+                with self._lock:
+                    self.plans[key] = plan
+
+            seconds = statement['seconds'] or 0.0
+            with self._lock:
+                total = self.totals.setdefault(key, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                total['count'] += 1
+                total['seconds'] += seconds
+                total['max_seconds'] = max(total['max_seconds'], seconds)
+
+            queries.append({
+                'sql': key,
+                'ms': round(seconds * 1000, 3),
+                'full_scans': plan['full_scans'] if plan else [],
+                'temp_btrees': plan['temp_btrees'] if plan else [],
+            })
+
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'method': method,
+            'path': path,
+            'endpoint': endpoint,
+            'status': status,
+            'statements': len(queries),
+            'sql_ms': round(sum(query['ms'] for query in queries), 3),
+            'queries': queries,
+        }
+        with self._lock:
+            self.recent.append(entry)
+            if self.log_path:
+                with open(self.log_path, 'a', encoding='utf-8') as log:
+                    log.write(json.dumps(entry) + '\n')
+        return entry
+
+    def snapshot(self):
+        """Statements by total time (with plans and flags) plus recent requests"""
+        with self._lock:
+            statements = []
+            for key, total in self.totals.items():
+                plan = self.plans.get(key) or {}
+                statements.append(dict(
+                    sql=key,
+                    count=total['count'],
+                    total_ms=round(total['seconds'] * 1000, 3),
+                    avg_ms=round(total['seconds'] * 1000 / total['count'], 3),
+                    max_ms=round(total['max_seconds'] * 1000, 3),
+                    **plan,
+                ))
+            recent = list(self.recent)
+        statements.sort(key=lambda statement: statement['total_ms'], reverse=True)
+        return {'statements': statements, 'recent_requests': recent[::-1]}
+
+
+# ============================================================
+# Log summary
+# ============================================================
+
+def summarize_log(path):
+    """Aggregate a JSON-lines profile log by statement"""
+    totals = {}
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            entry = json.loads(line)
+            for query in entry['queries']:
+                total = totals.setdefault(query['sql'], {
+                    'count': 0, 'ms': 0.0, 'max_ms': 0.0, 'endpoints': set(),
+                    'flagged': bool(query['full_scans'] or query['temp_btrees']),
+                })
+                total['count'] += 1
+                total['ms'] += query['ms']
+                total['max_ms'] = max(total['max_ms'], query['ms'])
+                total['endpoints'].add(entry['endpoint'] or '?')
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize the SQL profile log')
+    parser.add_argument('--log', default=SQL_PROFILE_LOG)
+    parser.add_argument('--top', type=int, default=10, help='statements to show')
+    parser.add_argument('--flagged', action='store_true',
+                        help='only statements with full scans or temp B-trees')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"No profile log at {args.log} - run the app with SQL_PROFILE=1 first")
+        return
+
+    totals = summarize_log(args.log)
+    rows = sorted(totals.items(), key=lambda item: item[1]['ms'], reverse=True)
+    if args.flagged:
+        rows = [row for row in rows if row[1]['flagged']]
+
+    print(f"{len(totals)} distinct statements in {args.log}\n")
+    for sql, total in rows[:args.top]:
+        flag = ' [scan/sort]' if total['flagged'] else ''
+        print(f"{total['ms']:>10.1f}ms total {total['count']:>6}x "
+              f"max {total['max_ms']:.1f}ms{flag}  ({', '.join(sorted(total['endpoints']))})")
+        print(f"    {sql[:200]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,772 @@
+"""
+Versioned schema upgrades for the legacy softball_stats.db
+
+The legacy tables (batting_stats, pitching_stats, game_stats) were created
+without primary keys or indexes, so every route query was a full scan.
+Each upgrade step below is applied once, in order, and the applied version
+is stored in PRAGMA user_version. Steps are idempotent, so re-running them
+against a partially upgraded file is safe.
+
+USAGE:
+    python schema.py                 # backup + upgrade softball_stats.db
+    python schema.py --report        # also print EXPLAIN QUERY PLAN for every
+                                     # route query, before and after the upgrade
+    python schema.py --status        # show current version, change nothing
+    python schema.py --reparse-teams # re-parse Teams season/division/display-name
+                                     # columns (after hand-editing a LongTeamName)
+                                     # and re-register the teams in season_teams
+"""
+import argparse
+import re
+import sqlite3
+from datetime import datetime
+
+from migrate import parse_team_name, season_code_to_year
+from summary_tables import (ensure_summary_tables, refresh_bvp_matchups, refresh_game_decisions,
+                            refresh_game_pairs, refresh_pitcher_career,
+                            refresh_player_career_batting, refresh_player_season_batting,
+                            refresh_search_index, refresh_season_summary, season_codes_for_teams)
+
+DB_PATH = 'softball_stats.db'
+
+# ============================================================
+# Index definitions
+# ============================================================
+
+# (index name, table, columns, unique)
+# Unique keys match the (TeamNumber, GameNumber[, PlayerNumber]) joins that
+# data_update.py uses against its temp_staging_* tables.
+CORE_INDEXES = [
+    # batting_stats: staging joins, box scores, team rosters, player pages
+    ('ux_batting_team_game_player', 'batting_stats', ['TeamNumber', 'GameNumber', 'PlayerNumber'], True),
+    ('idx_batting_player', 'batting_stats', ['PlayerNumber', 'G', 'TeamNumber', 'GameNumber'], False),
+
+    # pitching_stats: staging joins, box scores, pitcher pages
+    ('ux_pitching_team_game_player', 'pitching_stats', ['TeamNumber', 'GameNumber', 'PlayerNumber'], True),
+    ('idx_pitching_player', 'pitching_stats', ['PlayerNumber', 'IP', 'TeamNumber', 'GameNumber'], False),
+
+    # game_stats: (TeamNumber, GameNumber) lookups, opponent linking
+    ('ux_game_team_game', 'game_stats', ['TeamNumber', 'GameNumber'], True),
+    ('idx_game_gstat', 'game_stats', ['GStatNumber', 'TeamNumber', 'GameNumber'], False),
+    ('idx_game_opp_gstat', 'game_stats', ['OpponentGStatNumber'], False),
+    ('idx_game_team_date_opp', 'game_stats', ['TeamNumber', 'Date', 'OpponentTeamNumber'], False),
+
+    # Roster: team rosters and roster lookups during sync
+    ('idx_roster_team', 'Roster', ['TeamNumber', 'PersonNumber'], False),
+    ('idx_roster_person', 'Roster', ['PersonNumber'], False),
+]
+
+# Counting columns summed when duplicate (TeamNumber, GameNumber, PlayerNumber)
+# rows are merged, the same way data_update.py aggregates sub appearances.
+# Other columns (HomeTeam, G) come from the first row.
+STAT_SUM_COLUMNS = {
+    'batting_stats': ['PA', 'R', 'H', '2B', '3B', 'HR', 'OE', 'BB', 'RBI', 'SF'],
+    'pitching_stats': ['IP', 'BB', 'W', 'L', 'IBB'],
+}
+
+
+# Key/value metadata. 'sync_version' is bumped by every script that changes
+# stats/rosters so the web app can invalidate cached pages; updated_at is UTC
+# (SQLite CURRENT_TIMESTAMP) and becomes the pages' Last-Modified.
+APP_META_DDL = '''
+    CREATE TABLE IF NOT EXISTS app_meta (
+        key         TEXT PRIMARY KEY,
+        value       INTEGER NOT NULL,
+        updated_at  TEXT NOT NULL
+    )
+'''
+
+# Content hash of every (table, TeamNumber, GameNumber) block data_update.py
+# last imported; blocks whose hash hasn't changed are skipped on the next run.
+SYNC_STATE_DDL = '''
+    CREATE TABLE IF NOT EXISTS sync_state (
+        table_name    TEXT NOT NULL,
+        TeamNumber    INTEGER NOT NULL,
+        GameNumber    INTEGER NOT NULL,
+        content_hash  TEXT NOT NULL,
+        synced_at     TEXT NOT NULL,
+        PRIMARY KEY (table_name, TeamNumber, GameNumber)
+    ) WITHOUT ROWID
+'''
+
+# Season registry: one row per team data_update.py can sync. team_name is
+# what the export's Opponent column calls the team; subs_pid is the team's
+# Subs placeholder, which sub appearances are credited to.
+SEASON_TEAMS_DDL = '''
+    CREATE TABLE IF NOT EXISTS season_teams (
+        TeamNumber   INTEGER PRIMARY KEY,
+        season_code  TEXT NOT NULL,
+        team_name    TEXT NOT NULL,
+        subs_pid     INTEGER
+    )
+'''
+
+
+def table_columns(conn, table):
+    """Column names for a table (empty list if the table doesn't exist)."""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")').fetchall()]
+
+
+def create_index(conn, name, table, columns, unique=False):
+    """Create an index if the table and columns exist.
+    A unique index falls back to a plain one when existing rows already
+    violate the key, so the upgrade never fails on legacy duplicates.
+    Returns a short status string for the upgrade log."""
+    existing = table_columns(conn, table)
+    if not existing:
+        return f"skipped {name} (no table {table})"
+    missing = [col for col in columns if col not in existing]
+    if missing:
+        return f"skipped {name} (missing column(s) {', '.join(missing)})"
+
+    column_list = ', '.join(f'"{col}"' for col in columns)
+    if unique:
+        key = ', '.join(f'"{col}"' for col in columns)
+        duplicates = conn.execute(f'''
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM "{table}" GROUP BY {key} HAVING COUNT(*) > 1
+            )
+        ''').fetchone()[0]
+        if duplicates == 0:
+            conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {name} ON "{table}" ({column_list})')
+            return f"created {name}"
+        fallback = name.replace('ux_', 'idx_', 1)
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {fallback} ON "{table}" ({column_list})')
+        return f"created {fallback} (NOT unique: {duplicates} duplicate key(s) in {table})"
+
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({column_list})')
+    return f"created {name}"
+
+
+def merge_duplicate_stat_rows(conn, table):
+    """Fold rows sharing a (TeamNumber, GameNumber, PlayerNumber) key into
+    the first of them, summing STAT_SUM_COLUMNS. Returns the TeamNumbers
+    that had duplicates."""
+    key = 'TeamNumber, GameNumber, PlayerNumber'
+    teams = [row[0] for row in conn.execute(f'''
+        SELECT DISTINCT TeamNumber FROM "{table}"
+        GROUP BY {key} HAVING COUNT(*) > 1
+    ''').fetchall()]
+    if not teams:
+        return teams
+
+    columns = [col for col in STAT_SUM_COLUMNS[table] if col in table_columns(conn, table)]
+    conn.execute(f'''
+        UPDATE "{table}"
+        SET {', '.join(f'"{col}" = d."{col}"' for col in columns)}
+        FROM (
+            SELECT MIN(rowid) AS keep_rowid, {', '.join(f'SUM("{col}") AS "{col}"' for col in columns)}
+            FROM "{table}"
+            GROUP BY {key} HAVING COUNT(*) > 1
+        ) d
+        WHERE "{table}".rowid = d.keep_rowid
+    ''')
+    conn.execute(f'''
+        DELETE FROM "{table}"
+        WHERE rowid NOT IN (SELECT MIN(rowid) FROM "{table}" GROUP BY {key})
+    ''')
+    return teams
+
+
+def drop_duplicate_game_rows(conn):
+    """Keep the first game_stats row for each (TeamNumber, GameNumber) and
+    delete the repeats (both halves of a duplicated game are the same game,
+    so nothing is summed). Returns the TeamNumbers that had duplicates."""
+    key = 'TeamNumber, GameNumber'
+    teams = [row[0] for row in conn.execute(f'''
+        SELECT DISTINCT TeamNumber FROM game_stats
+        GROUP BY {key} HAVING COUNT(*) > 1
+    ''').fetchall()]
+    if teams:
+        conn.execute(f'''
+            DELETE FROM game_stats
+            WHERE rowid NOT IN (SELECT MIN(rowid) FROM game_stats GROUP BY {key})
+        ''')
+    return teams
+
+
+# ============================================================
+# Parsed team/season columns
+# ============================================================
+
+# Season order within a year: Winter=1, Summer=2, Fall=3
+SEASON_ORDER = {'W': 1, 'S': 2, 'F': 3}
+
+TEAM_SEASON_COLUMNS = [
+    ('season_code', 'TEXT'),
+    ('year', 'INTEGER'),
+    ('season_order', 'INTEGER'),
+    ('division', 'TEXT'),
+    ('display_name', 'TEXT'),
+    ('season_sort', 'INTEGER'),
+]
+
+
+def team_season_columns(long_team_name):
+    """
+    Parsed Teams columns for a LongTeamName (via migrate.parse_team_name).
+    "Wolverines (Ballers) W26" -> {
+        'season_code': 'W26', 'year': 2026, 'season_order': 1,
+        'division': 'Ballers', 'display_name': 'Wolverines',
+        'season_sort': 20261
+    }
+    season_sort orders seasons oldest to newest (year * 10 + season_order);
+    teams without a season code sort first (0).
+    """
+    parsed = parse_team_name(long_team_name or '')
+    code = parsed['season_code']
+    year = season_code_to_year(code) if code else None
+    season_order = SEASON_ORDER.get(code[0]) if code else None
+    return {
+        'season_code': code,
+        'year': year,
+        'season_order': season_order,
+        'division': parsed['division'],
+        'display_name': parsed['clean_name'],
+        'season_sort': year * 10 + season_order if year and season_order else 0,
+    }
+
+
+def backfill_team_season_columns(conn, team_numbers=None):
+    """Re-parse LongTeamName into the season columns for the given teams
+    (all teams when team_numbers is None). Returns the number of rows updated."""
+    if team_numbers is None:
+        rows = conn.execute('SELECT TeamNumber, LongTeamName FROM Teams').fetchall()
+    else:
+        team_numbers = list(team_numbers)
+        placeholders = ','.join('?' for _ in team_numbers)
+        rows = conn.execute(
+            f'SELECT TeamNumber, LongTeamName FROM Teams WHERE TeamNumber IN ({placeholders})',
+            team_numbers
+        ).fetchall()
+
+    set_clause = ', '.join(f'{name} = ?' for name, _ in TEAM_SEASON_COLUMNS)
+    for team_number, long_team_name in rows:
+        columns = team_season_columns(long_team_name)
+        conn.execute(
+            f'UPDATE Teams SET {set_clause} WHERE TeamNumber = ?',
+            [columns[name] for name, _ in TEAM_SEASON_COLUMNS] + [team_number]
+        )
+    return len(rows)
+
+
+# ============================================================
+# Season registry
+# ============================================================
+
+def register_season_teams(conn, season_codes=None):
+    """Add the teams of the given seasons (every season when None) to
+    season_teams. team_name is the parsed display name; subs_pid is the
+    Subs player on the team's roster, else the Subs person named after the
+    team (the way start_new_season.py matches them). A subs_pid already in
+    the registry is kept, so hand corrections survive a re-register.
+    Caller is responsible for committing. Returns the teams registered."""
+    conn.execute(SEASON_TEAMS_DDL)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_season_teams_season ON season_teams (season_code)')
+    season_filter, params = '', []
+    if season_codes is not None:
+        season_codes = list(season_codes)
+        season_filter = f"AND t.season_code IN ({','.join('?' for _ in season_codes)})"
+        params = season_codes
+    cursor = conn.execute(f'''
+        INSERT INTO season_teams (TeamNumber, season_code, team_name, subs_pid)
+        SELECT t.TeamNumber, t.season_code, t.display_name,
+               COALESCE(
+                   (SELECT MIN(r.PersonNumber)
+                    FROM Roster r
+                    JOIN People p ON p.PersonNumber = r.PersonNumber
+                    WHERE r.TeamNumber = t.TeamNumber AND p.LastName = 'Subs'),
+                   (SELECT MIN(p.PersonNumber)
+                    FROM People p
+                    WHERE p.LastName = 'Subs' AND p.FirstName = t.display_name)
+               )
+        FROM Teams t
+        WHERE t.season_code IS NOT NULL AND t.season_code != ''
+          AND t.display_name IS NOT NULL {season_filter}
+        ON CONFLICT (TeamNumber) DO UPDATE
+        SET season_code = excluded.season_code,
+            team_name = excluded.team_name,
+            subs_pid = COALESCE(season_teams.subs_pid, excluded.subs_pid)
+    ''', params)
+    return cursor.rowcount
+
+
+# ============================================================
+# game_stats.game_date
+# ============================================================
+
+def normalize_game_date(value):
+    """ISO 'YYYY-MM-DD' for any game_stats.Date value, or None.
+    Handles legacy 'M/D/YY h:mm' / 'M/D/YYYY' values and the ISO dates
+    (optionally with a time) that data_update.py writes. Two-digit years
+    below 50 are 20xx, like the old SQL sort expression."""
+    if value is None:
+        return None
+    date_part = str(value).strip().split(' ')[0].split('T')[0]
+    try:
+        if '/' in date_part:
+            month, day, year = (int(part) for part in date_part.split('/'))
+            if year < 100:
+                year += 2000 if year < 50 else 1900
+        else:
+            year, month, day = (int(part) for part in date_part.split('-'))
+        return datetime(year, month, day).strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def backfill_game_dates(conn, only_missing=True):
+    """Fill game_stats.game_date from Date. Returns rows updated."""
+    where = 'WHERE game_date IS NULL AND Date IS NOT NULL' if only_missing else ''
+    rows = conn.execute(f'SELECT rowid, Date FROM game_stats {where}').fetchall()
+    updates = [(normalize_game_date(date), rowid) for rowid, date in rows]
+    conn.executemany('UPDATE game_stats SET game_date = ? WHERE rowid = ?', updates)
+    return len(updates)
+
+
+# ============================================================
+# Upgrade steps
+# ============================================================
+
+def _upgrade_summary_tables(conn):
+    ensure_summary_tables(conn)
+    return ["ensured player_season_batting"]
+
+
+def _upgrade_core_indexes(conn):
+    log = [create_index(conn, *definition) for definition in CORE_INDEXES]
+    conn.execute('ANALYZE')
+    log.append("ran ANALYZE")
+    return log
+
+
+def _upgrade_team_season_columns(conn):
+    existing = table_columns(conn, 'Teams')
+    log = []
+    for name, definition in TEAM_SEASON_COLUMNS:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE Teams ADD COLUMN {name} {definition}')
+            log.append(f"added Teams.{name}")
+    count = backfill_team_season_columns(conn)
+    log.append(f"parsed {count} team names")
+    log.append(create_index(conn, 'idx_teams_season', 'Teams', ['season_code', 'TeamNumber']))
+    conn.execute('ANALYZE Teams')
+    return log
+
+
+def _upgrade_app_meta(conn):
+    conn.execute(APP_META_DDL)
+    conn.execute('''
+        INSERT OR IGNORE INTO app_meta (key, value, updated_at)
+        VALUES ('sync_version', 1, CURRENT_TIMESTAMP)
+    ''')
+    return ["ensured app_meta.sync_version"]
+
+
+def _upgrade_game_dates(conn):
+    log = []
+    if 'game_date' not in table_columns(conn, 'game_stats'):
+        conn.execute('ALTER TABLE game_stats ADD COLUMN game_date TEXT')
+        log.append("added game_stats.game_date")
+    count = backfill_game_dates(conn, only_missing=False)
+    missing = conn.execute(
+        'SELECT COUNT(*) FROM game_stats WHERE game_date IS NULL AND Date IS NOT NULL'
+    ).fetchone()[0]
+    log.append(f"normalized {count} game dates ({missing} unparseable)")
+    log.append(create_index(conn, 'idx_game_team_game_date', 'game_stats', ['TeamNumber', 'game_date']))
+    conn.execute('ANALYZE game_stats')
+    return log
+
+
+def _upgrade_game_decisions(conn):
+    ensure_summary_tables(conn)
+    if not table_columns(conn, 'pitching_stats') or 'GStatNumber' not in table_columns(conn, 'game_stats'):
+        return ["ensured game_decisions (no pitching/game data to load)"]
+    count = refresh_game_decisions(conn)
+    return [f"ensured game_decisions ({count} rows)"]
+
+
+def _upgrade_bvp_matchups(conn):
+    ensure_summary_tables(conn)
+    if not table_columns(conn, 'batting_stats') or 'OpponentGStatNumber' not in table_columns(conn, 'game_stats'):
+        return ["ensured bvp_matchups (no batting data to load)"]
+    count = refresh_bvp_matchups(conn)
+    return [f"ensured bvp_matchups ({count} rows)"]
+
+
+def _upgrade_game_pairs(conn):
+    ensure_summary_tables(conn)
+    columns = table_columns(conn, 'game_stats')
+    if 'GStatNumber' not in columns or 'game_date' not in columns:
+        return ["ensured game_pairs (no game data to link)"]
+    count = refresh_game_pairs(conn)
+    return [f"ensured game_pairs ({count} rows)"]
+
+
+def _upgrade_career_leaderboards(conn):
+    ensure_summary_tables(conn)
+    log = ["ensured player_career_batting and pitcher_career with sort indexes"]
+    if table_columns(conn, 'batting_stats'):
+        log.append(f"loaded {refresh_player_career_batting(conn)} career batting rows")
+    if table_columns(conn, 'pitching_stats'):
+        log.append(f"loaded {refresh_pitcher_career(conn)} career pitching rows")
+    return log
+
+
+def _upgrade_search_index(conn):
+    if not table_columns(conn, 'Roster') or not table_columns(conn, 'People'):
+        ensure_summary_tables(conn)
+        return ["ensured search_index (no Roster/People tables to index)"]
+    count = refresh_search_index(conn)
+    return [f"indexed {count} players, teams and seasons for search"]
+
+
+def _upgrade_season_summary(conn):
+    ensure_summary_tables(conn)
+    if not table_columns(conn, 'batting_stats') or not table_columns(conn, 'game_stats'):
+        return ["ensured season_summary and league_summary (no stats to count)"]
+    count = refresh_season_summary(conn)
+    return [f"ensured season_summary ({count} rows) and league_summary"]
+
+
+def _upgrade_unique_stat_keys(conn):
+    """v2 fell back to plain indexes where legacy rows repeated a key; the
+    sync's upserts need the unique ones."""
+    log = []
+    for table, name in (('batting_stats', 'ux_batting_team_game_player'),
+                        ('pitching_stats', 'ux_pitching_team_game_player')):
+        if not table_columns(conn, table):
+            continue
+        teams = merge_duplicate_stat_rows(conn, table)
+        if teams:
+            log.append(f"merged duplicate {table} rows for {len(teams)} team(s)")
+            if table == 'batting_stats':
+                refresh_player_season_batting(conn, season_codes_for_teams(conn, teams))
+                refresh_player_career_batting(conn, teams)
+            else:
+                refresh_pitcher_career(conn, teams)
+                refresh_game_decisions(conn, teams)
+            refresh_bvp_matchups(conn, teams)
+        conn.execute(f"DROP INDEX IF EXISTS {name.replace('ux_', 'idx_', 1)}")
+        log.append(create_index(conn, name, table, ['TeamNumber', 'GameNumber', 'PlayerNumber'], True))
+    return log
+
+
+def _upgrade_sync_state(conn):
+    conn.execute(SYNC_STATE_DDL)
+    return ["ensured sync_state (the next sync re-checks every game once)"]
+
+
+def _upgrade_season_teams(conn):
+    count = register_season_teams(conn)
+    log = [f"registered {count} teams in season_teams"]
+    missing = conn.execute('''
+        SELECT season_code, COUNT(*) FROM season_teams
+        WHERE subs_pid IS NULL
+        GROUP BY season_code ORDER BY season_code
+    ''').fetchall()
+    for code, teams in missing:
+        log.append(f"{code}: {teams} team(s) without a Subs PID (set season_teams.subs_pid by hand)")
+    return log
+
+
+def _upgrade_season_batting_backfill(conn):
+    """v1 only created player_season_batting; syncs refill just the seasons
+    they touch, so past seasons stayed empty."""
+    ensure_summary_tables(conn)
+    if not table_columns(conn, 'batting_stats') or not table_columns(conn, 'People'):
+        return ["ensured player_season_batting (no batting data to load)"]
+    season_codes = [row[0] for row in conn.execute('''
+        SELECT DISTINCT season_code FROM Teams
+        WHERE season_code IS NOT NULL AND season_code != ''
+        ORDER BY season_code
+    ''').fetchall()]
+    count = refresh_player_season_batting(conn, season_codes)
+    return [f"loaded {count} player_season_batting rows for {len(season_codes)} season(s)"]
+
+
+def _upgrade_unique_game_key(conn):
+    """v2 fell back to a plain (TeamNumber, GameNumber) index where legacy
+    game_stats rows repeated a game; the sync's upsert needs the unique one."""
+    columns = table_columns(conn, 'game_stats')
+    if not columns:
+        return ["skipped ux_game_team_game (no table game_stats)"]
+    log = []
+    teams = drop_duplicate_game_rows(conn)
+    if teams:
+        log.append(f"removed duplicate game_stats rows for {len(teams)} team(s)")
+        if 'OpponentGStatNumber' in columns:
+            # Opponents that linked to a deleted row link to the kept one
+            relinked = [row[0] for row in conn.execute('''
+                SELECT DISTINCT TeamNumber FROM game_stats
+                WHERE OpponentGStatNumber IS NOT NULL
+                    AND OpponentGStatNumber NOT IN (
+                        SELECT GStatNumber FROM game_stats WHERE GStatNumber IS NOT NULL)
+            ''').fetchall()]
+            conn.execute('''
+                UPDATE game_stats
+                SET OpponentGStatNumber = (
+                    SELECT opp.GStatNumber
+                    FROM game_stats opp
+                    WHERE opp.TeamNumber = game_stats.OpponentTeamNumber
+                    AND opp.GameNumber = game_stats.GameNumber
+                )
+                WHERE OpponentGStatNumber IS NOT NULL
+                    AND OpponentGStatNumber NOT IN (
+                        SELECT GStatNumber FROM game_stats WHERE GStatNumber IS NOT NULL)
+            ''')
+            teams = sorted(set(teams) | set(relinked))
+            if 'game_date' in columns:
+                refresh_game_pairs(conn, teams)
+            if table_columns(conn, 'pitching_stats'):
+                refresh_game_decisions(conn, teams)
+            if table_columns(conn, 'batting_stats'):
+                refresh_bvp_matchups(conn, teams)
+        refresh_season_summary(conn, season_codes_for_teams(conn, teams))
+        # The next sync re-checks these teams' games against the export
+        placeholders = ','.join('?' for _ in teams)
+        conn.execute(f"DELETE FROM sync_state WHERE table_name = 'game_stats' "
+                     f"AND TeamNumber IN ({placeholders})", teams)
+    conn.execute("DROP INDEX IF EXISTS idx_game_team_game")
+    log.append(create_index(conn, 'ux_game_team_game', 'game_stats', ['TeamNumber', 'GameNumber'], True))
+    return log
+
+
+# (version, description, step). Append new steps; never renumber.
+UPGRADES = [
+    (1, 'player_season_batting summary table', _upgrade_summary_tables),
+    (2, 'core indexes and unique game/player keys', _upgrade_core_indexes),
+    (3, 'parsed season/division columns on Teams', _upgrade_team_season_columns),
+    (4, 'app_meta table with sync_version', _upgrade_app_meta),
+    (5, 'ISO game_stats.game_date with (TeamNumber, game_date) index', _upgrade_game_dates),
+    (6, 'game_decisions table', _upgrade_game_decisions),
+    (7, 'bvp_matchups batter-vs-pitcher table', _upgrade_bvp_matchups),
+    (8, 'Teams.season_sort column', _upgrade_team_season_columns),
+    (9, 'game_pairs table linking both sides of each game', _upgrade_game_pairs),
+    (10, 'career leaderboard tables', _upgrade_career_leaderboards),
+    (11, 'search_index full-text table', _upgrade_search_index),
+    (12, 'season_summary and league_summary tables', _upgrade_season_summary),
+    (13, 'unique player/game keys on batting_stats and pitching_stats', _upgrade_unique_stat_keys),
+    (14, 'sync_state content hashes for incremental syncs', _upgrade_sync_state),
+    (15, 'season_teams registry for multi-season syncs', _upgrade_season_teams),
+    (16, 'player_season_batting rows for every season', _upgrade_season_batting_backfill),
+    (17, 'unique (TeamNumber, GameNumber) key on game_stats', _upgrade_unique_game_key),
+]
+
+SCHEMA_VERSION = UPGRADES[-1][0]
+
+
+def backup_database(db_path, backup_path):
+    """Consistent copy via the SQLite online backup API. Unlike a file copy
+    this includes pages still sitting in the WAL (the web app keeps the
+    database in WAL mode)."""
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(backup_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def bump_sync_version(conn):
+    """Mark the data as changed so cached web pages are regenerated.
+    Caller is responsible for committing. Returns the new version."""
+    conn.execute(APP_META_DDL)
+    conn.execute('''
+        INSERT INTO app_meta (key, value, updated_at)
+        VALUES ('sync_version', 1, CURRENT_TIMESTAMP)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1, updated_at = excluded.updated_at
+    ''')
+    return conn.execute("SELECT value FROM app_meta WHERE key = 'sync_version'").fetchone()[0]
+
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def upgrade_schema(conn, verbose=True):
+    """Apply every upgrade step newer than the DB's user_version.
+    Each step runs in its own transaction together with the version bump.
+    Returns the list of versions applied."""
+    conn.commit()
+    current = get_schema_version(conn)
+    applied = []
+
+    for version, description, step in UPGRADES:
+        if version <= current:
+            continue
+        try:
+            conn.execute('BEGIN')
+            log = step(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        if verbose:
+            print(f"  Schema v{version}: {description}")
+            for line in log:
+                print(f"    {line}")
+
+    return applied
+
+
+# ============================================================
+# EXPLAIN QUERY PLAN report
+# ============================================================
+
+def _sample_route_urls(conn):
+    """Pick real IDs from the DB so every route runs its full query set."""
+    urls = ['/players', '/seasons', '/pitching']
+
+    player = conn.execute('''
+        SELECT PlayerNumber FROM batting_stats
+        GROUP BY PlayerNumber ORDER BY COUNT(*) DESC LIMIT 1
+    ''').fetchone()
+    if player:
+        urls += [f'/player/{player[0]}', f'/player/{player[0]}/games']
+
+    season = conn.execute('''
+        SELECT FilterNumber FROM Seasons
+        WHERE FilterNumber GLOB '[0-9]*'
+        ORDER BY CAST(FilterNumber AS INTEGER) DESC LIMIT 1
+    ''').fetchone()
+    if season:
+        urls += [f'/season/{season[0]}', f'/season/{season[0]}/batting',
+                 f'/season/{season[0]}/metrics', f'/season/{season[0]}/allstar']
+
+    game = conn.execute('''
+        SELECT TeamNumber, GameNumber FROM game_stats
+        ORDER BY TeamNumber DESC, GameNumber LIMIT 1
+    ''').fetchone()
+    if game:
+        urls += [f'/team/{game[0]}', f'/boxscore/{game[0]}/{game[1]}']
+
+    pitcher = conn.execute('''
+        SELECT PlayerNumber FROM pitching_stats WHERE W > 0 LIMIT 1
+    ''').fetchone()
+    if pitcher:
+        urls.append(f'/pitcher/{pitcher[0]}')
+
+    return urls
+
+
+def capture_route_queries(conn):
+    """Run each app route once and record the SELECT statements it issues.
+    Returns [(url, sql), ...] with duplicates removed."""
+    import app as webapp
+
+    urls = _sample_route_urls(conn)
+    captured = []
+    original = webapp.get_db_connection
+
+    traced = []
+
+    def traced_connection():
+        route_conn = original()
+        route_conn.set_trace_callback(captured.append)
+        traced.append(route_conn)
+        return route_conn
+
+    webapp.get_db_connection = traced_connection
+    queries = []
+    seen = set()
+    try:
+        client = webapp.app.test_client()
+        for url in urls:
+            captured.clear()
+            client.get(url)
+            for sql in captured:
+                if not re.match(r'\s*(SELECT|WITH)\b', sql, re.IGNORECASE):
+                    continue
+                key = ' '.join(sql.split())
+                if key in seen:
+                    continue
+                seen.add(key)
+                queries.append((url, sql))
+    finally:
+        webapp.get_db_connection = original
+        # The app reuses its connections, so detach the tracer again
+        for route_conn in traced:
+            route_conn.set_trace_callback(None)
+
+    return queries
+
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN detail lines for a fully bound statement."""
+    try:
+        return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()]
+    except sqlite3.Error as e:
+        return [f"(error: {e})"]
+
+
+def print_plan_report(queries, before, after):
+    print("\n" + "=" * 60)
+    print("EXPLAIN QUERY PLAN: BEFORE -> AFTER")
+    print("=" * 60)
+    for (url, sql), old_plan, new_plan in zip(queries, before, after):
+        summary = ' '.join(sql.split())
+        print(f"\n{url}")
+        print(f"  SQL: {summary[:110]}{'...' if len(summary) > 110 else ''}")
+        print("  before:")
+        for line in old_plan:
+            print(f"    {line}")
+        print("  after:")
+        for line in new_plan:
+            print(f"    {line}")
+
+    scans_before = sum(1 for plan in before for line in plan if line.startswith('SCAN'))
+    scans_after = sum(1 for plan in after for line in plan if line.startswith('SCAN'))
+    print(f"\n{len(queries)} route queries: {scans_before} table scans before, {scans_after} after")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upgrade the softball_stats.db schema')
+    parser.add_argument('--report', action='store_true',
+                        help='Print EXPLAIN QUERY PLAN for every route query before/after')
+    parser.add_argument('--status', action='store_true', help='Show schema version only')
+    parser.add_argument('--reparse-teams', action='store_true',
+                        help='Re-parse season/division columns from LongTeamName')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        current = get_schema_version(conn)
+        print(f"Schema version: {current} (latest: {SCHEMA_VERSION})")
+        if args.status:
+            return
+
+        queries, before = [], []
+        if args.report:
+            queries = capture_route_queries(conn)
+            before = [explain(conn, sql) for _, sql in queries]
+
+        if current < SCHEMA_VERSION:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            backup_path = f"{DB_PATH}.backup_{timestamp}"
+            backup_database(DB_PATH, backup_path)
+            print(f"Backup created: {backup_path}")
+            upgrade_schema(conn)
+            print(f"Upgraded to schema version {get_schema_version(conn)}")
+        else:
+            print("Already up to date")
+
+        if args.reparse_teams:
+            count = backfill_team_season_columns(conn)
+            register_season_teams(conn)
+            bump_sync_version(conn)
+            conn.commit()
+            print(f"Re-parsed season columns for {count} teams")
+
+        if args.report:
+            after = [explain(conn, sql) for _, sql in queries]
+            print_plan_report(queries, before, after)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,9 @@ import pandas as pd
 from difflib import SequenceMatcher
 from datetime import datetime
 
+from schema import bump_sync_version, register_season_teams, upgrade_schema, team_season_columns
+from summary_tables import refresh_search_index, refresh_season_summary
+
 class NewSeasonManager:
     def __init__(self, db_path, csv_path):
         self.db_path = db_path
@@ -18,6 +21,9 @@ class NewSeasonManager:
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
         
+        # Make sure Teams has the parsed season columns we write below
+        upgrade_schema(self.conn)
+        
         # Track decisions for reporting
         self.exact_matches = []
         self.fuzzy_matches = []
@@ -67,11 +73,17 @@ class NewSeasonManager:
         team_name_proper = team_name_proper.replace('Usa', 'USA')
         full_team_name = f"{team_name_proper} {short_name}"
         
+        # Parsed season/division/display-name columns, so pages never re-parse names
+        parsed = team_season_columns(full_team_name)
+        
         cursor = self.conn.cursor()
         cursor.execute("""
-            INSERT INTO Teams (LongTeamName, Manager)
-            VALUES (?, ?)
-        """, (full_team_name, manager_name))
+            INSERT INTO Teams (LongTeamName, Manager, season_code, year,
+                               season_order, division, display_name, season_sort)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (full_team_name, manager_name, parsed['season_code'], parsed['year'],
+              parsed['season_order'], parsed['division'], parsed['display_name'],
+              parsed['season_sort']))
         
         team_number = cursor.lastrowid
         self.teams_created.append({
@@ -309,9 +321,9 @@ class NewSeasonManager:
         cursor.execute("""
             SELECT TeamNumber, LongTeamName
             FROM Teams 
-            WHERE LongTeamName LIKE ?
+            WHERE season_code = ?
             ORDER BY LongTeamName
-        """, (f'% {short_name}',))
+        """, (short_name,))
         
         teams = cursor.fetchall()
         subs_dict = self.find_team_subs(short_name)
@@ -392,9 +404,9 @@ class NewSeasonManager:
         cursor.execute("""
             SELECT TeamNumber, LongTeamName, Manager
             FROM Teams 
-            WHERE LongTeamName LIKE ?
+            WHERE season_code = ?
             ORDER BY LongTeamName
-        """, (f'% {short_name}',))
+        """, (short_name,))
         return cursor.fetchall()
     
     def get_team_players_for_export(self, team_number):
@@ -558,7 +570,24 @@ class NewSeasonManager:
         subs_result = self.add_subs_to_rosters(short_name)
         print(f"DEBUG: Subs result: {subs_result}")
         
-        # Commit all changes
+        # data_update.py takes the season's teams, Subs PIDs and opponent
+        # names from the registry
+        registered = register_season_teams(self.conn, [short_name])
+        print(f"[OK] Registered {registered} teams in season_teams for {short_name}")
+        
+        # New players and teams (and the season) become searchable; returning
+        # players are re-indexed so search shows their latest season
+        rostered = [row[0] for row in self.conn.execute('''
+            SELECT DISTINCT r.PersonNumber
+            FROM Roster r
+            JOIN Teams t ON t.TeamNumber = r.TeamNumber
+            WHERE t.season_code = ?
+        ''', (short_name,)).fetchall()]
+        refresh_search_index(self.conn, rostered, [team['TeamNumber'] for team in self.teams_created])
+        refresh_season_summary(self.conn, [short_name])
+        
+        # Commit all changes (and invalidate the web app's cached pages)
+        bump_sync_version(self.conn)
         self.conn.commit()
         
         # Export to Excel
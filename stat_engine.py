@@ -0,0 +1,184 @@
+"""
+Vectorized batting calculations for whole result sets.
+
+calculate_batting_stats() in app.py derives AB/AVG/OBP/SLG/OPS for one
+dict at a time, and the list pages called it once per row (copying each
+row twice on the way). batting_lines() takes every row of a query at once,
+computes the derived columns in one NumPy pass and hands back the rows
+ready for the templates.
+
+Values are rounded exactly like Python's round(), so pages render the
+same numbers as the per-row function.
+
+USAGE:
+    python stat_engine.py              # micro-benchmark against softball_stats.db
+    python stat_engine.py --repeat 50
+"""
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+
+DB_PATH = 'softball_stats.db'
+
+# Counting stats the formulas need; queries may alias 2B/3B or not
+COUNTING_COLUMNS = ['PA', 'H', 'BB', 'SF', 'OE', 'Doubles', 'Triples', 'HR']
+COLUMN_ALIASES = {'Doubles': '2B', 'Triples': '3B'}
+
+DERIVED_COLUMNS = ['AB', 'TB', 'AVG', 'OBP', 'SLG', 'OPS', 'convBA']
+
+
+def round3(values):
+    """np.round(values, 3) rounds halves to even on the scaled value, which
+    disagrees with Python's round() on ties like 1/400. Near-ties are
+    re-rounded in Python so results match calculate_batting_stats."""
+    scaled = values * 1000
+    rounded = np.rint(scaled) / 1000
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), 3)
+    return rounded
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator, 0.0 where the denominator isn't positive"""
+    out = np.zeros(len(numerator))
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def batting_columns(columns):
+    """Derived batting stats for a dict of equal-length counting-stat
+    arrays (missing/NULL values count as 0). Returns a dict of arrays."""
+    pa, h, bb, sf, oe, doubles, triples, hr = (
+        np.nan_to_num(np.asarray(columns[name], dtype=float)) for name in COUNTING_COLUMNS
+    )
+
+    ab = pa - bb - sf
+    total_bases = h + doubles + (2 * triples) + (3 * hr)
+
+    avg = round3(_ratio(h, ab))
+    # D1 board decision: OBP includes OE (Reached on Error)
+    obp = round3(_ratio(h + bb + oe, pa))
+    slg = round3(_ratio(total_bases, ab))
+    # convBA: (((4*(H+BB)+TB)/PA)/0.305*0.25)/10
+    conv_ba = round3(_ratio(4 * (h + bb) + total_bases, pa) / 0.305 * 0.25 / 10)
+
+    return {
+        'AB': np.maximum(ab, 0).astype(np.int64),
+        'TB': total_bases.astype(np.int64),
+        'AVG': avg,
+        'OBP': obp,
+        'SLG': slg,
+        'OPS': round3(obp + slg),
+        'convBA': conv_ba,
+    }
+
+
+def batting_lines(rows, columns=None):
+    """Rows (sqlite3.Row or dicts) -> list of dicts with the raw columns
+    plus AB, TB, AVG, OBP, SLG, OPS and convBA. Plain tuples work too
+    when their column names are passed (e.g. from cursor.description)."""
+    if not rows:
+        return []
+
+    if columns is not None:
+        keys = list(columns)
+        values = [tuple(row) for row in rows]
+    elif isinstance(rows[0], dict):
+        keys = list(rows[0].keys())
+        values = [tuple(row[key] for key in keys) for row in rows]
+    else:
+        keys = list(rows[0].keys())
+        values = [tuple(row) for row in rows]
+    # Transpose once: one tuple per column instead of one dict per row
+    by_column = dict(zip(keys, zip(*values)))
+
+    zeros = (0,) * len(values)
+    counting = {}
+    for name in COUNTING_COLUMNS:
+        source = name if name in by_column else COLUMN_ALIASES.get(name)
+        counting[name] = by_column.get(source, zeros)
+
+    derived = batting_columns(counting)
+    # tolist() gives native ints/floats, so templates and jsonify see plain values
+    derived_rows = zip(*(derived[name].tolist() for name in DERIVED_COLUMNS))
+    # If a derived column was also selected (e.g. a stored AB) the computed value wins
+    output_keys = keys + DERIVED_COLUMNS
+    return [dict(zip(output_keys, raw + calc)) for raw, calc in zip(values, derived_rows)]
+
+
+# ============================================================
+# Micro-benchmark
+# ============================================================
+
+# The /players query: every player's career totals
+PLAYERS_QUERY = '''
+    SELECT
+        p.PersonNumber, p.FirstName, p.LastName,
+        SUM(b.G) as Games, SUM(b.PA) as PA, SUM(b.R) as R, SUM(b.H) as H,
+        SUM(b."2B") as Doubles, SUM(b."3B") as Triples, SUM(b.HR) as HR,
+        SUM(b.BB) as BB, SUM(b.RBI) as RBI, SUM(b.SF) as SF, SUM(b.OE) as OE
+    FROM People p
+    LEFT JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
+    GROUP BY p.PersonNumber, p.FirstName, p.LastName
+    HAVING SUM(b.PA) > 0
+'''
+
+# Every batting row on record (per-game lines, as in player_games/boxscore)
+GAME_LINES_QUERY = '''
+    SELECT PlayerNumber, TeamNumber, GameNumber, PA, R, H, "2B", "3B", HR, BB, RBI, SF, OE
+    FROM batting_stats
+    WHERE G = 1
+'''
+
+
+def _time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    from app import calculate_batting_stats
+
+    parser = argparse.ArgumentParser(description='Benchmark batting_lines vs calculate_batting_stats')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--repeat', type=int, default=20, help='runs per case (best time is reported)')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    conn.row_factory = sqlite3.Row
+    try:
+        cases = [
+            ('/players (career totals)', conn.execute(PLAYERS_QUERY).fetchall()),
+            ('all game lines', conn.execute(GAME_LINES_QUERY).fetchall()),
+        ]
+    finally:
+        conn.close()
+
+    print(f"{'result set':<28} {'rows':>7} {'per-row':>10} {'batch':>10} {'speedup':>8}")
+    for label, rows in cases:
+        per_row = [calculate_batting_stats(dict(row)) for row in rows]
+        batch = batting_lines(rows)
+        mismatches = sum(
+            1 for old, new in zip(per_row, batch)
+            if any(old[key] != new[key] for key in ('AB', 'AVG', 'OBP', 'SLG', 'OPS'))
+        )
+
+        per_row_time = _time(lambda: [calculate_batting_stats(dict(row)) for row in rows], args.repeat)
+        batch_time = _time(lambda: batting_lines(rows), args.repeat)
+        speedup = per_row_time / batch_time if batch_time else 0
+        print(f"{label:<28} {len(rows):>7} {per_row_time * 1000:>8.2f}ms "
+              f"{batch_time * 1000:>8.2f}ms {speedup:>7.1f}x")
+        if mismatches:
+            print(f"  !! {mismatches} row(s) differ from calculate_batting_stats")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,735 @@
+"""
+Materialized summary tables for the web app.
+
+The season pages (batting, metrics, all-star, all-star export), the
+/seasons index and the /players and /pitching leaderboards used to
+aggregate the stats tables on every page view, and the player game log
+re-derived every game's decision pitcher. These tables hold the
+pre-computed rows so the routes become single indexed reads.
+
+data_update.py refreshes the seasons/teams it touched after every sync.
+To (re)build from scratch:
+
+    python summary_tables.py                 # all seasons
+    python summary_tables.py W26 F25         # specific season codes
+                                             # (game/matchup/career/season summary
+                                             # tables are always rebuilt in full)
+"""
+
+import sqlite3
+import sys
+
+from stat_engine import batting_lines
+
+DB_PATH = 'softball_stats.db'
+
+# ============================================================
+# player_season_batting
+# ============================================================
+
+# One row per player/team/season (Subs placeholders excluded),
+# holding raw counting stats plus the derived rate stats.
+PLAYER_SEASON_BATTING_DDL = '''
+    CREATE TABLE IF NOT EXISTS player_season_batting (
+        season_code         TEXT NOT NULL,
+        PersonNumber        INTEGER NOT NULL,
+        TeamNumber          INTEGER NOT NULL,
+        FirstName           TEXT,
+        LastName            TEXT,
+        LongTeamName        TEXT,
+        team_display_name   TEXT,
+        Games               INTEGER,
+        PA                  INTEGER,
+        R                   INTEGER,
+        H                   INTEGER,
+        Doubles             INTEGER,
+        Triples             INTEGER,
+        HR                  INTEGER,
+        BB                  INTEGER,
+        RBI                 INTEGER,
+        SF                  INTEGER,
+        OE                  INTEGER,
+        AB                  INTEGER,
+        AVG                 REAL,
+        OBP                 REAL,
+        SLG                 REAL,
+        OPS                 REAL,
+        convBA              REAL,
+        PRIMARY KEY (season_code, PersonNumber, TeamNumber)
+    )
+'''
+
+PLAYER_SEASON_BATTING_COLUMNS = [
+    'season_code', 'PersonNumber', 'TeamNumber', 'FirstName', 'LastName',
+    'LongTeamName', 'team_display_name', 'Games', 'PA', 'R', 'H', 'Doubles',
+    'Triples', 'HR', 'BB', 'RBI', 'SF', 'OE', 'AB', 'AVG', 'OBP', 'SLG',
+    'OPS', 'convBA',
+]
+
+
+# ============================================================
+# game_decisions
+# ============================================================
+
+# One row per game_stats row (one team's side of a game): the pitcher who
+# got that team's decision. The winning side has Decision 'W', the losing
+# side 'L', so a batter's opposing pitcher is the row for OpponentGStatNumber.
+GAME_DECISIONS_DDL = '''
+    CREATE TABLE IF NOT EXISTS game_decisions (
+        GStatNumber     INTEGER PRIMARY KEY,
+        TeamNumber      INTEGER NOT NULL,
+        GameNumber      INTEGER NOT NULL,
+        PitcherNumber   INTEGER NOT NULL,
+        Decision        TEXT NOT NULL
+    )
+'''
+
+
+# ============================================================
+# game_pairs
+# ============================================================
+
+# Both sides of a game, linked by GStatNumber: one row per game_stats row
+# pointing at the opponent's row (the opponent's team-game with the same date
+# that lists this team as its opponent). Box scores read both lineups through
+# it instead of searching game_stats by (TeamNumber, Date, OpponentTeamNumber).
+GAME_PAIRS_DDL = '''
+    CREATE TABLE IF NOT EXISTS game_pairs (
+        GStatNumber     INTEGER PRIMARY KEY,
+        TeamNumber      INTEGER NOT NULL,
+        GameNumber      INTEGER NOT NULL,
+        OppGStatNumber  INTEGER NOT NULL,
+        OppTeamNumber   INTEGER NOT NULL,
+        OppGameNumber   INTEGER NOT NULL
+    )
+'''
+
+
+# ============================================================
+# bvp_matchups
+# ============================================================
+
+# Career batter-vs-pitcher lines: one row per (batter, opposing decision
+# pitcher), summed over every game the batter played against that pitcher.
+BVP_MATCHUPS_DDL = '''
+    CREATE TABLE IF NOT EXISTS bvp_matchups (
+        BatterNumber    INTEGER NOT NULL,
+        PitcherNumber   INTEGER NOT NULL,
+        Games           INTEGER,
+        PA              INTEGER,
+        AB              INTEGER,
+        H               INTEGER,
+        HR              INTEGER,
+        BB              INTEGER,
+        PRIMARY KEY (BatterNumber, PitcherNumber)
+    )
+'''
+
+
+# ============================================================
+# Career leaderboards
+# ============================================================
+
+# One row per player: career batting totals and rate stats, the table behind
+# the /players leaderboard. Sub placeholders are excluded, as on the page.
+PLAYER_CAREER_BATTING_DDL = '''
+    CREATE TABLE IF NOT EXISTS player_career_batting (
+        PersonNumber    INTEGER PRIMARY KEY,
+        FirstName       TEXT,
+        LastName        TEXT,
+        name_key        TEXT,
+        Games           INTEGER,
+        PA              INTEGER,
+        R               INTEGER,
+        H               INTEGER,
+        Doubles         INTEGER,
+        Triples         INTEGER,
+        HR              INTEGER,
+        BB              INTEGER,
+        RBI             INTEGER,
+        SF              INTEGER,
+        OE              INTEGER,
+        AB              INTEGER,
+        TB              INTEGER,
+        AVG             REAL,
+        OBP             REAL,
+        SLG             REAL,
+        OPS             REAL,
+        convBA          REAL
+    )
+'''
+
+PLAYER_CAREER_BATTING_COLUMNS = [
+    'PersonNumber', 'FirstName', 'LastName', 'name_key', 'Games', 'PA', 'R',
+    'H', 'Doubles', 'Triples', 'HR', 'BB', 'RBI', 'SF', 'OE', 'AB', 'TB',
+    'AVG', 'OBP', 'SLG', 'OPS', 'convBA',
+]
+
+# Same for /pitching
+PITCHER_CAREER_DDL = '''
+    CREATE TABLE IF NOT EXISTS pitcher_career (
+        PersonNumber    INTEGER PRIMARY KEY,
+        FirstName       TEXT,
+        LastName        TEXT,
+        name_key        TEXT,
+        Games           INTEGER,
+        IP              REAL,
+        BB              INTEGER,
+        W               INTEGER,
+        L               INTEGER,
+        IBB             INTEGER,
+        BB_per_IP       REAL,
+        Win_Pct         REAL
+    )
+'''
+
+# Leaderboard sort columns; each gets a (column, PersonNumber) index so a
+# sorted page (and the keyset "next page" seek) is an index range scan
+PLAYER_CAREER_SORT_COLUMNS = ['name_key', 'Games', 'PA', 'AB', 'R', 'H', 'Doubles', 'Triples',
+                              'HR', 'RBI', 'BB', 'OE', 'AVG', 'OBP', 'SLG', 'OPS']
+PITCHER_CAREER_SORT_COLUMNS = ['name_key', 'Games', 'IP', 'W', 'L', 'BB', 'IBB', 'BB_per_IP', 'Win_Pct']
+
+# Placeholder "players" (team subs) never appear on the leaderboards
+NOT_A_SUB = '''
+    p.LastName != 'Subs'
+    AND p.FirstName NOT LIKE '%Sub%'
+    AND p.LastName NOT LIKE '%Sub%'
+    AND p.FirstName != 'Sub'
+    AND p.LastName != 'Sub'
+    AND LOWER(p.FirstName) NOT LIKE '%substitute%'
+    AND LOWER(p.LastName) NOT LIKE '%substitute%'
+'''
+
+
+# ============================================================
+# season_summary / league_summary
+# ============================================================
+
+# One row per Seasons row for the /seasons index: team, game and player
+# counts plus the champion. season_sort orders seasons newest last
+# (year * 10 + Winter=1/Summer=2/Fall=3), falling back to the year in the
+# season code when year_extracted is missing.
+SEASON_SUMMARY_DDL = '''
+    CREATE TABLE IF NOT EXISTS season_summary (
+        FilterNumber    TEXT PRIMARY KEY,
+        season_code     TEXT,
+        season_name     TEXT,
+        short_name      TEXT,
+        Champion        TEXT,
+        season_sort     INTEGER NOT NULL,
+        num_teams       INTEGER NOT NULL,
+        games           INTEGER NOT NULL,
+        players         INTEGER NOT NULL
+    )
+'''
+
+# Single row (id = 1) of league-wide totals for the /seasons header
+LEAGUE_SUMMARY_DDL = '''
+    CREATE TABLE IF NOT EXISTS league_summary (
+        id              INTEGER PRIMARY KEY CHECK (id = 1),
+        total_seasons   INTEGER NOT NULL,
+        total_teams     INTEGER NOT NULL,
+        total_games     INTEGER NOT NULL,
+        total_players   INTEGER NOT NULL
+    )
+'''
+
+
+# ============================================================
+# search_index
+# ============================================================
+
+# Full-text index behind /search and /api/v1/search: player names, team
+# names and season names. Every token is prefix-indexed (1-3 characters), so
+# "jo sm" finds John Smith while typing. rowid = id * 4 + kind code, so one
+# entry can be replaced without scanning the index.
+SEARCH_INDEX_DDL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        name,
+        kind UNINDEXED,
+        ref UNINDEXED,
+        detail UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '1 2 3'
+    )
+'''
+
+SEARCH_KINDS = {'player': 1, 'team': 2, 'season': 3}
+
+
+def ensure_summary_tables(conn):
+    """Create the summary tables if they don't exist yet."""
+    conn.execute(PLAYER_SEASON_BATTING_DDL)
+    conn.execute(GAME_DECISIONS_DDL)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_game_decisions_pitcher
+        ON game_decisions (PitcherNumber, Decision)
+    ''')
+    conn.execute(BVP_MATCHUPS_DDL)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_bvp_pitcher
+        ON bvp_matchups (PitcherNumber, BatterNumber)
+    ''')
+    conn.execute(GAME_PAIRS_DDL)
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_game_pairs_team_game
+        ON game_pairs (TeamNumber, GameNumber)
+    ''')
+    conn.execute(PLAYER_CAREER_BATTING_DDL)
+    for column in PLAYER_CAREER_SORT_COLUMNS:
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_career_batting_{column.lower()}
+            ON player_career_batting ({column}, PersonNumber)
+        ''')
+    conn.execute(PITCHER_CAREER_DDL)
+    for column in PITCHER_CAREER_SORT_COLUMNS:
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_pitcher_career_{column.lower()}
+            ON pitcher_career ({column}, PersonNumber)
+        ''')
+    conn.execute(SEARCH_INDEX_DDL)
+    conn.execute(SEASON_SUMMARY_DDL)
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_season_summary_sort ON season_summary (season_sort)')
+    conn.execute(LEAGUE_SUMMARY_DDL)
+
+
+def refresh_player_season_batting(conn, season_codes):
+    """Rebuild player_season_batting rows for the given season codes.
+    Caller is responsible for committing."""
+    ensure_summary_tables(conn)
+    placeholders = ', '.join('?' for _ in PLAYER_SEASON_BATTING_COLUMNS)
+    column_list = ', '.join(PLAYER_SEASON_BATTING_COLUMNS)
+
+    total = 0
+    for season_code in season_codes:
+        cursor = conn.execute('''
+            SELECT
+                p.PersonNumber, p.FirstName, p.LastName,
+                t.TeamNumber, t.LongTeamName, t.display_name as team_display_name,
+                SUM(b.G) as Games, SUM(b.PA) as PA,
+                SUM(b.R) as R, SUM(b.H) as H,
+                SUM(b."2B") as Doubles, SUM(b."3B") as Triples,
+                SUM(b.HR) as HR, SUM(b.BB) as BB,
+                SUM(b.RBI) as RBI, SUM(b.SF) as SF, SUM(b.OE) as OE
+            FROM People p
+            JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
+            JOIN Teams t ON b.TeamNumber = t.TeamNumber
+            WHERE t.season_code = ?
+                AND p.LastName != 'Subs'
+            GROUP BY p.PersonNumber, p.FirstName, p.LastName, t.TeamNumber, t.LongTeamName, t.display_name
+            HAVING SUM(b.G) > 0
+        ''', (season_code,))
+        columns = [description[0] for description in cursor.description]
+        lines = batting_lines(cursor.fetchall(), columns)
+
+        conn.execute('DELETE FROM player_season_batting WHERE season_code = ?', (season_code,))
+        for line in lines:
+            line['season_code'] = season_code
+        conn.executemany(
+            f'INSERT INTO player_season_batting ({column_list}) VALUES ({placeholders})',
+            [[line[col] for col in PLAYER_SEASON_BATTING_COLUMNS] for line in lines]
+        )
+        total += len(lines)
+
+    return total
+
+
+def refresh_game_decisions(conn, team_numbers=None):
+    """Rebuild game_decisions for the given teams (all teams if None).
+    Needs game_stats.GStatNumber, so run it after sync_game_stats.
+    If a team-game has more than one W/L pitcher (bad data), the winner
+    and then the pitcher with the most innings is kept.
+    Caller is responsible for committing."""
+    ensure_summary_tables(conn)
+    if team_numbers is None:
+        team_filter, params = '', []
+        conn.execute('DELETE FROM game_decisions')
+    else:
+        team_numbers = list(team_numbers)
+        if not team_numbers:
+            return 0
+        placeholders = ','.join('?' for _ in team_numbers)
+        team_filter, params = f'AND g.TeamNumber IN ({placeholders})', team_numbers
+        conn.execute(f'DELETE FROM game_decisions WHERE TeamNumber IN ({placeholders})', team_numbers)
+
+    cursor = conn.execute(f'''
+        INSERT OR IGNORE INTO game_decisions
+            (GStatNumber, TeamNumber, GameNumber, PitcherNumber, Decision)
+        SELECT g.GStatNumber, g.TeamNumber, g.GameNumber, ps.PlayerNumber,
+               CASE WHEN ps.W > 0 THEN 'W' ELSE 'L' END
+        FROM pitching_stats ps
+        JOIN game_stats g ON ps.TeamNumber = g.TeamNumber AND ps.GameNumber = g.GameNumber
+        WHERE (ps.W > 0 OR ps.L > 0)
+            AND g.GStatNumber IS NOT NULL
+            {team_filter}
+        ORDER BY g.GStatNumber, ps.W DESC, ps.IP DESC, ps.PlayerNumber
+    ''', params)
+    return cursor.rowcount
+
+
+def refresh_game_pairs(conn, team_numbers=None):
+    """Rebuild game_pairs for every game the given teams played, on either
+    side (all games if None). Needs game_stats.GStatNumber and game_date,
+    so run it after sync_game_stats has written them. If a date has two
+    games between the same teams (doubleheader), the closest GameNumber wins.
+    Caller is responsible for committing."""
+    ensure_summary_tables(conn)
+    if team_numbers is None:
+        team_filter, params = '', []
+        conn.execute('DELETE FROM game_pairs')
+    else:
+        team_numbers = list(team_numbers)
+        if not team_numbers:
+            return 0
+        placeholders = ','.join('?' for _ in team_numbers)
+        team_filter = f'AND (g.TeamNumber IN ({placeholders}) OR g.OpponentTeamNumber IN ({placeholders}))'
+        params = team_numbers + team_numbers
+        conn.execute(f'''
+            DELETE FROM game_pairs
+            WHERE TeamNumber IN ({placeholders}) OR OppTeamNumber IN ({placeholders})
+        ''', params)
+
+    cursor = conn.execute(f'''
+        INSERT OR IGNORE INTO game_pairs
+            (GStatNumber, TeamNumber, GameNumber, OppGStatNumber, OppTeamNumber, OppGameNumber)
+        SELECT g.GStatNumber, g.TeamNumber, g.GameNumber,
+               opp.GStatNumber, opp.TeamNumber, opp.GameNumber
+        FROM game_stats g
+        JOIN game_stats opp ON opp.TeamNumber = g.OpponentTeamNumber
+                           AND opp.game_date = g.game_date
+                           AND opp.OpponentTeamNumber = g.TeamNumber
+        WHERE g.GStatNumber IS NOT NULL
+            AND opp.GStatNumber IS NOT NULL
+            {team_filter}
+        ORDER BY g.GStatNumber, ABS(opp.GameNumber - g.GameNumber), opp.GStatNumber
+    ''', params)
+    return cursor.rowcount
+
+
+def refresh_bvp_matchups(conn, team_numbers=None):
+    """Rebuild bvp_matchups for every batter who played for or against the
+    given teams (everyone if None). Reads game_decisions, so refresh that
+    first. Caller is responsible for committing."""
+    ensure_summary_tables(conn)
+    if team_numbers is None:
+        batter_filter, params = '', []
+        conn.execute('DELETE FROM bvp_matchups')
+    else:
+        team_numbers = list(team_numbers)
+        if not team_numbers:
+            return 0
+        placeholders = ','.join('?' for _ in team_numbers)
+        # Career lines change for anyone who batted in one of these teams' games
+        batter_filter = f'''
+            AND b.PlayerNumber IN (
+                SELECT tb.PlayerNumber
+                FROM batting_stats tb
+                JOIN game_stats tg ON tb.TeamNumber = tg.TeamNumber AND tb.GameNumber = tg.GameNumber
+                WHERE tg.TeamNumber IN ({placeholders}) OR tg.OpponentTeamNumber IN ({placeholders})
+            )'''
+        params = team_numbers + team_numbers
+        conn.execute(f'''
+            DELETE FROM bvp_matchups WHERE BatterNumber IN (
+                SELECT tb.PlayerNumber
+                FROM batting_stats tb
+                JOIN game_stats tg ON tb.TeamNumber = tg.TeamNumber AND tb.GameNumber = tg.GameNumber
+                WHERE tg.TeamNumber IN ({placeholders}) OR tg.OpponentTeamNumber IN ({placeholders})
+            )
+        ''', params)
+
+    cursor = conn.execute(f'''
+        INSERT INTO bvp_matchups (BatterNumber, PitcherNumber, Games, PA, AB, H, HR, BB)
+        SELECT
+            b.PlayerNumber, d.PitcherNumber,
+            COUNT(*), SUM(b.PA), SUM(b.PA - b.BB - b.SF), SUM(b.H), SUM(b.HR), SUM(b.BB)
+        FROM batting_stats b
+        JOIN game_stats g ON b.TeamNumber = g.TeamNumber AND b.GameNumber = g.GameNumber
+        JOIN game_decisions d ON d.GStatNumber = g.OpponentGStatNumber
+        WHERE b.G = 1
+            {batter_filter}
+        GROUP BY b.PlayerNumber, d.PitcherNumber
+    ''', params)
+    return cursor.rowcount
+
+
+def _players_of_teams(table, team_numbers):
+    """(SQL, params) selecting everyone with a row in table for those teams"""
+    placeholders = ','.join('?' for _ in team_numbers)
+    return f'SELECT PlayerNumber FROM {table} WHERE TeamNumber IN ({placeholders})', list(team_numbers)
+
+
+def refresh_player_career_batting(conn, team_numbers=None):
+    """Rebuild career batting rows for everyone who batted for the given
+    teams (everyone if None). Caller is responsible for committing."""
+    ensure_summary_tables(conn)
+    if team_numbers is None:
+        player_filter, params = '', []
+        conn.execute('DELETE FROM player_career_batting')
+    else:
+        team_numbers = list(team_numbers)
+        if not team_numbers:
+            return 0
+        players_sql, params = _players_of_teams('batting_stats', team_numbers)
+        player_filter = f'AND p.PersonNumber IN ({players_sql})'
+        conn.execute(f'DELETE FROM player_career_batting WHERE PersonNumber IN ({players_sql})', params)
+
+    cursor = conn.execute(f'''
+        SELECT
+            p.PersonNumber, p.FirstName, p.LastName,
+            LOWER(p.FirstName || ' ' || p.LastName) as name_key,
+            SUM(b.G) as Games, SUM(b.PA) as PA,
+            SUM(b.R) as R, SUM(b.H) as H,
+            SUM(b."2B") as Doubles, SUM(b."3B") as Triples,
+            SUM(b.HR) as HR, SUM(b.BB) as BB,
+            SUM(b.RBI) as RBI, SUM(b.SF) as SF, SUM(b.OE) as OE
+        FROM People p
+        JOIN batting_stats b ON p.PersonNumber = b.PlayerNumber
+        WHERE {NOT_A_SUB}
+            {player_filter}
+        GROUP BY p.PersonNumber, p.FirstName, p.LastName
+        HAVING SUM(b.PA) > 0
+    ''', params)
+    columns = [description[0] for description in cursor.description]
+    lines = batting_lines(cursor.fetchall(), columns)
+
+    placeholders = ', '.join('?' for _ in PLAYER_CAREER_BATTING_COLUMNS)
+    conn.executemany(
+        f'''INSERT INTO player_career_batting ({', '.join(PLAYER_CAREER_BATTING_COLUMNS)})
+            VALUES ({placeholders})''',
+        [[line[col] for col in PLAYER_CAREER_BATTING_COLUMNS] for line in lines]
+    )
+    return len(lines)
+
+
+def refresh_pitcher_career(conn, team_numbers=None):
+    """Rebuild career pitching rows for everyone who pitched for the given
+    teams (everyone if None). Caller is responsible for committing."""
+    ensure_summary_tables(conn)
+    if team_numbers is None:
+        player_filter, params = '', []
+        conn.execute('DELETE FROM pitcher_career')
+    else:
+        team_numbers = list(team_numbers)
+        if not team_numbers:
+            return 0
+        players_sql, params = _players_of_teams('pitching_stats', team_numbers)
+        player_filter = f'AND p.PersonNumber IN ({players_sql})'
+        conn.execute(f'DELETE FROM pitcher_career WHERE PersonNumber IN ({players_sql})', params)
+
+    cursor = conn.execute(f'''
+        INSERT INTO pitcher_career
+            (PersonNumber, FirstName, LastName, name_key, Games, IP, BB, W, L, IBB, BB_per_IP, Win_Pct)
+        SELECT
+            p.PersonNumber, p.FirstName, p.LastName,
+            LOWER(p.FirstName || ' ' || p.LastName),
+            COUNT(*), SUM(ps.IP), SUM(ps.BB), SUM(ps.W), SUM(ps.L), SUM(ps.IBB),
+            CASE
+                WHEN SUM(ps.IP) > 0
+                THEN ROUND(CAST((SUM(ps.BB) - SUM(ps.IBB)) AS FLOAT) / SUM(ps.IP), 2)
+                ELSE 0.00
+            END,
+            CASE
+                WHEN (SUM(ps.W) + SUM(ps.L)) > 0
+                THEN ROUND(CAST(SUM(ps.W) AS FLOAT) / (SUM(ps.W) + SUM(ps.L)), 3)
+                ELSE 0.000
+            END
+        FROM People p
+        JOIN pitching_stats ps ON p.PersonNumber = ps.PlayerNumber
+        WHERE {NOT_A_SUB}
+            AND ps.IP > 0
+            {player_filter}
+        GROUP BY p.PersonNumber, p.FirstName, p.LastName
+        HAVING SUM(ps.IP) > 0
+    ''', params)
+    return cursor.rowcount
+
+
+def _id_filter(column, ids):
+    """(SQL condition, params) for column IN ids; everything when ids is None"""
+    if ids is None:
+        return '1', []
+    ids = list(ids)
+    return f"{column} IN ({','.join('?' for _ in ids)})", ids
+
+
+def refresh_search_index(conn, person_numbers=None, team_numbers=None):
+    """Re-index the given people and teams (all of them when None; pass []
+    to skip one kind). Seasons are always re-indexed - there are only a few
+    dozen. Players are listed with the last season they were rostered in.
+    Caller is responsible for committing."""
+    ensure_summary_tables(conn)
+    player = SEARCH_KINDS['player']
+    team = SEARCH_KINDS['team']
+    season = SEARCH_KINDS['season']
+    total = 0
+
+    if person_numbers is None or list(person_numbers):
+        condition, params = _id_filter('p.PersonNumber', person_numbers)
+        conn.execute(f'''
+            DELETE FROM search_index
+            WHERE rowid IN (SELECT p.PersonNumber * 4 + {player} FROM People p WHERE {condition})
+        ''', params)
+        total += conn.execute(f'''
+            INSERT INTO search_index (rowid, name, kind, ref, detail)
+            SELECT p.PersonNumber * 4 + {player},
+                   p.FirstName || ' ' || p.LastName, 'player', p.PersonNumber,
+                   (SELECT t.season_code
+                    FROM Roster r
+                    JOIN Teams t ON t.TeamNumber = r.TeamNumber
+                    WHERE r.PersonNumber = p.PersonNumber
+                    ORDER BY t.season_sort DESC
+                    LIMIT 1)
+            FROM People p
+            WHERE {NOT_A_SUB}
+                AND {condition}
+        ''', params).rowcount
+
+    if team_numbers is None or list(team_numbers):
+        condition, params = _id_filter('TeamNumber', team_numbers)
+        conn.execute(f'''
+            DELETE FROM search_index
+            WHERE rowid IN (SELECT TeamNumber * 4 + {team} FROM Teams WHERE {condition})
+        ''', params)
+        total += conn.execute(f'''
+            INSERT INTO search_index (rowid, name, kind, ref, detail)
+            SELECT TeamNumber * 4 + {team}, LongTeamName, 'team', TeamNumber, season_code
+            FROM Teams
+            WHERE LongTeamName IS NOT NULL
+                AND {condition}
+        ''', params).rowcount
+
+    conn.execute("DELETE FROM search_index WHERE kind = 'season'")
+    total += conn.execute(f'''
+        INSERT INTO search_index (rowid, name, kind, ref, detail)
+        SELECT rowid * 4 + {season}, season_name || COALESCE(' ' || TRIM(short_name), ''), 'season',
+               FilterNumber, TRIM(short_name)
+        FROM Seasons
+        WHERE season_name IS NOT NULL
+    ''').rowcount
+    return total
+
+
+def refresh_season_summary(conn, season_codes=None):
+    """Rebuild season_summary rows for the given season codes (all seasons
+    when None), then the league_summary totals. Games are counted once per
+    game, not once per team (game_pairs links the two halves).
+    Caller is responsible for committing."""
+    ensure_summary_tables(conn)
+    condition, params = _id_filter('TRIM(s.short_name)', season_codes)
+    if season_codes is None:
+        conn.execute('DELETE FROM season_summary')
+    else:
+        conn.execute(f'''
+            DELETE FROM season_summary
+            WHERE season_code IN ({','.join('?' for _ in params)})
+                OR FilterNumber NOT IN (SELECT FilterNumber FROM Seasons)
+        ''', params)
+
+    # Champion and year_extracted are legacy columns some Seasons tables
+    # lack: no champion then, and the year comes from the season code
+    seasons_columns = {row[1] for row in conn.execute('PRAGMA table_info(Seasons)')}
+    champion = 's.Champion' if 'Champion' in seasons_columns else 'NULL'
+    year = 's.year_extracted' if 'year_extracted' in seasons_columns else 'NULL'
+
+    count = conn.execute(f'''
+        INSERT OR REPLACE INTO season_summary
+            (FilterNumber, season_code, season_name, short_name, Champion, season_sort,
+             num_teams, games, players)
+        SELECT
+            s.FilterNumber, TRIM(s.short_name), s.season_name, s.short_name, {champion},
+            COALESCE({year}, 2000 + CAST(SUBSTR(TRIM(s.short_name), 2) AS INTEGER)) * 10
+                + CASE
+                    WHEN s.short_name LIKE 'F%' THEN 3
+                    WHEN s.short_name LIKE 'S%' THEN 2
+                    WHEN s.short_name LIKE 'W%' THEN 1
+                    ELSE 0
+                  END,
+            (SELECT COUNT(*) FROM Teams t WHERE t.season_code = TRIM(s.short_name)),
+            (SELECT COUNT(*)
+             FROM Teams t
+             JOIN game_stats g ON g.TeamNumber = t.TeamNumber
+             LEFT JOIN game_pairs gp ON gp.GStatNumber = g.GStatNumber
+             WHERE t.season_code = TRIM(s.short_name)
+                AND (gp.OppGStatNumber IS NULL OR g.GStatNumber < gp.OppGStatNumber)),
+            (SELECT COUNT(DISTINCT b.PlayerNumber)
+             FROM Teams t
+             JOIN batting_stats b ON b.TeamNumber = t.TeamNumber
+             JOIN People p ON p.PersonNumber = b.PlayerNumber
+             WHERE t.season_code = TRIM(s.short_name)
+                AND COALESCE(p.LastName, '') != 'Subs')
+        FROM Seasons s
+        WHERE {condition}
+    ''', params).rowcount
+
+    # Players are counted once across the whole league, so that total can't
+    # be summed from the season rows
+    conn.execute('''
+        INSERT OR REPLACE INTO league_summary (id, total_seasons, total_teams, total_games, total_players)
+        SELECT 1, COUNT(*), COALESCE(SUM(num_teams), 0), COALESCE(SUM(games), 0),
+            (SELECT COUNT(*)
+             FROM People p
+             WHERE COALESCE(p.LastName, '') != 'Subs'
+                AND EXISTS (SELECT 1
+                            FROM batting_stats b
+                            JOIN Teams t ON t.TeamNumber = b.TeamNumber
+                            WHERE b.PlayerNumber = p.PersonNumber
+                                AND t.season_code IN (SELECT season_code FROM season_summary)))
+        FROM season_summary
+    ''')
+    return count
+
+
+def season_codes_for_teams(conn, team_numbers):
+    """Map team numbers to the season codes they belong to."""
+    team_numbers = list(team_numbers)
+    if not team_numbers:
+        return []
+    placeholders = ','.join('?' for _ in team_numbers)
+    rows = conn.execute(f'''
+        SELECT DISTINCT season_code
+        FROM Teams
+        WHERE TeamNumber IN ({placeholders}) AND season_code IS NOT NULL
+    ''', team_numbers).fetchall()
+    return [row[0] for row in rows]
+
+
+def all_season_codes(conn):
+    """Every season code in the Seasons table."""
+    rows = conn.execute('''
+        SELECT DISTINCT TRIM(short_name) FROM Seasons
+        WHERE short_name IS NOT NULL AND TRIM(short_name) != ''
+    ''').fetchall()
+    return [row[0] for row in rows]
+
+
+def main():
+    from schema import bump_sync_version, upgrade_schema
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        upgrade_schema(conn)
+        season_codes = sys.argv[1:] or all_season_codes(conn)
+        count = refresh_player_season_batting(conn, season_codes)
+        decisions = refresh_game_decisions(conn)
+        pairs = refresh_game_pairs(conn)
+        matchups = refresh_bvp_matchups(conn)
+        careers = refresh_player_career_batting(conn)
+        pitchers = refresh_pitcher_career(conn)
+        searchable = refresh_search_index(conn)
+        seasons = refresh_season_summary(conn)
+        bump_sync_version(conn)
+        conn.commit()
+        print(f"player_season_batting: {count} rows for {len(season_codes)} season(s)")
+        print(f"game_decisions: {decisions} rows")
+        print(f"game_pairs: {pairs} rows")
+        print(f"bvp_matchups: {matchups} rows")
+        print(f"player_career_batting: {careers} rows")
+        print(f"pitcher_career: {pitchers} rows")
+        print(f"search_index: {searchable} entries")
+        print(f"season_summary: {seasons} rows (plus league_summary)")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()